@@ -0,0 +1,161 @@
+"""
+Regressão e benchmark do NMS: verifica que o NMS do ONNXDetector (matriz de IoU e, acima de
+NMS_MATRIX_MAX_BOXES caixas por grupo, laço guloso) mantém exatamente as caixas da implementação original
+(laço em Python), por classe e por imagem do lote. Uma divergência encerra o script com erro (código de
+saída 1), mesmo com python -O.
+
+O tempo é comparado na mesma carga: uma classe (como o original) e por classe (original aplicado a cada
+classe), para cada quantidade de caixas, com a matriz e o laço forçados para mostrar o ponto de cruzamento.
+
+Uso (a partir da pasta CRON_ONNX):
+    python -m benchmarks.bench_nms [--boxes 100 1000 2000] [--runs 20]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from classes.ONNXDetector import ONNXDetector
+from configs.config import NMS_MATRIX_MAX_BOXES
+
+
+def legacy_non_max_suppression(boxes, scores, iou_threshold):
+    """Implementação original do ONNXDetector, mantida como referência"""
+    if len(boxes) == 0: return []
+    x1 = boxes[:, 0] - boxes[:, 2] / 2
+    y1 = boxes[:, 1] - boxes[:, 3] / 2
+    x2 = boxes[:, 0] + boxes[:, 2] / 2
+    y2 = boxes[:, 1] + boxes[:, 3] / 2
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        w = np.maximum(0.0, xx2 - xx1)
+        h = np.maximum(0.0, yy2 - yy1)
+        intersection = w * h
+        iou = intersection / (areas[i] + areas[order[1:]] - intersection)
+        inds = np.where(iou <= iou_threshold)[0]
+        order = order[inds + 1]
+    return keep
+
+
+def random_boxes(rng, count):
+    """Caixas (cx, cy, w, h) agrupadas, como as âncoras do YOLO em volta de cada planta"""
+    centers = rng.uniform(40, 600, size=(max(1, count // 40), 2))
+    cxcy = centers[rng.integers(0, len(centers), count)] + rng.normal(0, 8, size=(count, 2))
+    wh = rng.uniform(20, 120, size=(count, 2))
+    boxes = np.concatenate([cxcy, wh], axis=1).astype(np.float32)
+    scores = rng.uniform(0.25, 1.0, size=count).astype(np.float32)
+    return boxes, scores
+
+
+def legacy_grouped(boxes, scores, groups, iou_threshold):
+    """Implementação original aplicada a cada grupo (classe/imagem), na ordem decrescente de score"""
+    keep = []
+    for group in np.unique(groups):
+        members = np.flatnonzero(groups == group)
+        keep += [members[i] for i in legacy_non_max_suppression(boxes[members], scores[members], iou_threshold)]
+    return sorted((int(i) for i in keep), key=lambda i: -scores[i])
+
+
+def assert_equal(actual, expected, message):
+    # Sem assert: a verificação não pode sumir com python -O
+    if actual != expected:
+        position = next((i for i, (a, b) in enumerate(zip(actual, expected)) if a != b), min(len(actual), len(expected)))
+        raise AssertionError(
+            f"{message}: {len(actual)} caixas mantidas (esperado {len(expected)}), primeira diferença na posição "
+            f"{position}: {actual[position:position + 3]} x {expected[position:position + 3]}"
+        )
+
+
+def check_regression(nms, rng, trials=200):
+    """
+    O NMS vetorizado deve manter exatamente as mesmas caixas da implementação original: na mesma ordem
+    para uma única classe e, com várias classes e imagens, as mesmas caixas de cada grupo.
+    Scores distintos (uniformes em float32): empates mudariam a ordem entre as implementações.
+    """
+    matrix_max = nms.nms_matrix_max
+
+    for trial in range(trials):
+        boxes, scores = random_boxes(rng, int(rng.integers(0, 400)))
+        class_ids = rng.integers(0, 3, len(boxes))
+        image_ids = rng.integers(0, 4, len(boxes))
+        single = [int(i) for i in legacy_non_max_suppression(boxes, scores, nms.iou_threshold)]
+        grouped = legacy_grouped(boxes, scores, image_ids * 3 + class_ids, nms.iou_threshold)
+
+        # Matriz e laço guloso (limite zerado) devem dar o mesmo resultado
+        for path, nms.nms_matrix_max in (("matriz", matrix_max), ("laço", 0)):
+            actual = [int(i) for i in nms.non_max_suppression(boxes, scores, np.zeros(len(boxes), dtype=np.int64))]
+            assert_equal(actual, single, f"NMS de uma classe ({path}) diverge do original na tentativa {trial}")
+
+            actual = [int(i) for i in nms.non_max_suppression(boxes, scores, class_ids, image_ids)]
+            assert_equal(actual, grouped, f"NMS por classe/imagem ({path}) diverge do original na tentativa {trial}")
+
+    nms.nms_matrix_max = matrix_max
+    print(f"✅ Regressão: {trials} conjuntos (uma classe e por classe/imagem, matriz e laço) idênticos ao original")
+
+
+def timed(fn, runs):
+    fn()
+    start = time.perf_counter()
+    for _ in range(runs):
+        kept = fn()
+    return (time.perf_counter() - start) / runs * 1000, len(kept)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", type=int, nargs="+", default=[100, 1000, 2000],
+                        help="Detecções acima do limiar de confiança (uma medição por valor)")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    # Só o NMS é usado: dispensa carregar um modelo
+    nms = ONNXDetector.__new__(ONNXDetector)
+    nms.iou_threshold = 0.7
+    nms.nms_matrix_max = NMS_MATRIX_MAX_BOXES
+
+    try:
+        check_regression(nms, rng)
+    except AssertionError as e:
+        print(f"❌ Regressão do NMS: {e}")
+        raise SystemExit(1)
+
+    matrix_max = nms.nms_matrix_max
+
+    def current(boxes, scores, class_ids, limit):
+        nms.nms_matrix_max = limit
+        return nms.non_max_suppression(boxes, scores, class_ids)
+
+    print(f"\n{args.runs} execuções por caso | limite da matriz: {matrix_max} caixas por grupo")
+    for count in args.boxes:
+        boxes, scores = random_boxes(rng, count)
+        single = np.zeros(count, dtype=np.int64)
+        class_ids = rng.integers(0, 3, count)
+
+        cases = [
+            ("uma classe: original", lambda: legacy_non_max_suppression(boxes, scores, nms.iou_threshold)),
+            ("uma classe: matriz", lambda: current(boxes, scores, single, count)),
+            ("uma classe: laço", lambda: current(boxes, scores, single, 0)),
+            ("uma classe: atual", lambda: current(boxes, scores, single, matrix_max)),
+            ("por classe: original", lambda: legacy_grouped(boxes, scores, class_ids, nms.iou_threshold)),
+            ("por classe: atual", lambda: current(boxes, scores, class_ids, matrix_max)),
+        ]
+
+        print(f"\n{count} detecções")
+        for name, fn in cases:
+            elapsed, kept = timed(fn, args.runs)
+            print(f"  {name:<22} {elapsed:8.2f} ms | {kept} caixas mantidas")
+
+    nms.nms_matrix_max = matrix_max
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""
+Benchmark offline do ciclo completo do CRON_ONNX: captura → pré-processamento → inferência →
+pós-processamento/NMS → publicação MQTT → registro no banco.
+
+Tudo roda localmente: um servidor HTTP simula as ESP32-CAM servindo JPEGs gravados, um cliente
+MQTT falso substitui o broker e um Supabase falso substitui o Storage/banco. Cada etapa é medida
+separadamente (p50/p95/p99), junto com a vazão para diferentes quantidades de câmeras e a memória.
+O resultado é salvo em JSON para comparar execuções entre commits (--baseline).
+
+Uso (a partir da pasta CRON_ONNX):
+    python -m benchmarks.bench_pipeline [--images pasta_jpegs] [--cameras 1 4 8] [--cycles 20]
+                                        [--baseline benchmarks/results/anterior.json]
+"""
+import argparse
+import contextlib
+import http.server
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from configs.config import MODEL_PATH
+from classes.ONNXDetector import ONNXDetector
+from classes.UploadQueue import UploadQueue
+from classes.ImageArchive import ImageArchive
+from classes.MQTTOutbox import MQTTOutbox
+from classes.ResultLogger import ResultLogger
+from classes.PhaseTracker import PhaseTracker
+from classes.FrameGate import FrameGate
+from classes.CaptureScheduler import CaptureScheduler
+import utils.functions as functions
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+# ----------------------------------------------------------------------
+# SIMULADORES (ESP32-CAM, MQTT E SUPABASE)
+# ----------------------------------------------------------------------
+def load_jpegs(folder: str):
+    """Bytes originais dos JPEGs gravados, ou um quadro UXGA sintético se nenhuma pasta for informada"""
+    if folder:
+        jpegs = [
+            open(os.path.join(folder, name), "rb").read()
+            for name in sorted(os.listdir(folder)) if name.lower().endswith((".jpg", ".jpeg"))
+        ]
+        if not jpegs:
+            raise ValueError(f"Nenhum JPEG encontrado em: {folder}")
+        return jpegs
+
+    image = (np.random.default_rng(0).random((1200, 1600, 3)) * 255).astype(np.uint8)
+    return [cv2.imencode(".jpg", image)[1].tobytes()]
+
+
+MJPEG_BOUNDARY = "123456789000000000000987654321"  # Mesma fronteira do firmware CameraWebServer
+
+
+def start_camera_server(jpegs, latency_ms: float, stream_fps: float = 20.0):
+    """
+    Servidor HTTP local que responde como os endpoints /capture (um JPEG por requisição)
+    e /stream (MJPEG multipart contínuo, a stream_fps quadros/s) da ESP32-CAM
+    """
+    frames = itertools.cycle(jpegs)
+    frames_lock = threading.Lock()
+
+    class CameraHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, como o pool do CameraFetcher espera
+
+        def do_stream(self):
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header("Content-Type", f"multipart/x-mixed-replace;boundary={MJPEG_BOUNDARY}")
+            self.end_headers()
+
+            try:
+                while True:
+                    with frames_lock:
+                        body = next(frames)
+
+                    self.wfile.write(
+                        f"\r\n--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                        f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    )
+                    self.wfile.write(body)
+                    time.sleep(1 / stream_fps)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def do_GET(self):
+            if self.path.startswith("/stream"):
+                return self.do_stream()
+
+            with frames_lock:
+                body = next(frames)
+            time.sleep(latency_ms / 1000)
+
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), CameraHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+class FakeMessageInfo:
+    """Imita o MQTTMessageInfo do paho-mqtt para uma publicação já confirmada"""
+    rc = 0
+
+    def wait_for_publish(self, timeout=None):
+        pass
+
+    def is_published(self):
+        return True
+
+
+class FakeMQTTClient:
+    """Substitui o paho-mqtt: apenas registra as publicações"""
+
+    def __init__(self):
+        self.published = []
+
+    def is_connected(self):
+        return True
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        self.published.append((topic, payload))
+        return FakeMessageInfo()
+
+
+class FakeSupabase:
+    """Imita a API do cliente Supabase usada por SupabaseDB (storage.from_ e table().insert)"""
+
+    def __init__(self):
+        self.uploads = {}
+        self.rows = []
+
+    @property
+    def storage(self):
+        return self
+
+    def from_(self, bucket_name):
+        return self
+
+    def upload(self, path, file, file_options=None):
+        self.uploads[path] = len(file)
+
+    def get_public_url(self, file_name):
+        return f"http://supabase.local/registros/{file_name}"
+
+    def table(self, table_name):
+        return self
+
+    def insert(self, data):
+        self._pending = data if isinstance(data, list) else [data]
+        return self
+
+    def execute(self):
+        self.rows.extend(self._pending)
+        return type("Response", (), {"data": self._pending})()
+
+
+# ----------------------------------------------------------------------
+# MEDIÇÃO DAS ETAPAS
+# ----------------------------------------------------------------------
+class StageTimer:
+    """Acumula as durações (ms) de cada etapa; seguro para as threads de captura"""
+
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, elapsed_ms):
+        with self._lock:
+            self.samples.setdefault(stage, []).append(elapsed_ms)
+
+    def wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(stage, (time.perf_counter() - start) * 1000)
+        return timed
+
+    def reset(self):
+        with self._lock:
+            self.samples = {}
+
+
+class TimedSession:
+    """Envolve a InferenceSession para medir apenas o session.run"""
+
+    def __init__(self, session, timer):
+        self._session = session
+        self.run = timer.wrap("session.run", session.run)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+def instrument(detector, client, timer, fake_supabase, frame_gate: bool = False):
+    """Instala os medidores nas funções do pipeline e os simuladores no lugar dos serviços externos"""
+    detector.session = TimedSession(detector.session, timer)
+    detector.decode_bytes = timer.wrap("decode", detector.decode_bytes)
+    detector.preprocess_array = timer.wrap("preprocess", detector.preprocess_array)
+    detector.postprocess_batch_detections = timer.wrap("postprocess", detector.postprocess_batch_detections)
+    detector.non_max_suppression = timer.wrap("non_max_suppression", detector.non_max_suppression)
+
+    client.publish = timer.wrap("publish", client.publish)
+
+    fetcher = functions.get_camera_fetcher()
+    fetcher.fetch = timer.wrap("capture", fetcher.fetch)
+
+    # Logs e fila de envios em uma pasta temporária, para não misturar com os dados reais
+    work_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    functions._result_logger = ResultLogger(os.path.join(work_dir, "results_log.jsonl")).start()
+    functions.IMAGE_SAVE_ENABLED = False
+    functions._image_archive = ImageArchive(os.path.join(work_dir, "archive")).start()
+    functions._phase_tracker = PhaseTracker(os.path.join(work_dir, "phase_state.json"))
+    functions._capture_scheduler = CaptureScheduler(state_path=os.path.join(work_dir, "capture_schedule.json"))
+
+    # O simulador repete os mesmos JPEGs: com o filtro ativo, quase todo ciclo reaproveitaria as detecções
+    functions.FRAME_GATE_ENABLED = frame_gate
+    functions._frame_gate = FrameGate(os.path.join(work_dir, "frame_gate.json"))
+
+    functions._supabase_client = fake_supabase
+    functions._upload_queue = UploadQueue(
+        functions._supabase, functions.get_supabase_client, functions.log_results, queue_dir=work_dir
+    ).start()
+    functions.save_to_database = timer.wrap("save_to_database", functions.save_to_database)
+
+    functions._mqtt_outbox = MQTTOutbox(client, functions.log_results, queue_dir=work_dir).start()
+    functions.publish_command = timer.wrap("publish_command", functions.publish_command)
+
+
+def percentiles(values):
+    values = np.asarray(values)
+    return {
+        "count": int(len(values)),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+        "mean": float(values.mean()),
+    }
+
+
+def current_rss_mib():
+    """RSS atual do processo (Linux), em MiB"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "desconhecido"
+
+
+# ----------------------------------------------------------------------
+# EXECUÇÃO
+# ----------------------------------------------------------------------
+def run_scenario(detector, client, timer, port, camera_count, cycles):
+    """Roda os ciclos com camera_count câmeras e retorna as métricas do cenário"""
+    cameras = [
+        {"id": f"bench_{i:02d}", "url": f"http://127.0.0.1:{port}/capture?cam={i}",
+         "stream_url": f"http://127.0.0.1:{port}/stream?cam={i}", "rotation": "90_ccw", "topic": f"bench/servo/{i}"}
+        for i in range(camera_count)
+    ]
+
+    # Aquecimento: conexões keep-alive, buffers do pré-processamento e arena do onnxruntime
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        functions.run_detection_cycle(detector, client, cameras)
+    timer.reset()
+
+    cycle_times = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(cycles):
+            start = time.perf_counter()
+            functions.run_detection_cycle(detector, client, cameras)
+            cycle_times.append((time.perf_counter() - start) * 1000)
+
+    total_seconds = sum(cycle_times) / 1000
+
+    return {
+        "cameras": camera_count,
+        "cycles": cycles,
+        "cycle_ms": percentiles(cycle_times),
+        "throughput_fps": camera_count * cycles / total_seconds,
+        "stages_ms": {stage: percentiles(values) for stage, values in sorted(timer.samples.items())},
+        "rss_mib": current_rss_mib(),
+    }
+
+
+def print_scenario(result):
+    print(f"\n📷 {result['cameras']} câmera(s) | {result['cycles']} ciclos | "
+          f"vazão {result['throughput_fps']:.2f} quadros/s | RSS {result['rss_mib']:.1f} MiB")
+    print(f"   {'etapa':<22}{'p50':>9}{'p95':>9}{'p99':>9}{'n':>7}")
+    for stage, stats in [("ciclo completo", result["cycle_ms"])] + list(result["stages_ms"].items()):
+        print(f"   {stage:<22}{stats['p50']:9.2f}{stats['p95']:9.2f}{stats['p99']:9.2f}{stats['count']:7d}")
+
+
+def compare_with_baseline(report, baseline_path, tolerance):
+    """Mostra a variação de p50 por etapa em relação a um resultado anterior"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    previous = {scenario["cameras"]: scenario for scenario in baseline["scenarios"]}
+    print(f"\n📊 Comparação com {baseline_path} (commit {baseline['commit']})")
+
+    regressions = 0
+    for scenario in report["scenarios"]:
+        old = previous.get(scenario["cameras"])
+        if not old:
+            continue
+
+        pairs = [("ciclo completo", scenario["cycle_ms"], old["cycle_ms"])]
+        pairs += [(stage, stats, old["stages_ms"][stage])
+                  for stage, stats in scenario["stages_ms"].items() if stage in old["stages_ms"]]
+
+        for stage, new_stats, old_stats in pairs:
+            change = new_stats["p50"] / old_stats["p50"] - 1 if old_stats["p50"] else 0.0
+            flag = "⚠️" if change > tolerance else "  "
+            regressions += change > tolerance
+            print(f"{flag} {scenario['cameras']:>3} câm. {stage:<22} {old_stats['p50']:8.2f} → "
+                  f"{new_stats['p50']:8.2f} ms ({change:+.1%})")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--images", help="Pasta com JPEGs gravados da ESP32-CAM (padrão: quadro sintético)")
+    parser.add_argument("--cameras", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--camera-latency-ms", type=float, default=0.0, help="Atraso simulado da ESP32-CAM")
+    parser.add_argument("--output", help=f"Padrão: {RESULTS_DIR}/<data>_<commit>.json")
+    parser.add_argument("--stream", action="store_true",
+                        help="Captura pelo stream MJPEG (CAPTURE_MODE = \"stream\") em vez do /capture")
+    parser.add_argument("--stream-fps", type=float, default=20.0, help="Quadros/s do stream MJPEG simulado")
+    parser.add_argument("--frame-gate", action="store_true",
+                        help="Mantém o filtro de cena inalterada ativo (mede o caminho com detecções reaproveitadas)")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Aumento de p50 considerado regressão")
+    args = parser.parse_args()
+
+    server = start_camera_server(load_jpegs(args.images), args.camera_latency_ms, args.stream_fps)
+    port = server.server_address[1]
+
+    timer = StageTimer()
+    detector = ONNXDetector(args.model)
+    client = FakeMQTTClient()
+    instrument(detector, client, timer, FakeSupabase(), args.frame_gate)
+    functions.get_camera_fetcher().mode = "stream" if args.stream else "snapshot"
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "processor": platform.machine(), "cpus": os.cpu_count()},
+        "model": detector.model_path,
+        "scenarios": [],
+    }
+
+    for camera_count in args.cameras:
+        result = run_scenario(detector, client, timer, port, camera_count, args.cycles)
+        report["scenarios"].append(result)
+        print_scenario(result)
+
+    # ru_maxrss é em KiB no Linux
+    report["peak_rss_mib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nPico de RSS: {report['peak_rss_mib']:.1f} MiB")
+
+    output_path = args.output or os.path.join(
+        RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{report['commit']}.json"
+    )
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Resultado salvo em: {output_path}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(report, args.baseline, args.tolerance)
+        print(f"\n{regressions} etapa(s) acima da tolerância de {args.tolerance:.0%}")
+
+    server.shutdown()
+    functions.get_camera_fetcher().close()
+
+
+if __name__ == "__main__":
+    main()
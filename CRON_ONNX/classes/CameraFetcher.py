@@ -0,0 +1,166 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from configs.config import (
+    CAPTURE_TIMEOUT_SECONDS, CAPTURE_RETRIES, CAPTURE_BACKOFF_SECONDS, CAPTURE_MAX_WORKERS,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN_SECONDS, CAPTURE_MODE
+)
+from classes.MJPEGStream import MJPEGStream
+
+
+class CameraFetcher:
+    """
+    Captura imagens de várias ESP32-CAM em paralelo, reaproveitando conexões keep-alive.
+    Aplica timeout por câmera, novas tentativas com backoff e um circuit breaker que pula
+    câmeras que falham repetidamente.
+    No modo "stream", câmeras com "stream_url" no registro mantêm uma conexão MJPEG aberta e
+    cada captura entrega o quadro mais recente do stream, sem disparar uma nova exposição.
+    """
+
+    def __init__(self, max_workers: int = CAPTURE_MAX_WORKERS, retries: int = CAPTURE_RETRIES,
+                 backoff: float = CAPTURE_BACKOFF_SECONDS, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 cooldown: float = CIRCUIT_COOLDOWN_SECONDS, mode: str = CAPTURE_MODE, log=None):
+        self.mode = mode
+        self.log = log
+        self.retries = retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        # Sessão única com pool de conexões: evita um novo handshake TCP a cada captura
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="camera_fetch")
+
+        # Estado do circuit breaker por câmera: falhas consecutivas e instante até quando fica aberto
+        self._failures = {}
+        self._open_until = {}
+        self._lock = threading.Lock()
+
+        # Leitores MJPEG por câmera (modo "stream"), criados na primeira captura
+        self._streams = {}
+
+    def is_available(self, camera_id: str):
+        """Retorna False enquanto o circuito da câmera estiver aberto (câmera ignorada)"""
+        with self._lock:
+            return time.monotonic() >= self._open_until.get(camera_id, 0.0)
+
+    def _record_success(self, camera_id: str):
+        with self._lock:
+            self._failures[camera_id] = 0
+            self._open_until.pop(camera_id, None)
+
+    def _record_failure(self, camera_id: str):
+        with self._lock:
+            failures = self._failures.get(camera_id, 0) + 1
+            self._failures[camera_id] = failures
+
+            if failures >= self.failure_threshold:
+                # Após o cooldown a câmera recebe uma nova tentativa (meio-aberto);
+                # se falhar de novo, o circuito reabre imediatamente
+                self._open_until[camera_id] = time.monotonic() + self.cooldown
+                print(f"⛔ Câmera {camera_id} ignorada por {self.cooldown}s após {failures} falhas seguidas.")
+
+    def _get_stream(self, camera: dict):
+        with self._lock:
+            stream = self._streams.get(camera["id"])
+            if stream is None:
+                stream = self._streams[camera["id"]] = MJPEGStream(camera, self.log).start()
+
+            return stream
+
+    def fetch_stream(self, camera: dict):
+        """
+        Entrega o quadro mais recente do stream MJPEG da câmera (ver MJPEGStream.next_frame).
+        Retorna (bytes JPEG, None) em caso de sucesso ou (None, erro) em caso de falha.
+        """
+        timeout = camera.get("timeout", CAPTURE_TIMEOUT_SECONDS)
+        image_bytes, error = self._get_stream(camera).next_frame(timeout)
+
+        if image_bytes is None:
+            print(f"❌ [{camera['id']}] Falha ao obter quadro do stream: {error}")
+            self._record_failure(camera["id"])
+        else:
+            self._record_success(camera["id"])
+
+        return image_bytes, error
+
+    def fetch(self, camera: dict):
+        """
+        Captura uma imagem da câmera, com novas tentativas e backoff exponencial.
+        No modo "stream", usa o stream MJPEG das câmeras que têm "stream_url".
+        Retorna (bytes JPEG, None) em caso de sucesso ou (None, erro) em caso de falha.
+        """
+        if self.mode == "stream" and camera.get("stream_url"):
+            return self.fetch_stream(camera)
+
+        timeout = camera.get("timeout", CAPTURE_TIMEOUT_SECONDS)
+        error = None
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+            try:
+                response = self.session.get(camera["url"], timeout=timeout)
+                response.raise_for_status()
+
+                image_bytes = response.content
+
+                # Verificação barata do cabeçalho JPEG (SOI); a decodificação fica para o detector
+                if not image_bytes.startswith(b"\xff\xd8"):
+                    raise ValueError("A resposta recebida não é uma imagem JPEG válida.")
+
+                self._record_success(camera["id"])
+                return image_bytes, None
+
+            except (requests.exceptions.RequestException, ValueError) as e:
+                error = e
+                print(f"❌ [{camera['id']}] Tentativa {attempt + 1}/{self.retries + 1} falhou: {e}")
+
+        self._record_failure(camera["id"])
+        return None, error
+
+    def fetch_all(self, cameras, on_frame):
+        """
+        Dispara as capturas de todas as câmeras disponíveis em paralelo.
+        on_frame(camera, image_bytes, error) é chamado assim que cada captura termina,
+        sem esperar pela câmera mais lenta. Retorna o número de capturas disparadas.
+        """
+        submitted = 0
+
+        for camera in cameras:
+            if not self.is_available(camera["id"]):
+                print(f"⏭️ Câmera {camera['id']} ignorada (circuito aberto).")
+                continue
+
+            streaming = self.mode == "stream" and camera.get("stream_url")
+            print(f"📸 Tentando capturar imagem de: {camera['stream_url'] if streaming else camera['url']}")
+            future = self.executor.submit(self.fetch, camera)
+            future.add_done_callback(lambda f, camera=camera: on_frame(camera, *self._result(f)))
+            submitted += 1
+
+        return submitted
+
+    @staticmethod
+    def _result(future):
+        """Converte exceções inesperadas da captura em (None, erro)"""
+        try:
+            return future.result()
+        except Exception as e:
+            return None, e
+
+    def close(self):
+        """Encerra as threads de captura, os streams e as conexões abertas"""
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+        for stream in self._streams.values():
+            stream.stop()
@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import random
+import threading
+
+from configs.config import (
+    SCHEDULE_STATE_PATH, LOOP_INTERVAL_SECONDS, SCHEDULE_MIN_INTERVAL_SECONDS, SCHEDULE_MAX_INTERVAL_SECONDS,
+    SCHEDULE_STABLE_GROWTH, SCHEDULE_CONFIDENT_SHARE, SCHEDULE_CONFIDENT_SCORE, SCHEDULE_TARGET_LATENCY_SECONDS,
+    SCHEDULE_MAX_CPU_LOAD, SCHEDULE_JITTER, SCHEDULE_MAX_CAMERAS_PER_CYCLE, SCHEDULE_MIN_GAP_SECONDS
+)
+
+
+class CaptureScheduler:
+    """
+    Intervalo de captura próprio de cada câmera, ajustado pelo resultado de cada captura:
+
+        troca de fase ou baixa confiança → min_interval (acompanha a transição de perto)
+        fase estável e confiante         → intervalo anterior × stable_growth, até max_interval
+        nenhuma fase detectada           → base_interval
+
+    O intervalo é alongado quando a inferência fica lenta (média móvel por imagem acima de target_latency)
+    ou a CPU fica carregada (load average por núcleo acima de max_cpu_load). Cada agendamento recebe uma
+    variação aleatória (±jitter) para as câmeras não sincronizarem, e cada ciclo processa no máximo
+    max_per_cycle câmeras, ficando as demais para o ciclo seguinte (min_gap segundos depois).
+    O estado é gravado em disco, então o agendamento continua entre execuções via cron e reinícios do serviço.
+
+    Na execução via cron, as capturas só acontecem nos disparos: grace (metade do período do cron) faz due()
+    aceitar também as câmeras que vencem até o meio do intervalo até o próximo disparo, arredondando cada
+    agendamento para o disparo mais próximo, e limita a variação aleatória a grace, para ela nunca empurrar
+    a captura para depois do disparo seguinte (sem isso, metade das capturas de hora em hora com +jitter
+    ficava para a hora seguinte). O serviço acorda no horário de cada câmera e usa grace 0.
+    """
+
+    def __init__(self, state_path: str = SCHEDULE_STATE_PATH, base_interval: float = LOOP_INTERVAL_SECONDS,
+                 min_interval: float = SCHEDULE_MIN_INTERVAL_SECONDS, max_interval: float = SCHEDULE_MAX_INTERVAL_SECONDS,
+                 stable_growth: float = SCHEDULE_STABLE_GROWTH, confident_share: float = SCHEDULE_CONFIDENT_SHARE,
+                 confident_score: float = SCHEDULE_CONFIDENT_SCORE,
+                 target_latency: float = SCHEDULE_TARGET_LATENCY_SECONDS, max_cpu_load: float = SCHEDULE_MAX_CPU_LOAD,
+                 jitter: float = SCHEDULE_JITTER, max_per_cycle: int = SCHEDULE_MAX_CAMERAS_PER_CYCLE,
+                 min_gap: float = SCHEDULE_MIN_GAP_SECONDS, grace: float = 0.0):
+        self.state_path = state_path
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.stable_growth = stable_growth
+        self.confident_share = confident_share
+        self.confident_score = confident_score
+        self.target_latency = target_latency
+        self.max_cpu_load = max_cpu_load
+        self.jitter = jitter
+        self.max_per_cycle = max_per_cycle
+        self.min_gap = min_gap
+        self.grace = grace
+
+        self._lock = threading.Lock()
+        self._state = self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+
+        state.setdefault("cameras", {})
+        state.setdefault("latency", None)
+        return state
+
+    def _save(self):
+        """Grava o estado em arquivo temporário e renomeia, para nunca deixar o JSON pela metade"""
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self._state, f)
+        os.replace(temp_path, self.state_path)
+
+    # ------------------------------------------------------------------
+    # CARGA
+    # ------------------------------------------------------------------
+    def record_latency(self, seconds_per_image: float):
+        """Atualiza a média móvel da latência de inferência por imagem"""
+        with self._lock:
+            latency = self._state["latency"]
+            self._state["latency"] = seconds_per_image if latency is None else 0.7 * latency + 0.3 * seconds_per_image
+
+    def load_factor(self):
+        """Multiplicador dos intervalos (≥ 1) pela latência de inferência e pela carga da CPU"""
+        factor = 1.0
+
+        latency = self._state["latency"]
+        if latency and self.target_latency:
+            factor = max(factor, latency / self.target_latency)
+
+        try:
+            cpu_load = os.getloadavg()[0] / (os.cpu_count() or 1)
+        except OSError:
+            cpu_load = 0.0
+        if self.max_cpu_load:
+            factor = max(factor, cpu_load / self.max_cpu_load)
+
+        return factor
+
+    # ------------------------------------------------------------------
+    # AGENDAMENTO
+    # ------------------------------------------------------------------
+    def _schedule(self, camera_state: dict, now: float):
+        """Próxima captura após o intervalo da câmera, alongado pela carga e com variação aleatória"""
+        interval = min(self.max_interval, camera_state["interval"] * self.load_factor())
+        spread = interval * self.jitter
+        if self.grace:
+            spread = min(spread, self.grace)
+        camera_state["next_due"] = now + interval + random.uniform(-spread, spread)
+
+    def due(self, cameras, now: float = None):
+        """
+        Câmeras com captura vencida (ou vencendo em até grace segundos), as mais atrasadas primeiro
+        (no máximo max_per_cycle).
+        As câmeras retornadas já ficam agendadas para o próximo intervalo, mesmo se a captura falhar;
+        observe() refaz o agendamento com o resultado da detecção.
+        """
+        now = time.time() if now is None else now
+
+        with self._lock:
+            states = self._state["cameras"]
+            overdue = [
+                camera for camera in cameras
+                if states.get(camera["id"], {}).get("next_due", 0) <= now + self.grace
+            ]
+            overdue.sort(key=lambda camera: states.get(camera["id"], {}).get("next_due", 0))
+            selected = overdue[:self.max_per_cycle]
+
+            for camera in selected:
+                camera_state = states.setdefault(camera["id"], {"interval": self.base_interval, "phase": None})
+                self._schedule(camera_state, now)
+
+            if selected:
+                self._save()
+
+        return selected
+
+    def next_delay(self, cameras, now: float = None):
+        """Segundos até a próxima câmera vencer (no mínimo min_gap)"""
+        now = time.time() if now is None else now
+
+        with self._lock:
+            states = self._state["cameras"]
+            next_due = min((states.get(camera["id"], {}).get("next_due", 0) for camera in cameras), default=None)
+
+        if next_due is None:
+            return self.base_interval
+
+        return max(self.min_gap, next_due - now)
+
+    def observe(self, camera_id: str, detections, stable_phase, share: float, changed: bool, now: float = None):
+        """Ajusta o intervalo da câmera pelo resultado da captura; retorna o novo intervalo base em segundos"""
+        now = time.time() if now is None else now
+
+        with self._lock:
+            camera_state = self._state["cameras"].setdefault(
+                camera_id, {"interval": self.base_interval, "phase": None}
+            )
+
+            if not detections:
+                interval = self.base_interval
+            elif changed or stable_phase != camera_state["phase"] or share < self.confident_share \
+                    or max(detection["score"] for detection in detections) < self.confident_score:
+                interval = self.min_interval
+            else:
+                interval = min(self.max_interval, camera_state["interval"] * self.stable_growth)
+
+            camera_state["interval"] = interval
+            camera_state["phase"] = stable_phase
+            self._schedule(camera_state, now)
+            self._save()
+
+        return interval
@@ -0,0 +1,241 @@
+import os
+import random
+
+import cv2
+import numpy as np
+
+from configs.config import (
+    DETECTOR_BACKEND, MODEL_PATH, INFERENCE_POOL_WORKERS, DETECTOR_AB_BACKEND, DETECTOR_AB_MODEL_PATH,
+    DETECTOR_AB_SHARE, MODEL_RELOAD_CHECK_SECONDS
+)
+from utils import metrics
+
+
+class DetectorBackend:
+    """
+    Interface comum dos backends de detecção. Cada backend implementa três etapas sobre um lote:
+
+        preprocess_batch(images, rotations) → (entradas, formatos das imagens rotacionadas, posições válidas)
+        infer_batch(entradas, quantidade)   → saída bruta do modelo para cada imagem válida
+        postprocess_batch(saídas, formatos) → lista de detecções por imagem
+
+    e detect_batch encadeia as etapas, entregando para qualquer backend a mesma saída estruturada:
+    dicionários com box [x1, y1, x2, y2] (None em modelos de classificação), score, class_id e phase.
+    """
+
+    name = "base"
+
+    # Ângulo do servo para cada fase
+    FASE_TO_ANGLE = {
+        "fase_1": 30,
+        "fase_2": 60,
+        "fase_3": 90
+    }
+
+    def __init__(self, model_path: str, conf_threshold: float = 0.25, class_names=None, fase_to_angle=None):
+        self.model_path = model_path
+        self.conf_threshold = conf_threshold
+
+        # Metadados do modelo (ver ModelRegistry); sem eles, classe 0 → fase_1 e os ângulos padrão
+        self.class_names = list(class_names) if class_names else None
+        self.fase_to_angle = dict(fase_to_angle or self.FASE_TO_ANGLE)
+
+        # Identifica o backend e o modelo nos logs (ex.: "onnx:best_nano"), para comparar modelos em teste A/B
+        self.label = f"{self.name}:{os.path.splitext(os.path.basename(model_path))[0]}"
+
+    @staticmethod
+    def decode_bytes(image_bytes: bytes):
+        """
+        Decodifica os bytes JPEG recebidos da ESP32-CAM diretamente em memória.
+        """
+        image_array = np.frombuffer(image_bytes, dtype=np.uint8)
+        image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
+
+        if image is None:
+            raise ValueError("Não foi possível decodificar a imagem recebida.")
+
+        return image
+
+    def phase_of(self, class_id: int):
+        """Nome da fase de uma classe do modelo (por padrão, classe 0 → fase_1)"""
+        if self.class_names is not None:
+            return self.class_names[class_id] if class_id < len(self.class_names) else None
+
+        return f"fase_{class_id + 1}"
+
+    def preprocess_batch(self, images, rotations):
+        raise NotImplementedError
+
+    def infer_batch(self, inputs, count: int):
+        raise NotImplementedError
+
+    def postprocess_batch(self, outputs, original_shapes):
+        raise NotImplementedError
+
+    def warmup(self):
+        """
+        Executa as três etapas sobre uma imagem preta, para a primeira inferência real não pagar a
+        inicialização do modelo. Ao contrário de detect_batch, propaga os erros (modelo inválido).
+        """
+        width, height = self.input_size
+        inputs, original_shapes, positions = self.preprocess_batch([np.zeros((height, width, 3), np.uint8)], [None])
+        self.postprocess_batch(self.infer_batch(inputs, len(positions)), original_shapes)
+
+    def detect_batch(self, images, rotations=None, detailed: bool = False, regions=None, strict: bool = False):
+        """
+        Executar detecção em várias imagens já decodificadas (BGR) de uma só vez.
+        Retorna uma lista de fases por imagem, na mesma ordem de entrada (uma entrada por câmera).
+        Com detailed=True, cada imagem recebe a lista de detecções estruturadas.
+        regions traz a configuração de tiles de cada imagem ("tiles" da câmera, ver ONNXDetector.detect_tiled);
+        backends sem inferência por tiles a ignoram.
+        Com strict=True, imagens que não chegaram ao modelo recebem None em vez de lista vazia e um erro
+        na inferência é propagado, para distinguir "nenhuma detecção" de "falha" (ver process_frames).
+        """
+        if rotations is None:
+            rotations = ["90_ccw"] * len(images)
+
+        results = [None if strict else [] for _ in images]
+
+        # Imagens com erro no pré-processamento ficam fora do lote e recebem lista vazia
+        with metrics.span("preprocess", backend=self.name, images=len(images)):
+            inputs, original_shapes, positions = self.preprocess_batch(images, rotations)
+        if not positions:
+            return results
+
+        try:
+            with metrics.span("infer", backend=self.name, images=len(positions)):
+                outputs = self.infer_batch(inputs, len(positions))
+        except Exception as e:
+            metrics.failure("infer", e)
+            if strict:
+                raise
+            print(f"⚠️ Erro na detecção em lote: {e}")
+            return results
+
+        try:
+            with metrics.span("postprocess", backend=self.name):
+                batch_detections = self.postprocess_batch(outputs, original_shapes)
+        except Exception as e:
+            metrics.failure("postprocess", e)
+            if strict:
+                raise
+            print(f"⚠️ Erro no pós-processamento do lote: {e}")
+            return results
+
+        for position, detections in zip(positions, batch_detections):
+            results[position] = detections if detailed else [detection["phase"] for detection in detections]
+
+        return results
+
+    def detect(self, image_path: str, detailed: bool = False):
+        """Executar detecção em uma imagem, recebendo o caminho do arquivo"""
+        image = cv2.imread(image_path)
+        if image is None:
+            print(f"⚠️ Erro na detecção para o arquivo '{image_path}': imagem não encontrada ou inválida")
+            return []
+
+        return self.detect_array(image, detailed=detailed)
+
+    def detect_array(self, image: np.ndarray, rotation: str = "90_ccw", detailed: bool = False):
+        """Executar detecção em uma imagem já decodificada (BGR), sem passar pelo disco"""
+        return self.detect_batch([image], [rotation], detailed)[0]
+
+    def detect_bytes(self, image_bytes: bytes, rotation: str = "90_ccw", detailed: bool = False):
+        """Executar detecção sobre os bytes JPEG brutos recebidos da ESP32-CAM"""
+        try:
+            image = self.decode_bytes(image_bytes)
+        except Exception as e:
+            print(f"⚠️ Erro na detecção da imagem em memória: {e}")
+            return []
+
+        return self.detect_array(image, rotation, detailed)
+
+
+class ABDetector:
+    """
+    Teste A/B entre dois detectores no tráfego real: cada lote é atendido por um deles, sorteado com
+    probabilidade share para o B. O label (e o mapa fase → ângulo) é o do detector que atendeu o último
+    lote, registrado no log junto com a latência do lote (ver tools/query_logs.py --by-backend).
+    """
+
+    def __init__(self, detector_a, detector_b, share: float = DETECTOR_AB_SHARE):
+        self.detectors = (detector_a, detector_b)
+        self.share = share
+        self.decode_bytes = detector_a.decode_bytes
+        self._current = detector_a
+
+        print(f"🆎 Teste A/B: {detector_a.label} x {detector_b.label} ({share:.0%} dos lotes para o B)")
+
+    @property
+    def fase_to_angle(self):
+        return self._current.fase_to_angle
+
+    @property
+    def label(self):
+        return self._current.label
+
+    def detect_batch(self, images, rotations=None, detailed: bool = False, regions=None, strict: bool = False):
+        self._current = self.detectors[random.random() < self.share]
+
+        return self._current.detect_batch(images, rotations, detailed, regions, strict)
+
+    def close(self):
+        for detector in self.detectors:
+            if hasattr(detector, "close"):
+                detector.close()
+
+
+def create_detector(backend: str = DETECTOR_BACKEND, model_path: str = MODEL_PATH, **options):
+    """
+    Cria o backend de detecção pelo nome: "onnx" (YOLO exportado para ONNX), "ultralytics"
+    (modelo YOLO .pt) ou "onnx_classifier" (modelo de classificação, um vetor de scores por imagem).
+    Os backends são importados só quando usados (ultralytics é uma dependência opcional).
+    """
+    if backend == "onnx":
+        from classes.ONNXDetector import ONNXDetector
+        return ONNXDetector(model_path, **options)
+
+    if backend == "ultralytics":
+        from classes.UltralyticsDetector import UltralyticsDetector
+        return UltralyticsDetector(model_path, **options)
+
+    if backend == "onnx_classifier":
+        from classes.ONNXClassifier import ONNXClassifier
+        return ONNXClassifier(model_path, **options)
+
+    raise ValueError(f"Backend de detecção desconhecido: {backend!r}")
+
+
+def load_detector(hot_reload: bool = False, log=None):
+    """
+    Carrega o detector configurado em configs.config: a versão ativa do registro de modelos (ModelRegistry)
+    ou, com o registro vazio, MODEL_PATH com o backend DETECTOR_BACKEND; em um pool de processos se
+    INFERENCE_POOL_WORKERS > 0; e, com DETECTOR_AB_MODEL_PATH, o segundo modelo do teste A/B.
+    Com hot_reload, novas versões do registro são carregadas sem reiniciar (exceto no pool de processos).
+    Como o pool cria os processos com fork, chame antes de iniciar threads (MQTT, filas de envio).
+    """
+    from classes.ModelRegistry import ModelRegistry, ReloadingDetector
+
+    registry = ModelRegistry()
+    version = registry.active_version()
+
+    if INFERENCE_POOL_WORKERS:
+        from classes.InferencePool import InferencePool
+
+        if version:
+            backend, model_path, options = registry.detector_args(version)
+        else:
+            backend, model_path, options = DETECTOR_BACKEND, MODEL_PATH, {}
+
+        if version and hot_reload:
+            print("⚠️ Troca de modelo em execução indisponível no pool de processos: reinicie para trocar a versão.")
+        detector = InferencePool(model_path, INFERENCE_POOL_WORKERS, backend=backend, detector_options=options)
+    elif version:
+        detector = ReloadingDetector(registry, MODEL_RELOAD_CHECK_SECONDS if hot_reload else 0, log)
+    else:
+        detector = create_detector(DETECTOR_BACKEND, MODEL_PATH)
+
+    if not DETECTOR_AB_MODEL_PATH:
+        return detector
+
+    return ABDetector(detector, create_detector(DETECTOR_AB_BACKEND or DETECTOR_BACKEND, DETECTOR_AB_MODEL_PATH))
@@ -0,0 +1,172 @@
+import os
+import random
+import signal
+import socket
+import threading
+import time
+
+from configs.config import (
+    CAMERAS, DAEMON_SOCKET_PATH, DAEMON_INTERVAL_SECONDS, DAEMON_JITTER_SECONDS, DAEMON_RUN_ON_START
+)
+from utils.functions import (
+    run_detection_cycle, get_supabase_client, get_camera_fetcher, get_upload_queue, get_mqtt_outbox, log_results
+)
+from utils.metrics import start_metrics_server
+
+
+class DetectorService:
+    """
+    Serviço de longa duração que mantém a sessão ONNX, o cliente MQTT e o cliente Supabase
+    carregados, executando capturas em um agendador interno.
+    Com um scheduler (CaptureScheduler), cada câmera é capturada no próprio intervalo adaptativo em vez
+    de todas a cada interval segundos, inclusive nos ciclos disparados pelo cron.
+    As métricas do processo ficam disponíveis em METRICS_HOST:METRICS_PORT (utils/metrics.py).
+    """
+
+    def __init__(self, detector, mqtt_client, interval: float = DAEMON_INTERVAL_SECONDS,
+                 jitter: float = DAEMON_JITTER_SECONDS, socket_path: str = DAEMON_SOCKET_PATH, scheduler=None,
+                 cameras=CAMERAS):
+        self.detector = detector
+        self.mqtt_client = mqtt_client
+        self.interval = interval
+        self.jitter = jitter
+        self.socket_path = socket_path
+        self.scheduler = scheduler
+        self.cameras = cameras
+
+        self._stop_event = threading.Event()
+        self._cycle_lock = threading.Lock()
+        self._server = None
+        self._metrics_server = None
+
+    def next_delay(self):
+        """Intervalo até a próxima captura, com variação aleatória para não sincronizar com outros processos"""
+        return max(0.0, self.interval + random.uniform(-self.jitter, self.jitter))
+
+    def run_cycle(self, cameras=None):
+        """Executa um ciclo de detecção, nunca dois ao mesmo tempo (agendador e disparo externo)"""
+        with self._cycle_lock:
+            return run_detection_cycle(self.detector, self.mqtt_client, cameras or self.cameras)
+
+    def run_scheduled(self):
+        """Captura as câmeras vencidas no agendamento adaptativo; retorna a espera até o próximo ciclo"""
+        self.run_due()
+
+        return self.scheduler.next_delay(self.cameras)
+
+    def run_due(self):
+        """
+        Ciclo só com as câmeras vencidas no agendamento (todas, sem scheduler).
+        Retorna "ok" ou "fail" pelo resultado do ciclo, ou "idle" se nenhuma câmera estava vencida.
+        """
+        cameras = self.scheduler.due(self.cameras) if self.scheduler else self.cameras
+        if not cameras:
+            return "idle"
+
+        return "ok" if self.run_cycle(cameras) else "fail"
+
+    def stop(self, *_):
+        """Solicita o encerramento do serviço (usado também como handler de SIGTERM/SIGINT)"""
+        print("\n🛑 Encerrando serviço de detecção...")
+        self._stop_event.set()
+
+    def _serve_triggers(self):
+        """Atende pedidos de disparo vindos do cron pelo socket Unix"""
+        while not self._stop_event.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            with conn:
+                try:
+                    command = conn.makefile("r").readline().strip()
+
+                    if command == "capture":
+                        response = self.run_due()
+                    elif command == "ping":
+                        response = "ok"
+                    else:
+                        response = "fail"
+
+                    conn.sendall(f"{response}\n".encode())
+                except OSError as e:
+                    print(f"⚠️ Erro ao atender disparo externo: {e}")
+
+    def _open_socket(self):
+        """Cria o socket Unix de disparo, removendo um socket órfão de execuções anteriores"""
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.socket_path)
+        self._server.listen()
+        # Timeout curto para o laço de atendimento perceber o pedido de encerramento
+        self._server.settimeout(1.0)
+
+    def _shutdown(self):
+        """Fecha o socket e as conexões mantidas abertas pelo serviço"""
+        if self._server:
+            self._server.close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+        if self._metrics_server:
+            self._metrics_server.shutdown()
+
+        get_camera_fetcher().close()
+
+        # Pool de inferência: encerra os processos e libera a memória compartilhada
+        if hasattr(self.detector, "close"):
+            self.detector.close()
+        get_upload_queue().stop(timeout=10)
+        get_mqtt_outbox(self.mqtt_client).stop(timeout=10)
+
+        if self.mqtt_client:
+            self.mqtt_client.loop_stop()
+            self.mqtt_client.disconnect()
+
+        log_results(
+            status="INFO",
+            data="Serviço de detecção encerrado"
+        )
+
+    def run(self):
+        """Laço principal do serviço: agenda capturas até receber SIGTERM/SIGINT"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        # Aquece o cliente Supabase e inicia as filas de envio (inclusive o que ficou pendente)
+        get_supabase_client()
+        get_upload_queue()
+        get_mqtt_outbox(self.mqtt_client)
+
+        self._open_socket()
+        self._metrics_server = start_metrics_server()
+        trigger_thread = threading.Thread(target=self._serve_triggers, name="daemon_triggers", daemon=True)
+        trigger_thread.start()
+
+        schedule = "agendamento adaptativo" if self.scheduler else f"intervalo {self.interval}s ± {self.jitter}s"
+        print(f"🚀 Serviço de detecção iniciado ({schedule})")
+        log_results(
+            status="INFO",
+            data=f"Serviço de detecção iniciado ({schedule})"
+        )
+
+        try:
+            delay = 0.0 if DAEMON_RUN_ON_START else self.next_delay()
+
+            # wait() retorna True assim que stop() é chamado, interrompendo a espera
+            while not self._stop_event.wait(delay):
+                if self.scheduler:
+                    delay = self.run_scheduled()
+                else:
+                    self.run_cycle()
+                    delay = self.next_delay()
+
+                print(f"Aguardando {delay:.0f} segundos para a próxima rodada...")
+        finally:
+            trigger_thread.join(timeout=5)
+            self._shutdown()
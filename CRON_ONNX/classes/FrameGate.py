@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import threading
+
+import cv2
+import numpy as np
+
+from configs.config import (
+    FRAME_GATE_STATE_PATH, FRAME_GATE_THUMBNAIL_SIZE, FRAME_GATE_THRESHOLD, FRAME_GATE_MAX_AGE_SECONDS
+)
+
+
+class FrameGate:
+    """
+    Filtro barato antes da inferência: compara uma miniatura em tons de cinza da captura com a do
+    último quadro processado da mesma câmera e, se a cena praticamente não mudou, reaproveita as
+    detecções guardadas em vez de rodar o modelo.
+    A miniatura é decodificada direto dos bytes JPEG em 1/8 da resolução, sem decodificar a imagem inteira.
+    Uma inferência completa é forçada quando o resultado guardado passa de FRAME_GATE_MAX_AGE_SECONDS.
+    """
+
+    def __init__(self, state_path: str = FRAME_GATE_STATE_PATH, thumbnail_size: int = FRAME_GATE_THUMBNAIL_SIZE,
+                 threshold: float = FRAME_GATE_THRESHOLD, max_age: float = FRAME_GATE_MAX_AGE_SECONDS):
+        self.state_path = state_path
+        self.thumbnail_size = thumbnail_size
+        self.threshold = threshold
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._states = self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_path) as f:
+                states = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        for state in states.values():
+            state["thumbnail"] = np.asarray(state["thumbnail"], dtype=np.float32)
+
+        return states
+
+    def _save(self):
+        """Grava o estado em arquivo temporário e renomeia, para nunca deixar o JSON pela metade"""
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+
+        states = {
+            camera_id: dict(state, thumbnail=np.round(state["thumbnail"], 1).tolist())
+            for camera_id, state in self._states.items()
+        }
+
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(states, f)
+        os.replace(temp_path, self.state_path)
+
+    def thumbnail(self, image_bytes: bytes):
+        """Miniatura (N x N, float32) em tons de cinza, decodificada do JPEG em escala reduzida"""
+        reduced = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if reduced is None:
+            raise ValueError("Não foi possível decodificar a miniatura da imagem.")
+
+        size = (self.thumbnail_size, self.thumbnail_size)
+        return cv2.resize(reduced, size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def check(self, camera_id: str, thumbnail: np.ndarray, now: float = None):
+        """
+        Retorna (detecções guardadas, diferença) se a cena não mudou desde o último quadro processado,
+        ou (None, diferença) se é preciso rodar a inferência. A diferença é a média absoluta (0–255)
+        entre as miniaturas, ou None se não houver quadro anterior.
+        """
+        now = time.time() if now is None else now
+
+        with self._lock:
+            state = self._states.get(camera_id)
+            if state is None or state["thumbnail"].shape != thumbnail.shape:
+                return None, None
+
+            difference = float(np.mean(np.abs(thumbnail - state["thumbnail"])))
+
+            if difference >= self.threshold or now - state["processed_at"] >= self.max_age:
+                return None, difference
+
+            return state["detections"], difference
+
+    def store(self, camera_id: str, thumbnail: np.ndarray, detections, now: float = None):
+        """Guarda a miniatura e as detecções de um quadro que passou pela inferência completa"""
+        with self._lock:
+            self._states[camera_id] = {
+                "thumbnail": thumbnail,
+                "detections": detections,
+                "processed_at": time.time() if now is None else now,
+            }
+            self._save()
@@ -0,0 +1,265 @@
+import os
+import time
+import queue
+import atexit
+import shutil
+import sqlite3
+import threading
+
+from configs.config import ARCHIVE_DIR, ARCHIVE_MAX_BYTES, ARCHIVE_RETENTION_DAYS
+
+
+# Marca colocada na fila por close() para encerrar a thread de escrita
+_STOP = object()
+
+
+class ImageArchive:
+    """
+    Arquivo local das capturas para calibração e treino, sem depender do Supabase.
+    Os bytes JPEG originais (sem recodificar) são anexados a um pacote por câmera e por dia,
+
+        archive/2026/10/17/cam_01.pack
+
+    e um índice SQLite guarda, por imagem, câmera, horário, fases, ângulo, deslocamento e tamanho no pacote,
+    respondendo consultas por intervalo de tempo sem abrir os pacotes.
+    A gravação é feita por uma thread em segundo plano. Quando o arquivo passa de max_bytes ou tem dias
+    mais antigos que retention_days, os dias mais antigos são removidos inteiros.
+    """
+
+    def __init__(self, root: str = ARCHIVE_DIR, max_bytes: int = ARCHIVE_MAX_BYTES,
+                 retention_days: float = ARCHIVE_RETENTION_DAYS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        os.makedirs(root, exist_ok=True)
+
+        self._db = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                id INTEGER PRIMARY KEY,
+                epoch REAL NOT NULL,
+                camera_id TEXT NOT NULL,
+                shard TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                phases TEXT NOT NULL,
+                angle INTEGER
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS images_epoch ON images (epoch)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS images_camera_epoch ON images (camera_id, epoch)")
+        self._db.commit()
+        self._db_lock = threading.Lock()
+
+        self._images = queue.Queue()
+        self._packs = {}  # (dia, câmera) → arquivo aberto para anexar
+        self._total_bytes = None
+        self._worker = None
+
+    def start(self):
+        """Inicia a thread de escrita; as imagens pendentes são gravadas ao encerrar o processo"""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="image_archive", daemon=True)
+            self._worker.start()
+            atexit.register(self.close)
+
+        return self
+
+    def add(self, camera_id: str, image_bytes: bytes, phases, angle: int = None, epoch: float = None):
+        """Coloca uma captura na fila de gravação do arquivo"""
+        self._images.put((time.time() if epoch is None else epoch, camera_id, image_bytes, list(phases), angle))
+
+    # ------------------------------------------------------------------
+    # THREAD DE ESCRITA
+    # ------------------------------------------------------------------
+    @staticmethod
+    def shard_of(epoch: float):
+        return time.strftime("%Y/%m/%d", time.localtime(epoch))
+
+    def pack_path(self, shard: str, camera_id: str):
+        return os.path.join(self.root, shard, f"{camera_id}.pack")
+
+    def _pack(self, shard: str, camera_id: str):
+        """Pacote do dia e da câmera, aberto para anexar; os pacotes de dias anteriores são fechados"""
+        key = (shard, camera_id)
+        if key not in self._packs:
+            for old_key in [old_key for old_key in self._packs if old_key[0] != shard]:
+                self._packs.pop(old_key).close()
+
+            path = self.pack_path(shard, camera_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._packs[key] = open(path, "ab")
+
+        return self._packs[key]
+
+    def _write(self, items):
+        """Anexa as imagens aos pacotes e só então grava o índice (nunca aponta para bytes ausentes)"""
+        rows = []
+        for epoch, camera_id, image_bytes, phases, angle in items:
+            shard = self.shard_of(epoch)
+            pack = self._pack(shard, camera_id)
+
+            offset = pack.tell()
+            pack.write(image_bytes)
+            rows.append((epoch, camera_id, shard, offset, len(image_bytes), ",".join(phases), angle))
+
+        for pack in self._packs.values():
+            pack.flush()
+
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT INTO images (epoch, camera_id, shard, offset, length, phases, angle) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._db.commit()
+
+        self._total_bytes = self.total_bytes() if self._total_bytes is None else self._total_bytes
+        self._total_bytes += sum(row[4] for row in rows)
+
+    def total_bytes(self):
+        with self._db_lock:
+            return self._db.execute("SELECT COALESCE(SUM(length), 0) FROM images").fetchone()[0]
+
+    def _oldest_shard(self):
+        with self._db_lock:
+            row = self._db.execute("SELECT shard, epoch FROM images ORDER BY epoch LIMIT 1").fetchone()
+
+        return row if row else (None, None)
+
+    def _remove_shard(self, shard: str):
+        """Remove um dia inteiro: pacotes e entradas do índice"""
+        for key in [key for key in self._packs if key[0] == shard]:
+            self._packs.pop(key).close()
+
+        with self._db_lock:
+            removed = self._db.execute("SELECT COALESCE(SUM(length), 0) FROM images WHERE shard = ?", (shard,))
+            removed = removed.fetchone()[0]
+            self._db.execute("DELETE FROM images WHERE shard = ?", (shard,))
+            self._db.commit()
+
+        shutil.rmtree(os.path.join(self.root, shard), ignore_errors=True)
+        self._total_bytes -= removed
+
+        print(f"🗄️ Arquivo de imagens: dia {shard} removido ({removed / 1024 / 1024:.1f} MiB)")
+
+    def _enforce_retention(self):
+        """Remove os dias mais antigos enquanto o arquivo passar da cota ou da retenção"""
+        current_shard = self.shard_of(time.time())
+
+        while True:
+            shard, epoch = self._oldest_shard()
+            if shard is None or shard == current_shard:
+                return
+
+            expired = self.retention_days and time.time() - epoch > self.retention_days * 86400
+            if self._total_bytes <= self.max_bytes and not expired:
+                return
+
+            self._remove_shard(shard)
+
+    def _run(self):
+        """Laço da thread de escrita: grava em lote o que estiver na fila"""
+        while True:
+            items = [self._images.get()]
+            while True:
+                try:
+                    items.append(self._images.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in items)
+            items = [item for item in items if item is not _STOP]
+
+            try:
+                if items:
+                    self._write(items)
+                    self._enforce_retention()
+            except Exception as e:
+                print(f"⚠️ Erro ao arquivar a imagem: {e}")
+
+            if stop:
+                break
+
+        for pack in self._packs.values():
+            pack.close()
+        self._packs = {}
+
+    def close(self, timeout: float = 10):
+        """Grava o que ainda está na fila e fecha os pacotes"""
+        if self._worker is not None and self._worker.is_alive():
+            self._images.put(_STOP)
+            self._worker.join(timeout)
+
+    # ------------------------------------------------------------------
+    # CONSULTA
+    # ------------------------------------------------------------------
+    def query(self, since: float = None, until: float = None, camera_id: str = None, phase: str = None,
+              limit: int = None):
+        """
+        Entradas do índice no intervalo [since, until], em ordem de horário, como dicionários
+        (epoch, camera_id, shard, offset, length, phases, angle). Use read() para obter os bytes JPEG.
+        """
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("epoch >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("epoch <= ?")
+            params.append(until)
+        if camera_id is not None:
+            conditions.append("camera_id = ?")
+            params.append(camera_id)
+        if phase is not None:
+            conditions.append("(',' || phases || ',') LIKE ?")
+            params.append(f"%,{phase},%")
+
+        sql = "SELECT epoch, camera_id, shard, offset, length, phases, angle FROM images"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY epoch"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._db_lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        return [
+            {
+                "epoch": epoch, "camera_id": camera_id, "shard": shard, "offset": offset, "length": length,
+                "phases": phases.split(",") if phases else [], "angle": angle,
+            }
+            for epoch, camera_id, shard, offset, length, phases, angle in rows
+        ]
+
+    def read(self, entry: dict):
+        """Bytes JPEG originais de uma entrada retornada por query()"""
+        with open(self.pack_path(entry["shard"], entry["camera_id"]), "rb") as f:
+            f.seek(entry["offset"])
+            image_bytes = f.read(entry["length"])
+
+        if len(image_bytes) != entry["length"]:
+            raise ValueError(f"Imagem incompleta no pacote {entry['shard']}/{entry['camera_id']}.")
+
+        return image_bytes
+
+    def iter_images(self, since: float = None, until: float = None, camera_id: str = None, phase: str = None):
+        """Gera (entrada, bytes JPEG) do intervalo, lendo cada pacote em sequência"""
+        entries = self.query(since, until, camera_id, phase)
+        entries.sort(key=lambda entry: (entry["shard"], entry["camera_id"], entry["offset"]))
+
+        current_path, f = None, None
+        try:
+            for entry in entries:
+                path = self.pack_path(entry["shard"], entry["camera_id"])
+                if path != current_path:
+                    if f:
+                        f.close()
+                    f, current_path = open(path, "rb"), path
+
+                f.seek(entry["offset"])
+                yield entry, f.read(entry["length"])
+        finally:
+            if f:
+                f.close()
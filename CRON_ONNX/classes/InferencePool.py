@@ -0,0 +1,247 @@
+import os
+import atexit
+import queue
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from configs.config import (
+    INFERENCE_POOL_THREADS_PER_WORKER, INFERENCE_POOL_SLOTS_PER_WORKER, INFERENCE_POOL_SLOT_SHAPE,
+    INFERENCE_POOL_PIN_WORKERS, INFERENCE_POOL_START_TIMEOUT, INFERENCE_POOL_TASK_TIMEOUT, DETECTOR_BACKEND
+)
+from classes.DetectorBackend import DetectorBackend, create_detector
+
+
+def _attach(name: str):
+    """Abre um bloco de memória compartilhada já criado pelo processo principal"""
+    return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(backend: str, model_path: str, options: dict, intra_op_threads: int, core, tasks, results):
+    """
+    Processo de inferência: carrega seu próprio backend de detecção e atende as tarefas (lote, posição no lote,
+    bloco de memória, deslocamento, formato, rotação), lendo o quadro direto da memória compartilhada.
+    """
+    if core is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {core})
+
+    try:
+        detector = create_detector(
+            backend, model_path, intra_op_threads=intra_op_threads, intra_op_affinity="", **options
+        )
+    except Exception as e:
+        results.put(("error", str(e)))
+        return
+
+    results.put(("ready", None))
+
+    shm = None
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        batch_id, position, shm_name, offset, shape, rotation, region = task
+
+        # O processo principal troca o bloco quando precisa de espaços maiores
+        if shm is None or shm.name != shm_name:
+            if shm is not None:
+                shm.close()
+                shm = None
+            try:
+                shm = _attach(shm_name)
+            except FileNotFoundError:
+                # Tarefa de um lote que expirou, cujo bloco já foi substituído: responde com falha e segue
+                print(f"⚠️ Worker {os.getpid()}: memória compartilhada {shm_name} não existe mais")
+                results.put((batch_id, position, None))
+                continue
+
+        frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+        try:
+            detections = detector.detect_batch([frame], [rotation], detailed=True, regions=[region], strict=True)[0]
+        except Exception as e:
+            print(f"⚠️ Erro na detecção do worker {os.getpid()}: {e}")
+            detections = None  # falha: o processo principal decide entre lista vazia e None (strict)
+        del frame
+
+        results.put((batch_id, position, detections))
+
+    if shm is not None:
+        shm.close()
+
+
+class InferencePool:
+    """
+    Pool de processos de inferência, cada um com seu próprio backend (create_detector), para usar todos os
+    núcleos com várias câmeras. Os quadros decodificados são copiados para um anel de espaços em
+    memória compartilhada (sem serializar os arrays); pelas filas passam apenas índices e formatos.
+    Tem a mesma interface usada pelo ciclo de detecção (decode_bytes, detect_batch, fase_to_angle).
+    Os workers são criados com fork: crie o pool antes de iniciar threads (MQTT, filas de envio).
+    """
+
+    def __init__(self, model_path: str, workers: int, backend: str = DETECTOR_BACKEND, threads_per_worker: int = INFERENCE_POOL_THREADS_PER_WORKER,
+                 slots_per_worker: int = INFERENCE_POOL_SLOTS_PER_WORKER, slot_shape=INFERENCE_POOL_SLOT_SHAPE,
+                 pin_workers: bool = INFERENCE_POOL_PIN_WORKERS, detector_options: dict = None):
+        # detector_options: metadados do modelo repassados ao backend de cada worker (ver ModelRegistry)
+        detector_options = detector_options or {}
+        self.model_path = model_path
+        self.fase_to_angle = dict(detector_options.get("fase_to_angle") or DetectorBackend.FASE_TO_ANGLE)
+        self.decode_bytes = DetectorBackend.decode_bytes
+        self.label = f"{backend}:{os.path.splitext(os.path.basename(model_path))[0]}"
+
+        context = mp.get_context("fork")
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+
+        self._slot_count = max(1, workers * slots_per_worker)
+        self._shm = None
+        self._allocate(int(np.prod(slot_shape)))
+
+        self._lock = threading.Lock()
+        self._batch_id = 0
+        self._processes = []
+
+        cpu_count = os.cpu_count() or 1
+        for i in range(workers):
+            core = i % cpu_count if pin_workers else None
+            process = context.Process(
+                target=_worker_main, name=f"inference_{i}", daemon=True,
+                args=(backend, model_path, detector_options, threads_per_worker, core, self._tasks, self._results)
+            )
+            process.start()
+            self._processes.append(process)
+
+            # O primeiro worker grava o cache do grafo otimizado; os demais só o carregam
+            if i == 0:
+                self._wait_ready(1)
+
+        self._wait_ready(workers - 1)
+        atexit.register(self.close)
+
+        print(f"🧵 Pool de inferência iniciado: {workers} processo(s), {threads_per_worker} thread(s) cada")
+
+    def _wait_ready(self, count: int):
+        for _ in range(count):
+            try:
+                status, error = self._results.get(timeout=INFERENCE_POOL_START_TIMEOUT)
+            except queue.Empty:
+                status, error = "error", f"sem resposta em {INFERENCE_POOL_START_TIMEOUT}s"
+
+            if status != "ready":
+                self.close()
+                raise RuntimeError(f"Falha ao iniciar o worker de inferência: {error}")
+
+    def _allocate(self, slot_bytes: int):
+        """(Re)cria o anel de espaços na memória compartilhada com slot_bytes por espaço"""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+
+        self._slot_bytes = slot_bytes
+        self._shm = shared_memory.SharedMemory(create=True, size=slot_bytes * self._slot_count)
+
+    def detect_batch(self, images, rotations=None, detailed: bool = False, regions=None, strict: bool = False):
+        """
+        Executa a detecção das imagens (BGR) nos workers, no máximo uma por espaço livre do anel.
+        Retorna o resultado de cada imagem na mesma ordem de entrada (uma entrada por câmera),
+        como DetectorBackend.detect_batch; com strict=True, as imagens que falharam no worker recebem None
+        e o timeout dos workers (INFERENCE_POOL_TASK_TIMEOUT) é propagado como RuntimeError.
+        """
+        if rotations is None:
+            rotations = ["90_ccw"] * len(images)
+        if regions is None:
+            regions = [None] * len(images)
+
+        results = [None] * len(images)
+
+        with self._lock:
+            self._batch_id += 1
+
+            # Nenhuma tarefa de lote anterior está pendente aqui (salvo após um timeout, cujos resultados
+            # são descartados), então o anel pode ser recriado com espaços maiores
+            largest = max((image.nbytes for image in images), default=0)
+            if largest > self._slot_bytes:
+                self._allocate(largest)
+
+            try:
+                self._dispatch(images, rotations, regions, results)
+            except RuntimeError as e:
+                # Workers sem resposta: as imagens ainda sem resultado ficam como falha
+                if strict:
+                    raise
+                print(f"⚠️ Erro na detecção em lote: {e}")
+
+        if not strict:
+            results = [detections or [] for detections in results]
+        if not detailed:
+            results = [
+                None if detections is None else [detection["phase"] for detection in detections]
+                for detections in results
+            ]
+
+        return results
+
+    def _dispatch(self, images, rotations, regions, results):
+        """Copia as imagens para o anel, envia as tarefas e recolhe os resultados (chamado com o lock)"""
+        free_slots = list(range(self._slot_count))
+        slot_of = {}
+        pending = 0
+
+        for position, (image, rotation, region) in enumerate(zip(images, rotations, regions)):
+            # Anel cheio: espera um resultado para liberar um espaço
+            if not free_slots:
+                self._collect(results, slot_of, free_slots)
+                pending -= 1
+
+            slot = free_slots.pop()
+            offset = slot * self._slot_bytes
+            view = np.ndarray(image.shape, dtype=np.uint8, buffer=self._shm.buf, offset=offset)
+            np.copyto(view, image)
+            del view
+
+            slot_of[position] = slot
+            self._tasks.put((self._batch_id, position, self._shm.name, offset, image.shape, rotation, region))
+            pending += 1
+
+        while pending:
+            self._collect(results, slot_of, free_slots)
+            pending -= 1
+
+    def _collect(self, results, slot_of, free_slots):
+        """
+        Recebe um resultado de qualquer worker, guarda na posição da imagem e libera o espaço.
+        Resultados atrasados de um lote anterior (que expirou) são descartados.
+        """
+        while True:
+            try:
+                batch_id, position, detections = self._results.get(timeout=INFERENCE_POOL_TASK_TIMEOUT)
+            except queue.Empty:
+                dead = [process.name for process in self._processes if not process.is_alive()]
+                raise RuntimeError(
+                    f"Sem resposta dos workers de inferência em {INFERENCE_POOL_TASK_TIMEOUT}s"
+                    + (f" (encerrados: {', '.join(dead)})" if dead else "")
+                )
+
+            if batch_id == self._batch_id:
+                break
+
+        results[position] = detections
+        free_slots.append(slot_of.pop(position))
+
+    def close(self):
+        """Encerra os workers e libera a memória compartilhada"""
+        for _ in self._processes:
+            self._tasks.put(None)
+
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
@@ -0,0 +1,202 @@
+import re
+import time
+import threading
+
+import requests
+
+from configs.config import (
+    CAPTURE_TIMEOUT_SECONDS, STREAM_CHUNK_BYTES, STREAM_MAX_FRAME_BYTES, STREAM_MAX_FRAME_AGE_SECONDS,
+    STREAM_RECONNECT_SECONDS
+)
+
+
+class MJPEGParser:
+    """
+    Separa os quadros JPEG de um fluxo multipart/x-mixed-replace (endpoint /stream da ESP32-CAM)
+    à medida que os bytes chegam, guardando apenas o quadro incompleto atual.
+    Usa o Content-Length de cada parte quando presente; caso contrário, procura a próxima fronteira.
+    """
+
+    def __init__(self, boundary: bytes, max_frame_bytes: int = STREAM_MAX_FRAME_BYTES):
+        # Alguns firmwares já incluem os "--" na fronteira anunciada
+        self.delimiter = b"--" + boundary[2:] if boundary.startswith(b"--") else b"--" + boundary
+        self.max_frame_bytes = max_frame_bytes
+
+        self._buffer = bytearray()
+        self._in_body = False
+        self._length = None
+
+    @staticmethod
+    def boundary_from_content_type(content_type: str):
+        match = re.search(r'boundary="?([^";]+)"?', content_type or "")
+        if not match:
+            raise ValueError(f"Resposta sem fronteira multipart: {content_type!r}")
+
+        return match.group(1).encode()
+
+    def _parse_headers(self, start: int):
+        """Lê os cabeçalhos da parte que começa em start; retorna False se ainda não chegaram inteiros"""
+        header_end = self._buffer.find(b"\r\n\r\n", start)
+        if header_end < 0:
+            return False
+
+        headers = bytes(self._buffer[start + len(self.delimiter):header_end]).decode("latin-1")
+        match = re.search(r"content-length:\s*(\d+)", headers, re.IGNORECASE)
+        self._length = int(match.group(1)) if match else None
+
+        del self._buffer[:header_end + 4]
+        self._in_body = True
+        return True
+
+    def feed(self, chunk: bytes):
+        """Adiciona bytes recebidos e retorna a lista de quadros JPEG completados por eles"""
+        self._buffer += chunk
+        frames = []
+
+        while True:
+            if not self._in_body:
+                start = self._buffer.find(self.delimiter)
+                if start < 0:
+                    # Mantém só o final, que pode conter o início da próxima fronteira
+                    del self._buffer[:max(0, len(self._buffer) - len(self.delimiter))]
+                    break
+
+                del self._buffer[:start]
+                if not self._parse_headers(0):
+                    break
+
+            if self._length is not None:
+                if len(self._buffer) < self._length:
+                    break
+                frame = bytes(self._buffer[:self._length])
+                del self._buffer[:self._length]
+            else:
+                end = self._buffer.find(self.delimiter)
+                if end < 0:
+                    break
+                frame = bytes(self._buffer[:end]).rstrip(b"\r\n")
+                del self._buffer[:end]
+
+            self._in_body = False
+            if frame.startswith(b"\xff\xd8"):
+                frames.append(frame)
+
+        # Parte corrompida ou grande demais: descarta e ressincroniza na próxima fronteira
+        if len(self._buffer) > self.max_frame_bytes:
+            self._buffer.clear()
+            self._in_body = False
+
+        return frames
+
+
+class MJPEGStream:
+    """
+    Mantém uma conexão aberta com o /stream MJPEG de uma ESP32-CAM em uma thread em segundo plano,
+    guardando apenas o quadro mais recente: quadros que chegam enquanto a inferência está ocupada
+    substituem os anteriores (são descartados) em vez de se acumularem.
+    Reconecta após STREAM_RECONNECT_SECONDS quando a conexão cai.
+    """
+
+    def __init__(self, camera: dict, log=None, max_frame_age: float = STREAM_MAX_FRAME_AGE_SECONDS):
+        self.camera = camera
+        self.log = log
+        self.max_frame_age = max_frame_age
+
+        self.session = requests.Session()
+        self.dropped_frames = 0
+
+        self._frame = None
+        self._frame_time = 0.0
+        self._sequence = 0
+        self._delivered = 0
+        self._error = None
+        self._condition = threading.Condition()
+
+        self._stop_event = threading.Event()
+        self._worker = None
+
+    def start(self):
+        """Inicia a thread de leitura do stream"""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name=f"mjpeg_{self.camera['id']}", daemon=True)
+            self._worker.start()
+
+        return self
+
+    def _publish(self, frame: bytes):
+        with self._condition:
+            # O quadro anterior ainda não foi entregue: é descartado por estar desatualizado
+            if self._sequence > self._delivered:
+                self.dropped_frames += 1
+
+            self._frame = frame
+            self._frame_time = time.monotonic()
+            self._sequence += 1
+            self._error = None
+            self._condition.notify_all()
+
+    def _read_stream(self):
+        timeout = self.camera.get("timeout", CAPTURE_TIMEOUT_SECONDS)
+
+        with self.session.get(self.camera["stream_url"], stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+
+            parser = MJPEGParser(MJPEGParser.boundary_from_content_type(response.headers.get("Content-Type")))
+            print(f"🎞️ [{self.camera['id']}] Conectado ao stream: {self.camera['stream_url']}")
+
+            for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+                if self._stop_event.is_set():
+                    return
+
+                for frame in parser.feed(chunk):
+                    self._publish(frame)
+
+        raise ConnectionError("Stream encerrado pela câmera.")
+
+    def _run(self):
+        """Laço da thread de leitura: mantém o stream conectado até stop()"""
+        while not self._stop_event.is_set():
+            try:
+                self._read_stream()
+            except (requests.exceptions.RequestException, ConnectionError, ValueError) as e:
+                if self._stop_event.is_set():
+                    break
+
+                print(f"❌ [{self.camera['id']}] Erro no stream MJPEG (ESP32-CAM): {e}")
+
+                # Registra o log
+                if self.log:
+                    self.log(
+                        status="FALHA",
+                        data=f"[{self.camera['id']}] Erro no stream MJPEG (ESP32-CAM): {e}",
+                        camera_id=self.camera["id"], stage="stream"
+                    )
+
+                with self._condition:
+                    self._error = e
+                    self._condition.notify_all()
+
+                self._stop_event.wait(STREAM_RECONNECT_SECONDS)
+
+    def next_frame(self, timeout: float):
+        """
+        Aguarda um quadro ainda não entregue e com menos de max_frame_age segundos.
+        Retorna (bytes JPEG, None) ou (None, erro) se nenhum quadro novo chegar no timeout.
+        """
+        def fresh():
+            return self._sequence > self._delivered and time.monotonic() - self._frame_time <= self.max_frame_age
+
+        with self._condition:
+            if not self._condition.wait_for(fresh, timeout):
+                return None, self._error or TimeoutError(f"Nenhum quadro novo do stream em {timeout}s.")
+
+            self._delivered = self._sequence
+            return self._frame, None
+
+    def stop(self):
+        """Encerra a leitura e fecha a conexão com a câmera"""
+        self._stop_event.set()
+        self.session.close()
+
+        if self._worker:
+            self._worker.join(timeout=5)
@@ -0,0 +1,170 @@
+import os
+import time
+import sqlite3
+import threading
+
+from configs.config import (
+    UPLOAD_QUEUE_DIR, MQTT_QOS, MQTT_PUBLISH_TIMEOUT, MQTT_RETRY_SECONDS, MQTT_COMMAND_MAX_AGE_SECONDS
+)
+from utils import metrics
+
+
+class MQTTOutbox:
+    """
+    Fila persistente dos comandos enviados aos servos via MQTT, processada por uma thread em segundo plano.
+    Cada comando fica gravado em disco (SQLite) até o broker confirmar o recebimento (QoS 1),
+    então comandos gerados com o broker fora do ar são enviados quando a conexão voltar.
+    Um novo comando para o mesmo tópico substitui o pendente: o servo só precisa do ângulo mais recente,
+    e a fila nunca passa de um comando por tópico, mesmo após semanas sem broker.
+    """
+
+    def __init__(self, client, log, queue_dir: str = UPLOAD_QUEUE_DIR):
+        self.client = client
+        self.log = log
+
+        os.makedirs(queue_dir, exist_ok=True)
+
+        self._db = sqlite3.connect(os.path.join(queue_dir, "mqtt_outbox.db"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Cada commit chega ao disco antes de retornar: o comando sobrevive a uma queda de energia
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pending (
+                topic TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._db.commit()
+        self._db_lock = threading.Lock()
+
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._worker = None
+        self._broker_down = False
+
+        # Reconexão ao broker acorda a thread de envio sem esperar MQTT_RETRY_SECONDS
+        if client is not None:
+            client.on_connect = lambda *_: self._wakeup.set()
+
+    def start(self):
+        """Inicia a thread de envio (também envia o que ficou pendente de execuções anteriores)"""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="mqtt_outbox", daemon=True)
+            self._worker.start()
+
+        return self
+
+    def enqueue(self, topic: str, payload: str):
+        """Grava o comando na fila em disco, substituindo o pendente do mesmo tópico, e acorda a thread de envio"""
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pending (topic, payload, created_at) VALUES (?, ?, ?)",
+                (topic, str(payload), time.time())
+            )
+            self._db.commit()
+
+        self._wakeup.set()
+
+    def pending_count(self):
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def _pending(self):
+        with self._db_lock:
+            return self._db.execute("SELECT topic, payload, created_at FROM pending ORDER BY created_at").fetchall()
+
+    def _remove(self, topic, created_at):
+        """Remove o comando enviado, a menos que um mais novo para o mesmo tópico tenha chegado nesse meio tempo"""
+        with self._db_lock:
+            self._db.execute("DELETE FROM pending WHERE topic = ? AND created_at = ?", (topic, created_at))
+            self._db.commit()
+
+    def _publish(self, topic, payload):
+        """Publica um comando e aguarda a confirmação do broker; lança exceção se não for confirmado"""
+        info = self.client.publish(topic, payload, qos=MQTT_QOS)
+        if info.rc != 0:
+            raise ConnectionError(f"Falha ao publicar (rc={info.rc}).")
+
+        info.wait_for_publish(MQTT_PUBLISH_TIMEOUT)
+        if not info.is_published():
+            raise ConnectionError(f"Broker não confirmou a publicação em {MQTT_PUBLISH_TIMEOUT}s.")
+
+    def _broker_available(self):
+        """Verifica a conexão com o broker, registrando no log apenas quando ela cai ou volta"""
+        available = self.client is not None and self.client.is_connected()
+
+        if available == self._broker_down:
+            self._broker_down = not available
+            self.log(
+                status="FALHA" if self._broker_down else "INFO",
+                data="Broker MQTT indisponível, comandos mantidos na fila" if self._broker_down
+                else "Conexão com o broker MQTT restabelecida"
+            )
+
+        return available
+
+    def _send_pending(self):
+        """Envia todos os comandos pendentes; retorna quantos não puderam ser enviados"""
+        failed = 0
+
+        for topic, payload, created_at in self._pending():
+            # Comando antigo demais: o ângulo pode não corresponder mais à fase atual da planta
+            if time.time() - created_at > MQTT_COMMAND_MAX_AGE_SECONDS:
+                self._remove(topic, created_at)
+                metrics.failure("mqtt_publish", "expired")
+                self.log(status="FALHA", data=f"Comando MQTT descartado por expirar ({topic} → {payload})")
+                continue
+
+            if not self._broker_available():
+                failed += 1
+                continue
+
+            try:
+                # Do publish até a confirmação do broker
+                with metrics.span("mqtt_publish", topic=topic):
+                    self._publish(topic, payload)
+            except Exception as e:
+                failed += 1
+                metrics.failure("mqtt_publish", e)
+                with self._db_lock:
+                    self._db.execute("UPDATE pending SET attempts = attempts + 1 WHERE topic = ?", (topic,))
+                    self._db.commit()
+
+                self.log(status="FALHA", data=f"Erro no envio MQTT ({topic} → {payload}, mantido na fila): {e}")
+                continue
+
+            self._remove(topic, created_at)
+            print(f"📡 Comando MQTT confirmado pelo broker: {topic} → {payload}")
+
+        return failed
+
+    def _run(self):
+        """Laço da thread de envio: esvazia a fila e aguarda novos comandos ou o tempo de nova tentativa"""
+        while not self._stop_event.is_set():
+            failed = self._send_pending()
+
+            # Sem broker: espera antes de tentar de novo (ou até um novo comando/encerramento)
+            self._wakeup.wait(MQTT_RETRY_SECONDS if failed else None)
+            self._wakeup.clear()
+
+    def flush(self, timeout: float = None):
+        """Aguarda a fila esvaziar (ou o timeout); retorna True se não restou nada pendente"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while self.pending_count():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            time.sleep(0.2 if remaining is None else min(0.2, remaining))
+
+        return True
+
+    def stop(self, timeout: float = None):
+        """Encerra a thread de envio; o que não foi enviado continua gravado para a próxima execução"""
+        self._stop_event.set()
+        self._wakeup.set()
+
+        if self._worker:
+            self._worker.join(timeout)
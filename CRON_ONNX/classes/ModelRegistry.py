@@ -0,0 +1,189 @@
+import gc
+import os
+import json
+import shutil
+import threading
+
+from configs.config import MODEL_REGISTRY_DIR, MODEL_RELOAD_CHECK_SECONDS, DETECTOR_BACKEND
+from classes.DetectorBackend import DetectorBackend, create_detector
+
+
+class ModelRegistry:
+    """
+    Pasta de modelos versionados, uma subpasta por versão com o modelo e um metadata.json:
+
+        models/registry/20261017-0930/best_nano.onnx
+        models/registry/20261017-0930/metadata.json → {"backend", "model", "input_size", "class_names",
+                                                       "fase_to_angle", "conf_threshold"}
+
+    A versão ativa é a indicada no arquivo CURRENT (para fixar ou voltar uma versão) ou, sem ele,
+    a de maior nome. As versões são publicadas com publish(), que copia para uma pasta oculta e
+    renomeia, para o detector em execução nunca ver um modelo pela metade.
+    """
+
+    METADATA_FILE = "metadata.json"
+    CURRENT_FILE = "CURRENT"
+
+    def __init__(self, root: str = MODEL_REGISTRY_DIR):
+        self.root = root
+
+    def versions(self):
+        """Versões completas (com metadata.json), em ordem crescente"""
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return []
+
+        return sorted(
+            name for name in names
+            if not name.startswith(".") and os.path.isfile(os.path.join(self.root, name, self.METADATA_FILE))
+        )
+
+    def active_version(self):
+        """Versão em uso: a do arquivo CURRENT, se existir no registro, ou a mais recente (None se vazio)"""
+        versions = self.versions()
+
+        try:
+            with open(os.path.join(self.root, self.CURRENT_FILE)) as f:
+                current = f.read().strip()
+            if current in versions:
+                return current
+            print(f"⚠️ Versão {current!r} do arquivo CURRENT não existe no registro; usando a mais recente.")
+        except OSError:
+            pass
+
+        return versions[-1] if versions else None
+
+    def metadata(self, version: str):
+        with open(os.path.join(self.root, version, self.METADATA_FILE)) as f:
+            return json.load(f)
+
+    def detector_args(self, version: str):
+        """(backend, caminho do modelo, opções do backend) de uma versão, a partir do metadata.json"""
+        metadata = self.metadata(version)
+        options = {
+            key: metadata[key] for key in ("class_names", "fase_to_angle", "input_size", "conf_threshold")
+            if metadata.get(key) is not None
+        }
+
+        model_path = os.path.join(self.root, version, metadata["model"])
+        return metadata.get("backend", DETECTOR_BACKEND), model_path, options
+
+    def create_detector(self, version: str, **options):
+        backend, model_path, metadata_options = self.detector_args(version)
+        return create_detector(backend, model_path, **{**metadata_options, **options})
+
+    def publish(self, model_path: str, version: str, metadata: dict, activate: bool = False):
+        """Copia o modelo para uma nova versão do registro (ver tools/register_model.py)"""
+        target = os.path.join(self.root, version)
+        if os.path.exists(target):
+            raise FileExistsError(f"A versão {version} já existe no registro.")
+
+        staging = os.path.join(self.root, f".{version}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        shutil.copy2(model_path, os.path.join(staging, os.path.basename(model_path)))
+        with open(os.path.join(staging, self.METADATA_FILE), "w") as f:
+            json.dump(dict(metadata, model=os.path.basename(model_path)), f, indent=2, ensure_ascii=False)
+
+        os.rename(staging, target)
+
+        if activate:
+            temp_path = os.path.join(self.root, self.CURRENT_FILE + ".tmp")
+            with open(temp_path, "w") as f:
+                f.write(version + "\n")
+            os.replace(temp_path, os.path.join(self.root, self.CURRENT_FILE))
+
+        return target
+
+
+class ReloadingDetector:
+    """
+    Detector da versão ativa do ModelRegistry que troca de modelo sem reiniciar o processo.
+    Uma thread verifica o registro a cada check_seconds; a nova versão é carregada e aquecida (warmup)
+    em segundo plano enquanto a atual continua atendendo, e a troca acontece entre duas inferências.
+    A versão anterior é liberada logo após a troca: as duas só ficam carregadas juntas durante a carga
+    da nova. Versões que falham ao carregar não são tentadas de novo.
+    """
+
+    def __init__(self, registry: ModelRegistry, check_seconds: float = MODEL_RELOAD_CHECK_SECONDS, log=None):
+        self.registry = registry
+        self.check_seconds = check_seconds
+        self.log = log
+        self.decode_bytes = DetectorBackend.decode_bytes
+
+        self.version = registry.active_version()
+        if self.version is None:
+            raise FileNotFoundError(f"Nenhuma versão de modelo no registro: {registry.root}")
+
+        self._detector = registry.create_detector(self.version)
+        self._failed = set()
+
+        # Mantido durante cada inferência: a troca espera a inferência em andamento terminar
+        self._lock = threading.Lock()
+
+        self._stop_event = threading.Event()
+        self._worker = None
+        if check_seconds:
+            self._worker = threading.Thread(target=self._run, name="model_reload", daemon=True)
+            self._worker.start()
+
+        print(f"📦 Modelo do registro carregado: versão {self.version} ({self._detector.model_path})")
+
+    @property
+    def fase_to_angle(self):
+        return self._detector.fase_to_angle
+
+    @property
+    def label(self):
+        return f"{self._detector.name}:{self.version}"
+
+    def detect_batch(self, images, rotations=None, detailed: bool = False, regions=None, strict: bool = False):
+        with self._lock:
+            return self._detector.detect_batch(images, rotations, detailed, regions, strict)
+
+    def _run(self):
+        while not self._stop_event.wait(self.check_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Erro ao verificar o registro de modelos: {e}")
+
+    def check(self):
+        """Carrega e ativa a versão ativa do registro se ela mudou; retorna True se houve troca"""
+        version = self.registry.active_version()
+        if version is None or version == self.version or version in self._failed:
+            return False
+
+        print(f"📦 Nova versão do modelo no registro: {version}. Carregando em segundo plano...")
+        try:
+            detector = self.registry.create_detector(version)
+            detector.warmup()
+        except Exception as e:
+            self._failed.add(version)
+            print(f"❌ Falha ao carregar a versão {version} do modelo; mantendo a {self.version}: {e}")
+            if self.log:
+                self.log(status="FALHA", data=f"Falha ao carregar a versão {version} do modelo: {e}", stage="model")
+            return False
+
+        with self._lock:
+            previous, self._detector = self._detector, detector
+            previous_version, self.version = self.version, version
+
+        # Nenhuma inferência usa mais a versão anterior: libera a sessão e os buffers agora
+        if hasattr(previous, "close"):
+            previous.close()
+        del previous, detector
+        gc.collect()
+
+        print(f"🔁 Modelo trocado: versão {previous_version} → {version}")
+        if self.log:
+            self.log(status="INFO", data=f"Modelo trocado: versão {previous_version} → {version}", stage="model")
+
+        return True
+
+    def close(self):
+        self._stop_event.set()
+        if self._worker:
+            self._worker.join(timeout=5)
@@ -0,0 +1,74 @@
+import numpy as np
+
+from configs.config import INPUT_SIZE, CLASSIFIER_CLASSES, USE_INT8_MODEL
+from classes.DetectorBackend import DetectorBackend
+from classes.Preprocessor import Preprocessor
+from utils.onnx_session import create_session, resolve_model_path
+
+
+class ONNXClassifier(DetectorBackend):
+    """
+    Backend para modelos de classificação em ONNX: um vetor de scores por imagem inteira (RGB).
+    A classe de maior score vira uma única detecção sem caixa (box None), desde que passe de conf_threshold.
+    class_names (por padrão, CLASSIFIER_CLASSES) dá a fase de cada posição do vetor; posições sem fase são ignoradas.
+    """
+
+    name = "onnx_classifier"
+
+    def __init__(self, model_path: str, conf_threshold: float = 0.25, class_names=CLASSIFIER_CLASSES,
+                 use_int8: bool = USE_INT8_MODEL, intra_op_threads: int = None, intra_op_affinity: str = None,
+                 fase_to_angle=None, input_size=None):
+        super().__init__(resolve_model_path(model_path, use_int8), conf_threshold, class_names, fase_to_angle)
+        self.session = create_session(self.model_path, intra_op_threads, intra_op_affinity)
+        self.input_name = self.session.get_inputs()[0].name
+
+        _, _, height, width = self.session.get_inputs()[0].shape
+        if isinstance(width, int) and isinstance(height, int):
+            self.input_size = (width, height)
+        else:
+            self.input_size = tuple(input_size or INPUT_SIZE)
+
+        self.preprocessor = Preprocessor(self.input_size)
+
+    def preprocess_batch(self, images, rotations):
+        """Tensor (N,3,H,W) em RGB normalizado, como no treinamento do classificador"""
+        batch = np.empty((len(images), 3, self.input_size[1], self.input_size[0]), dtype=np.float32)
+        original_shapes, positions = [], []
+
+        for i, (image, rotation) in enumerate(zip(images, rotations)):
+            out = batch[len(positions)]
+            try:
+                _, original_shape = self.preprocessor.run(image, rotation, out)
+            except Exception as e:
+                print(f"⚠️ Erro no pré-processamento da imagem {i} do lote: {e}")
+                continue
+
+            # O Preprocessor entrega os planos em BGR
+            out[[0, 2]] = out[[2, 0]]
+
+            original_shapes.append(original_shape)
+            positions.append(i)
+
+        return batch[:len(positions)], original_shapes, positions
+
+    def infer_batch(self, inputs, count: int):
+        return self.session.run(None, {self.input_name: inputs[:count]})[0].reshape(count, -1)
+
+    def postprocess_batch(self, outputs, original_shapes):
+        results = []
+
+        for scores in outputs:
+            # Modelos exportados sem softmax entregam logits
+            if np.any(scores < 0) or not np.isclose(np.sum(scores), 1.0, atol=1e-3):
+                scores = np.exp(scores - np.max(scores))
+                scores /= np.sum(scores)
+
+            class_id = int(np.argmax(scores))
+            phase = self.phase_of(class_id)
+
+            if phase in self.fase_to_angle and scores[class_id] >= self.conf_threshold:
+                results.append([{"box": None, "score": float(scores[class_id]), "class_id": class_id, "phase": phase}])
+            else:
+                results.append([])
+
+        return results
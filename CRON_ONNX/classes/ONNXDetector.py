@@ -1,103 +1,505 @@
-import cv2
+import math
+
 import numpy as np
-import onnxruntime as ort
 
-class ONNXDetector:
+from configs.config import (
+    INPUT_SIZE, PREPROCESS_FOLD_ROTATION, PREPROCESS_LETTERBOX, NMS_TOP_K, MAX_DETECTIONS, NMS_CLASS_AGNOSTIC,
+    NMS_MATRIX_MAX_BOXES,
+    USE_INT8_MODEL, TILE_SIZE, TILE_OVERLAP, TILE_PROBE_CONF
+)
+from classes.DetectorBackend import DetectorBackend
+from classes.Preprocessor import Preprocessor
+from utils import metrics
+from utils.onnx_session import create_session, resolve_model_path
+
+
+# Distância (pixels) até a borda interna de um tile da grade a partir da qual a caixa é considerada cortada
+TILE_EDGE_MARGIN = 2
+
+
+class ONNXDetector(DetectorBackend):
     """
-    Classe para processamento e detecção de objetos com ONNX
+    Backend de detecção para modelos YOLO exportados para ONNX (saída com caixas e scores por classe)
     """
 
-    def __init__(self, model_path: str, conf_threshold: float = 0.25, iou_threshold: float = 0.7):
-        self.session = ort.InferenceSession(model_path)
-        self.conf_threshold = conf_threshold
+    name = "onnx"
+
+    def __init__(self, model_path: str, conf_threshold: float = 0.25, iou_threshold: float = 0.7,
+                 use_int8: bool = USE_INT8_MODEL, intra_op_threads: int = None, intra_op_affinity: str = None,
+                 class_names=None, fase_to_angle=None, input_size=None):
+        # Com use_int8, carrega a versão quantizada do modelo se ela existir
+        super().__init__(resolve_model_path(model_path, use_int8), conf_threshold, class_names, fase_to_angle)
+        self.session = create_session(self.model_path, intra_op_threads, intra_op_affinity)
         self.iou_threshold = iou_threshold
+        self.nms_top_k = NMS_TOP_K
+        self.max_detections = MAX_DETECTIONS
+        self.class_agnostic = NMS_CLASS_AGNOSTIC
+        self.nms_matrix_max = NMS_MATRIX_MAX_BOXES
+        self.tile_size = TILE_SIZE
+        self.tile_overlap = TILE_OVERLAP
+        self.tile_probe_conf = TILE_PROBE_CONF
         self.input_name = self.session.get_inputs()[0].name
-        
-        self.fase_to_angle = {
-            "fase_1": 30,
-            "fase_2": 60,
-            "fase_3": 90
-        }
-        
-    def preprocess(self, image_path: str):
-        """
-        Pré-processamento da imagem, incluindo ROTAÇÃO DE 90 GRAUS PARA A ESQUERDA.
-        """
-        image = cv2.imread(image_path)
-        if image is None:
-            raise ValueError(f"Imagem não encontrada ou inválida: {image_path}")
-        
-        # 1. ROTAÇÃO DE 90 GRAUS PARA A ESQUERDA (Anti-horário)
-        image = cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
-        print("🔄 Imagem rotacionada 90° para a esquerda.")
-
-        # 2. Redimensionar e normalizar
-        input_img = cv2.resize(image, (640, 640))
-        input_img = input_img.transpose(2, 0, 1)  # HWC to CHW
-        input_img = np.expand_dims(input_img, axis=0).astype(np.float32) / 255.0
-        
-        return input_img, image.shape[:2]
-    
-    def postprocess(self, outputs, original_shape):
+
+        # Modelos exportados com batch fixo exigem lotes exatamente desse tamanho
+        batch_dim, _, height, width = self.session.get_inputs()[0].shape
+        self.batch_size = batch_dim if isinstance(batch_dim, int) else None
+
+        # Tamanho de entrada (largura, altura): o do modelo exportado, ou o dos metadados/INPUT_SIZE se for dinâmico
+        if isinstance(width, int) and isinstance(height, int):
+            self.input_size = (width, height)
+        else:
+            self.input_size = tuple(input_size or INPUT_SIZE)
+
+        # Buffers de entrada pré-alocados e reaproveitados a cada inferência
+        self.preprocessor = Preprocessor(
+            self.input_size, fold_rotation=PREPROCESS_FOLD_ROTATION, letterbox=PREPROCESS_LETTERBOX
+        )
+        self._batch_buffer = np.empty((0, 3, self.input_size[1], self.input_size[0]), dtype=np.float32)
+
+    def preprocess_array(self, image: np.ndarray, rotation: str = "90_ccw", out: np.ndarray = None):
+        """
+        Pré-processamento de uma imagem já decodificada (BGR), incluindo a rotação da câmera
+        (por padrão, ROTAÇÃO DE 90 GRAUS PARA A ESQUERDA).
+        O tensor retornado é um buffer reaproveitado: é sobrescrito no próximo pré-processamento.
         """
-        Pós-processamento das detecções.
-        ***MODIFICADO: Retorna uma lista dos nomes das classes detectadas.***
+        input_img, rotated_shape = self.preprocessor.run(image, rotation, out)
+
+        if rotation is not None:
+            print(f"🔄 Imagem rotacionada ({rotation}).")
+
+        return input_img, rotated_shape
+
+    def postprocess_batch_detections(self, per_image_outputs, original_shapes):
         """
-        predictions = np.squeeze(outputs[0]).T
+        Pós-processamento de um lote inteiro com uma única chamada de NMS: as caixas de
+        imagens e classes diferentes são separadas por deslocamento de coordenadas.
+        Retorna uma lista de detecções (box, score, class_id e phase) por imagem.
+        """
+        candidates = []
+
+        for image_id, outputs in enumerate(per_image_outputs):
+            boxes, scores, class_ids = self.candidates(outputs, self.conf_threshold)
+            candidates.append((boxes, scores, class_ids, np.full(len(scores), image_id)))
+
+        boxes, scores, class_ids, image_ids = (np.concatenate(column) for column in zip(*candidates))
+
+        keep_indices = self.non_max_suppression(
+            boxes, scores, None if self.class_agnostic else class_ids, image_ids
+        )
+
+        results = [[] for _ in per_image_outputs]
+        for image_id, original_shape in enumerate(original_shapes):
+            # keep_indices está em ordem de score, então o limite mantém as melhores detecções
+            image_keep = [idx for idx in keep_indices if image_ids[idx] == image_id][:self.max_detections]
+
+            # Caixas (cx, cy, w, h) no tensor de entrada → (x1, y1, x2, y2) na imagem original
+            rescaled = self.rescale_boxes(boxes[image_keep], original_shape)
+            results[image_id] = self.detections(rescaled, scores[image_keep], class_ids[image_keep])
+
+        return results
+
+    def candidates(self, outputs, threshold: float):
+        """
+        Caixas (cx, cy, w, h) no tensor de entrada, scores e classes da saída de uma imagem com score acima
+        de threshold; só as nms_top_k de maior score seguem (pré-filtro do NMS)
+        """
+        predictions = outputs[0][0].T
         scores = np.max(predictions[:, 4:], axis=1)
-        
-        valid_detections = scores > self.conf_threshold
+
+        valid_detections = np.flatnonzero(scores > threshold)
+
+        if len(valid_detections) > self.nms_top_k:
+            top = np.argpartition(scores[valid_detections], -self.nms_top_k)[-self.nms_top_k:]
+            valid_detections = valid_detections[top]
+
         predictions = predictions[valid_detections]
-        scores = scores[valid_detections]
-        
-        class_ids = np.argmax(predictions[:, 4:], axis=1)
-        
-        keep_indices = self.non_max_suppression(predictions[:, :4], scores)
-        
-        # Lista para armazenar os nomes das fases (strings)
-        detected_phases = []
-        for idx in keep_indices:
-            class_id = int(class_ids[idx])
-            class_name = f"fase_{class_id + 1}"
+        return predictions[:, :4], scores[valid_detections], np.argmax(predictions[:, 4:], axis=1)
+
+    def detections(self, boxes, scores, class_ids):
+        """Detecções estruturadas (box, score, class_id e phase) das caixas (x1, y1, x2, y2) das fases conhecidas"""
+        detections = []
+        for box, score, class_id in zip(boxes, scores, class_ids):
+            class_id = int(class_id)
+            class_name = self.phase_of(class_id)
             if class_name in self.fase_to_angle:
-                detected_phases.append(class_name)
-        
-        # Retorna a lista de nomes das fases
-        return detected_phases 
+                detections.append({
+                    "box": [float(coord) for coord in box],
+                    "score": float(score),
+                    "class_id": class_id,
+                    "phase": class_name,
+                })
+
+        return detections
+
+    def rescale_boxes(self, boxes, original_shape):
+        """
+        Converte caixas (cx, cy, w, h) do tensor de entrada para (x1, y1, x2, y2) em pixels
+        da imagem original, desfazendo o resize (e as bordas do letterbox, se ativo).
+        """
+        (ratio_x, ratio_y), (pad_x, pad_y) = self.preprocessor.box_transform(original_shape)
+        h, w = original_shape[:2]
+
+        x1 = (boxes[:, 0] - boxes[:, 2] / 2 - pad_x) / ratio_x
+        y1 = (boxes[:, 1] - boxes[:, 3] / 2 - pad_y) / ratio_y
+        x2 = (boxes[:, 0] + boxes[:, 2] / 2 - pad_x) / ratio_x
+        y2 = (boxes[:, 1] + boxes[:, 3] / 2 - pad_y) / ratio_y
+
+        rescaled = np.stack([x1, y1, x2, y2], axis=1)
+        np.clip(rescaled[:, 0::2], 0, w, out=rescaled[:, 0::2])
+        np.clip(rescaled[:, 1::2], 0, h, out=rescaled[:, 1::2])
+
+        return rescaled
     
-    def non_max_suppression(self, boxes, scores):
-        """Implementação simples de NMS (inalterada)"""
+    def non_max_suppression(self, boxes, scores, class_ids=None, image_ids=None):
+        """
+        NMS vetorizado: para cada grupo calcula de uma vez a matriz de IoU entre os candidatos
+        e resolve a supressão gulosa por operações sobre a matriz, sem laço por candidato.
+        Com class_ids (e image_ids, para lotes), caixas de classes/imagens diferentes ficam em
+        grupos separados e nunca se suprimem. A matriz de cada grupo é quadrática: grupos com mais
+        de nms_matrix_max caixas usam o laço guloso (mesmo resultado), e o pré-filtro top-k deve
+        limitar os candidatos antes da chamada.
+        Retorna os índices mantidos, em ordem decrescente de score.
+        """
         if len(boxes) == 0: return []
+
         x1 = boxes[:, 0] - boxes[:, 2] / 2
         y1 = boxes[:, 1] - boxes[:, 3] / 2
         x2 = boxes[:, 0] + boxes[:, 2] / 2
         y2 = boxes[:, 1] + boxes[:, 3] / 2
         areas = (x2 - x1) * (y2 - y1)
         order = scores.argsort()[::-1]
-        keep = []
-        while order.size > 0:
-            i = order[0]
-            keep.append(i)
-            xx1 = np.maximum(x1[i], x1[order[1:]])
-            yy1 = np.maximum(y1[i], y1[order[1:]])
-            xx2 = np.minimum(x2[i], x2[order[1:]])
-            yy2 = np.minimum(y2[i], y2[order[1:]])
-            w = np.maximum(0.0, xx2 - xx1)
-            h = np.maximum(0.0, yy2 - yy1)
+
+        groups = np.zeros(len(boxes), dtype=np.int64)
+        if image_ids is not None:
+            groups += np.asarray(image_ids, dtype=np.int64)
+        if class_ids is not None:
+            groups = groups * (int(np.max(class_ids)) + 1) + np.asarray(class_ids, dtype=np.int64)
+
+        # Posição de cada caixa mantida na ordem de score, para intercalar os grupos no final
+        kept_ranks = []
+        ordered_groups = groups[order]
+
+        for group in np.unique(ordered_groups):
+            ranks = np.flatnonzero(ordered_groups == group)
+            idx = order[ranks]
+
+            if len(idx) > self.nms_matrix_max:
+                kept_ranks.extend(ranks[self._greedy_keep(x1[idx], y1[idx], x2[idx], y2[idx], areas[idx])])
+                continue
+
+            # Matriz de IoU (n x n) entre os candidatos do grupo
+            w = np.maximum(0.0, np.minimum(x2[idx, None], x2[None, idx]) - np.maximum(x1[idx, None], x1[None, idx]))
+            h = np.maximum(0.0, np.minimum(y2[idx, None], y2[None, idx]) - np.maximum(y1[idx, None], y1[None, idx]))
             intersection = w * h
-            iou = intersection / (areas[i] + areas[order[1:]] - intersection)
-            inds = np.where(iou <= self.iou_threshold)[0]
-            order = order[inds + 1]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                iou = intersection / (areas[idx, None] + areas[None, idx] - intersection)
+
+            # Negação de "<=" para tratar IoU indefinido (caixas de área zero) como a versão anterior.
+            # triu: só uma caixa de score maior (linha anterior na ordem) suprime outra
+            overlaps = np.triu(~(iou <= self.iou_threshold), k=1)
+
+            # Supressão gulosa em forma matricial: uma caixa é mantida se nenhuma caixa mantida de score maior
+            # a sobrepõe. Partindo de todas mantidas, cada passada fixa ao menos a próxima caixa na ordem,
+            # então o resultado é idêntico ao laço guloso; na prática convergem em poucas passadas
+            keep = np.ones(len(idx), dtype=bool)
+            while True:
+                updated = ~overlaps[keep].any(axis=0)
+                if np.array_equal(updated, keep):
+                    break
+                keep = updated
+
+            kept_ranks.extend(ranks[keep])
+
+        return list(order[np.sort(np.array(kept_ranks, dtype=np.int64))])
+
+    def _greedy_keep(self, x1, y1, x2, y2, areas):
+        """Supressão gulosa caixa a caixa (já em ordem de score), sem matriz: memória linear para grupos grandes"""
+        keep = np.zeros(len(x1), dtype=bool)
+        remaining = np.arange(len(x1))
+
+        while remaining.size:
+            i, rest = remaining[0], remaining[1:]
+            keep[i] = True
+
+            w = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+            h = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+            intersection = w * h
+            with np.errstate(invalid="ignore", divide="ignore"):
+                iou = intersection / (areas[i] + areas[rest] - intersection)
+            remaining = rest[iou <= self.iou_threshold]
+
         return keep
     
-    def detect(self, image_path: str):
-        """Executar detecção em uma imagem, recebendo o caminho do arquivo"""
+    def _get_batch_buffer(self, count: int):
+        """
+        Retorna um buffer (N,3,640,640) com espaço para count imagens, reaproveitado entre lotes.
+        Com batch fixo, N é arredondado para múltiplo do batch e as sobras ficam zeradas.
+        """
+        capacity = count
+        if self.batch_size:
+            capacity = -(-count // self.batch_size) * self.batch_size
+
+        if len(self._batch_buffer) < capacity:
+            self._batch_buffer = np.empty((capacity,) + self._batch_buffer.shape[1:], dtype=np.float32)
+
+        self._batch_buffer[count:capacity] = 0.0
+
+        return self._batch_buffer[:capacity]
+
+    def _run_batch(self, batch: np.ndarray, count: int = None):
+        """
+        Executa o modelo sobre um tensor (N,3,H,W) e retorna a saída de cada uma das count primeiras imagens.
+        Usa um único session.run, ou blocos do tamanho do batch quando o modelo tem batch fixo.
+        """
+        if count is None:
+            count = len(batch)
+
+        if self.batch_size:
+            # Com batch fixo, um tensor menor que os blocos (ex.: imagem única) é completado com zeros
+            chunk_size = self.batch_size
+            if len(batch) < -(-count // chunk_size) * chunk_size:
+                padded = self._get_batch_buffer(count)
+                padded[:count] = batch[:count]
+                batch = padded
+        else:
+            chunk_size = count
+            batch = batch[:count]
+        per_image_outputs = []
+
+        for start in range(0, count, chunk_size):
+            outputs = self.session.run(None, {self.input_name: batch[start:start + chunk_size]})
+            for i in range(min(chunk_size, count - start)):
+                per_image_outputs.append([output[i:i + 1] for output in outputs])
+
+        return per_image_outputs
+
+    def preprocess_batch(self, images, rotations):
+        """
+        Pré-processa as imagens (BGR) direto nas posições do tensor do lote, reaproveitado entre lotes.
+        Imagens com erro não ocupam posição: o lote tem só as válidas, e o resto fica zerado.
+        """
+        batch = self._get_batch_buffer(len(images))
+        original_shapes, positions = [], []
+
+        for i, (image, rotation) in enumerate(zip(images, rotations)):
+            try:
+                _, original_shape = self.preprocess_array(image, rotation, out=batch[len(positions)])
+            except Exception as e:
+                print(f"⚠️ Erro no pré-processamento da imagem {i} do lote: {e}")
+                continue
+
+            original_shapes.append(original_shape)
+            positions.append(i)
+
+        batch[len(positions):] = 0.0
+
+        return batch, original_shapes, positions
+
+    def infer_batch(self, inputs, count: int):
+        return self._run_batch(inputs, count)
+
+    def postprocess_batch(self, outputs, original_shapes):
+        # NMS único para o lote inteiro
+        return self.postprocess_batch_detections(outputs, original_shapes)
+
+    # ------------------------------------------------------------------
+    # INFERÊNCIA POR TILES
+    # ------------------------------------------------------------------
+    def detect_batch(self, images, rotations=None, detailed: bool = False, regions=None, strict: bool = False):
+        if regions is None or not any(regions):
+            return super().detect_batch(images, rotations, detailed, strict=strict)
+
+        return self.detect_tiled(images, rotations, regions, detailed, strict)
+
+    @staticmethod
+    def _tile_starts(length: int, tile: int, overlap: float):
+        """Início de cada tile ao longo de uma dimensão, cobrindo-a com sobreposição de pelo menos overlap"""
+        if length <= tile:
+            return [0]
+
+        count = math.ceil((length - tile * overlap) / (tile * (1 - overlap)))
+        return [round(i * (length - tile) / (count - 1)) for i in range(count)]
+
+    def tile_rects(self, shape, region):
+        """
+        Tiles (x1, y1, x2, y2) em pixels da imagem rotacionada de formato shape: a grade de tile_size pixels
+        com sobreposição tile_overlap (region="grid") ou as ROIs da câmera, em frações da imagem
+        """
+        h, w = shape[:2]
+
+        if region == "grid":
+            return [
+                (x, y, min(x + self.tile_size, w), min(y + self.tile_size, h))
+                for y in self._tile_starts(h, self.tile_size, self.tile_overlap)
+                for x in self._tile_starts(w, self.tile_size, self.tile_overlap)
+            ]
+
+        return [
+            (int(x1 * w), int(y1 * h), int(round(x2 * w)), int(round(y2 * h)))
+            for x1, y1, x2, y2 in region
+        ]
+
+    @staticmethod
+    def source_crop(image: np.ndarray, rotation: str, rect):
+        """Recorte (view) da imagem original que, após a rotação da câmera, corresponde a rect na imagem rotacionada"""
+        x1, y1, x2, y2 = rect
+        h, w = image.shape[:2]
+
+        if rotation == "90_ccw":
+            return image[x1:x2, w - y2:w - y1]
+        if rotation == "90_cw":
+            return image[h - x2:h - x1, y1:y2]
+        if rotation == "180":
+            return image[h - y2:h - y1, w - x2:w - x1]
+
+        return image[y1:y2, x1:x2]
+
+    def _to_image(self, boxes, shape, offset=(0, 0)):
+        """Caixas (cx, cy, w, h) do tensor de entrada de um recorte de formato shape → pixels da imagem rotacionada"""
+        (ratio_x, ratio_y), (pad_x, pad_y) = self.preprocessor.box_transform(shape)
+
+        converted = np.empty_like(boxes)
+        converted[:, 0] = (boxes[:, 0] - pad_x) / ratio_x + offset[0]
+        converted[:, 1] = (boxes[:, 1] - pad_y) / ratio_y + offset[1]
+        converted[:, 2] = boxes[:, 2] / ratio_x
+        converted[:, 3] = boxes[:, 3] / ratio_y
+
+        return converted
+
+    @staticmethod
+    def _corners(boxes):
+        """(cx, cy, w, h) → (x1, y1, x2, y2)"""
+        return np.concatenate([boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, :2] + boxes[:, 2:] / 2], axis=1)
+
+    def detect_tiled(self, images, rotations, regions, detailed: bool = False, strict: bool = False):
+        """
+        Detecção em duas passadas para quadros de alta resolução (UXGA), em que objetos pequenos
+        quase desaparecem na redução para o tamanho de entrada:
+
+        1. o quadro inteiro reduzido passa pelo modelo, como no detect_batch normal;
+        2. os tiles da câmera (regions[i], ver tile_rects) em que essa passada viu alguma caixa acima de
+           tile_probe_conf são recortados em resolução cheia e passam pelo modelo juntos, em um único lote
+           (um session.run com batch dinâmico), para todas as imagens.
+
+        As caixas das duas passadas são levadas para as coordenadas da imagem e unidas por um NMS global,
+        que também junta as detecções repetidas nas sobreposições; na grade, caixas cortadas na borda interna
+        de um tile são descartadas (o objeto inteiro aparece no tile vizinho ou no quadro inteiro).
+        Os tiles vazios são pulados, então o custo acompanha o conteúdo do quadro, não a resolução.
+        strict tem o mesmo significado que em detect_batch (a falha só dos tiles mantém as detecções da passada 1).
+        """
+        if rotations is None:
+            rotations = ["90_ccw"] * len(images)
+
+        results = [None if strict else [] for _ in images]
+
+        with metrics.span("preprocess", backend=self.name, images=len(images)):
+            inputs, original_shapes, positions = self.preprocess_batch(images, rotations)
+        if not positions:
+            return results
+
         try:
-            input_tensor, original_shape = self.preprocess(image_path)
-            outputs = self.session.run(None, {self.input_name: input_tensor})
-            # Recebe a lista de nomes das fases
-            detected_phases = self.postprocess(outputs, original_shape)
-            return detected_phases
+            with metrics.span("infer", backend=self.name, images=len(positions)):
+                frame_outputs = self._run_batch(inputs, len(positions))
         except Exception as e:
-            print(f"⚠️ Erro na detecção para o arquivo '{image_path}': {e}")
-            return []
\ No newline at end of file
+            metrics.failure("infer", e)
+            if strict:
+                raise
+            print(f"⚠️ Erro na detecção em lote: {e}")
+            return results
+
+        # (caixas cx, cy, w, h na imagem rotacionada, scores, classes, índice da imagem no lote)
+        candidates = []
+        tiles = []  # (índice da imagem no lote, tile, grade)
+        skipped = 0
+
+        with metrics.span("postprocess", backend=self.name):
+            for image_id, (position, outputs, shape) in enumerate(zip(positions, frame_outputs, original_shapes)):
+                probe_threshold = min(self.tile_probe_conf, self.conf_threshold)
+                boxes, scores, class_ids = self.candidates(outputs, probe_threshold)
+                boxes = self._to_image(boxes, shape)
+
+                confident = scores > self.conf_threshold
+                candidates.append((boxes[confident], scores[confident], class_ids[confident],
+                                   np.full(int(confident.sum()), image_id)))
+
+                region = regions[position]
+                if not region:
+                    continue
+
+                corners = self._corners(boxes)
+                for rect in self.tile_rects(shape, region):
+                    x1, y1, x2, y2 = rect
+                    inside = (corners[:, 0] < x2) & (corners[:, 2] > x1) & (corners[:, 1] < y2) & (corners[:, 3] > y1)
+                    if inside.any():
+                        tiles.append((image_id, rect, region == "grid"))
+                    else:
+                        skipped += 1
+
+        if tiles:
+            batch = self._get_batch_buffer(len(tiles))
+            valid_tiles = []
+
+            with metrics.span("tile_preprocess", backend=self.name, tiles=len(tiles), skipped=skipped):
+                for image_id, rect, grid in tiles:
+                    position = positions[image_id]
+                    try:
+                        crop = self.source_crop(images[position], rotations[position], rect)
+                        self.preprocessor.run(crop, rotations[position], out=batch[len(valid_tiles)])
+                    except Exception as e:
+                        print(f"⚠️ Erro no pré-processamento do tile {rect} da imagem {position}: {e}")
+                        continue
+                    valid_tiles.append((image_id, rect, grid))
+
+            try:
+                with metrics.span("tile_infer", backend=self.name, tiles=len(valid_tiles)):
+                    tile_outputs = self._run_batch(batch, len(valid_tiles)) if valid_tiles else []
+            except Exception as e:
+                print(f"⚠️ Erro na detecção dos tiles: {e}")
+                metrics.failure("tile_infer", e)
+                tile_outputs, valid_tiles = [], []
+
+            for (image_id, rect, grid), outputs in zip(valid_tiles, tile_outputs):
+                x1, y1, x2, y2 = rect
+                boxes, scores, class_ids = self.candidates(outputs, self.conf_threshold)
+                boxes = self._to_image(boxes, (y2 - y1, x2 - x1), offset=(x1, y1))
+
+                if grid:
+                    h, w = original_shapes[image_id][:2]
+                    corners = self._corners(boxes)
+                    cut = ((x1 > 0) & (corners[:, 0] <= x1 + TILE_EDGE_MARGIN)) \
+                        | ((y1 > 0) & (corners[:, 1] <= y1 + TILE_EDGE_MARGIN)) \
+                        | ((x2 < w) & (corners[:, 2] >= x2 - TILE_EDGE_MARGIN)) \
+                        | ((y2 < h) & (corners[:, 3] >= y2 - TILE_EDGE_MARGIN))
+                    boxes, scores, class_ids = boxes[~cut], scores[~cut], class_ids[~cut]
+
+                candidates.append((boxes, scores, class_ids, np.full(len(scores), image_id)))
+
+            print(f"🧩 {len(valid_tiles)} tile(s) processado(s) em resolução cheia, {skipped} vazio(s) pulado(s)")
+
+        # NMS global: quadro inteiro e tiles de cada imagem nas mesmas coordenadas. Cada tile traz até
+        # nms_top_k caixas, então a união é limitada de novo às nms_top_k de maior score por imagem
+        # antes da matriz de IoU
+        boxes, scores, class_ids, image_ids = (np.concatenate(column) for column in zip(*candidates))
+        top = []
+        for image_id in range(len(positions)):
+            indices = np.flatnonzero(image_ids == image_id)
+            top.append(indices[np.argsort(-scores[indices], kind="stable")[:self.nms_top_k]])
+        top = np.concatenate(top)
+        boxes, scores, class_ids, image_ids = boxes[top], scores[top], class_ids[top], image_ids[top]
+
+        keep_indices = self.non_max_suppression(
+            boxes, scores, None if self.class_agnostic else class_ids, image_ids
+        )
+
+        for image_id, (position, shape) in enumerate(zip(positions, original_shapes)):
+            image_keep = [idx for idx in keep_indices if image_ids[idx] == image_id][:self.max_detections]
+
+            corners = self._corners(boxes[image_keep])
+            h, w = shape[:2]
+            np.clip(corners[:, 0::2], 0, w, out=corners[:, 0::2])
+            np.clip(corners[:, 1::2], 0, h, out=corners[:, 1::2])
+
+            detections = self.detections(corners, scores[image_keep], class_ids[image_keep])
+            results[position] = detections if detailed else [detection["phase"] for detection in detections]
+
+        return results
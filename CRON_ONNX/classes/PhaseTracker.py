@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import threading
+
+from configs.config import (
+    PHASE_STATE_PATH, PHASE_WINDOW_SIZE, PHASE_WINDOW_MAX_AGE_SECONDS, PHASE_MAJORITY, PHASE_HYSTERESIS,
+    PHASE_MIN_OBSERVATIONS
+)
+
+
+class PhaseTracker:
+    """
+    Estado da fase de cada câmera, suavizado ao longo das últimas capturas.
+    Cada captura vira uma distribuição de fases ponderada pelos scores das caixas, e a fase só muda
+    quando a nova fase tem a maioria ponderada da janela (PHASE_MAJORITY), supera a atual por uma
+    margem (PHASE_HYSTERESIS) e aparece em pelo menos PHASE_MIN_OBSERVATIONS capturas.
+    O estado é gravado em disco, então a janela continua entre execuções via cron e reinícios do serviço
+    (com state_path=None fica só em memória, como no tools/replay.py).
+    """
+
+    def __init__(self, state_path: str = PHASE_STATE_PATH, window_size: int = PHASE_WINDOW_SIZE,
+                 max_age: float = PHASE_WINDOW_MAX_AGE_SECONDS, majority: float = PHASE_MAJORITY,
+                 hysteresis: float = PHASE_HYSTERESIS, min_observations: int = PHASE_MIN_OBSERVATIONS):
+        self.state_path = state_path
+        self.window_size = window_size
+        self.max_age = max_age
+        self.majority = majority
+        self.hysteresis = hysteresis
+        self.min_observations = min_observations
+
+        self._lock = threading.Lock()
+        self._states = self._load()
+
+    def _load(self):
+        if self.state_path is None:
+            return {}
+
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        """Grava o estado em arquivo temporário e renomeia, para nunca deixar o JSON pela metade"""
+        if self.state_path is None:
+            return
+
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self._states, f)
+        os.replace(temp_path, self.state_path)
+
+    @staticmethod
+    def frame_distribution(detections):
+        """
+        Distribuição de fases de uma captura: soma dos scores das caixas de cada fase, normalizada
+        para somar o maior score da captura (capturas mais confiantes pesam mais na janela).
+        """
+        weights = {}
+        for detection in detections:
+            weights[detection["phase"]] = weights.get(detection["phase"], 0.0) + detection["score"]
+
+        total = sum(weights.values())
+        if not total:
+            return {}
+
+        confidence = max(detection["score"] for detection in detections)
+        return {phase: round(weight / total * confidence, 4) for phase, weight in weights.items()}
+
+    def current_phase(self, camera_id: str):
+        with self._lock:
+            return self._states.get(camera_id, {}).get("phase")
+
+    def update(self, camera_id: str, detections, now: float = None):
+        """
+        Adiciona as detecções de uma captura à janela da câmera e decide a fase estável.
+        Retorna (fase estável ou None, participação da fase na janela, True se a fase mudou).
+        """
+        now = time.time() if now is None else now
+
+        with self._lock:
+            state = self._states.setdefault(camera_id, {"phase": None, "window": []})
+
+            window = state["window"]
+            window.append([now, self.frame_distribution(detections)])
+            window[:] = [entry for entry in window if now - entry[0] <= self.max_age][-self.window_size:]
+
+            totals = {}
+            observations = {}
+            for _, distribution in window:
+                for phase, weight in distribution.items():
+                    totals[phase] = totals.get(phase, 0.0) + weight
+                    observations[phase] = observations.get(phase, 0) + 1
+
+            current = state["phase"]
+            total = sum(totals.values())
+            if not total:
+                self._save()
+                return current, 0.0, False
+
+            leader = max(totals, key=totals.get)
+            leader_share = totals[leader] / total
+            current_share = totals.get(current, 0.0) / total
+
+            # Primeira detecção da câmera define a fase; depois, só muda com maioria e histerese
+            if current is None or (
+                leader != current
+                and leader_share >= self.majority
+                and leader_share - current_share >= self.hysteresis
+                and observations[leader] >= self.min_observations
+            ):
+                state["phase"] = leader
+
+            self._save()
+
+            phase = state["phase"]
+            return phase, totals.get(phase, 0.0) / total, phase != current
@@ -0,0 +1,138 @@
+import cv2
+import numpy as np
+
+
+# Rotações aceitas no registro de câmeras (configs.CAMERAS)
+ROTATIONS = {
+    None: None,
+    "90_ccw": cv2.ROTATE_90_COUNTERCLOCKWISE,
+    "90_cw": cv2.ROTATE_90_CLOCKWISE,
+    "180": cv2.ROTATE_180,
+}
+
+# Rotação equivalente em numpy (np.rot90), usada quando a rotação é feita após o resize
+ROT90_STEPS = {
+    None: 0,
+    "90_ccw": 1,
+    "90_cw": -1,
+    "180": 2,
+}
+
+
+class Preprocessor:
+    """
+    Pré-processamento sem alocações por quadro: rotação, resize, HWC→CHW e normalização
+    escrevem em buffers pré-alocados e reaproveitados entre chamadas.
+    Os buffers são compartilhados, então uma instância não deve ser usada por várias threads.
+
+    Com letterbox=True a imagem mantém a proporção e é centralizada com bordas cinza,
+    permitindo mapear as caixas de volta para os pixels da imagem original (box_transform).
+    """
+
+    def __init__(self, input_size=(640, 640), fold_rotation: bool = False, letterbox: bool = False,
+                 pad_color: int = 114):
+        self.width, self.height = input_size
+        self.fold_rotation = fold_rotation
+        self.letterbox = letterbox
+        self.pad_color = (pad_color, pad_color, pad_color)
+
+        self._scale = np.float32(255.0)
+        self._rotated = {}  # Buffers de rotação por (formato de entrada, rotação)
+        self._letterboxed = {}  # Buffers do resize sem bordas por tamanho redimensionado
+        self._resized = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self._planes = np.empty((3, self.height, self.width), dtype=np.uint8)
+        self._plane_views = list(self._planes)
+        self.input_tensor = np.empty((1, 3, self.height, self.width), dtype=np.float32)
+
+    def _rotated_buffer(self, shape, rotation):
+        """Buffer de saída da rotação, criado uma vez para cada resolução de câmera"""
+        key = (shape, rotation)
+        if key not in self._rotated:
+            h, w = shape[:2]
+            if rotation in ("90_ccw", "90_cw"):
+                h, w = w, h
+            self._rotated[key] = np.empty((h, w, 3), dtype=np.uint8)
+
+        return self._rotated[key]
+
+    def box_transform(self, original_shape):
+        """
+        Escala (x, y) e deslocamento (x, y) aplicados à imagem rotacionada de formato original_shape.
+        Uma coordenada no tensor de entrada volta para a imagem com: (coord - deslocamento) / escala.
+        """
+        h, w = original_shape[:2]
+
+        if not self.letterbox:
+            return (self.width / w, self.height / h), (0.0, 0.0)
+
+        ratio = min(self.width / w, self.height / h)
+        new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+        pad_x, pad_y = (self.width - new_w) // 2, (self.height - new_h) // 2
+
+        return (new_w / w, new_h / h), (float(pad_x), float(pad_y))
+
+    def _letterbox(self, image):
+        """Redimensiona mantendo a proporção e completa com bordas até o tamanho de entrada"""
+        h, w = image.shape[:2]
+        (ratio_x, ratio_y), (pad_x, pad_y) = self.box_transform((h, w))
+        new_w, new_h = int(round(w * ratio_x)), int(round(h * ratio_y))
+        pad_x, pad_y = int(pad_x), int(pad_y)
+
+        if (new_w, new_h) not in self._letterboxed:
+            self._letterboxed[(new_w, new_h)] = np.empty((new_h, new_w, 3), dtype=np.uint8)
+
+        resized = cv2.resize(image, (new_w, new_h), dst=self._letterboxed[(new_w, new_h)])
+
+        return cv2.copyMakeBorder(
+            resized, pad_y, self.height - new_h - pad_y, pad_x, self.width - new_w - pad_x,
+            cv2.BORDER_CONSTANT, dst=self._resized, value=self.pad_color
+        )
+
+    def run(self, image: np.ndarray, rotation: str = "90_ccw", out: np.ndarray = None):
+        """
+        Pré-processa uma imagem BGR e escreve o resultado normalizado (3,H,W) em out.
+        Sem out, usa o tensor interno (1,3,H,W), que é sobrescrito na próxima chamada.
+        Retorna (tensor, formato da imagem rotacionada).
+        """
+        if out is None:
+            tensor, out = self.input_tensor, self.input_tensor[0]
+        else:
+            tensor = out
+
+        h, w = image.shape[:2]
+        quarter_turn = rotation in ("90_ccw", "90_cw")
+        rotated_shape = (w, h) if quarter_turn else (h, w)
+
+        if self.fold_rotation and not self.letterbox and rotation is not None:
+            # Redimensiona a imagem original e aplica a rotação só nos planos já reduzidos:
+            # evita rotacionar o quadro em resolução cheia, mas a interpolação pode diferir em
+            # até 1 nível de cinza do caminho exato (rotacionar antes do resize)
+            if quarter_turn:
+                resized = self._resized.reshape(self.width, self.height, 3)
+                cv2.resize(image, (self.height, self.width), dst=resized)
+                planes = self._planes.reshape(3, self.width, self.height)
+            else:
+                resized = cv2.resize(image, (self.width, self.height), dst=self._resized)
+                planes = self._planes
+
+            # HWC→CHW com cv2.split (SIMD) e normalização lendo a view rotacionada dos planos
+            cv2.split(resized, list(planes))
+            np.divide(np.rot90(planes, ROT90_STEPS[rotation], axes=(1, 2)), self._scale, out=out)
+
+            return tensor, rotated_shape
+
+        rotate_code = ROTATIONS[rotation]
+        if rotate_code is not None:
+            image = cv2.rotate(image, rotate_code, dst=self._rotated_buffer(image.shape, rotation))
+
+        if self.letterbox:
+            resized = self._letterbox(image)
+        else:
+            resized = cv2.resize(image, (self.width, self.height), dst=self._resized)
+
+        # HWC→CHW com cv2.split direto nos planos uint8 e normalização em uma única passada contígua.
+        # Dividir (e não multiplicar por 1/255) mantém o resultado idêntico bit a bit ao original
+        cv2.split(resized, self._plane_views)
+        np.divide(self._planes, self._scale, out=out)
+
+        return tensor, rotated_shape
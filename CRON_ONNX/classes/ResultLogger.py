@@ -0,0 +1,159 @@
+import os
+import glob
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import threading
+
+from configs.config import LOG_SAVE_PATH, LOG_MAX_BYTES, LOG_MAX_AGE_SECONDS, LOG_BACKUP_COUNT, LOG_FLUSH_SECONDS
+
+
+# Marca colocada na fila por close() para encerrar a thread de escrita
+_STOP = object()
+
+
+class ResultLogger:
+    """
+    Log estruturado dos resultados (um objeto JSON por linha), gravado por uma thread em segundo plano.
+    Quem registra apenas coloca o registro em uma fila; o arquivo fica aberto e é descarregado em blocos.
+    Quando passa de LOG_MAX_BYTES ou de LOG_MAX_AGE_SECONDS, o arquivo é rotacionado e compactado (gzip)
+    como <nome>.<AAAAMMDD-HHMMSS.mmm>.jsonl.gz (horário do último registro), mantendo os LOG_BACKUP_COUNT mais recentes.
+    """
+
+    def __init__(self, path: str = LOG_SAVE_PATH, max_bytes: int = LOG_MAX_BYTES,
+                 max_age: float = LOG_MAX_AGE_SECONDS, backup_count: int = LOG_BACKUP_COUNT,
+                 flush_interval: float = LOG_FLUSH_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+
+        self._records = queue.Queue()
+        self._file = None
+        self._opened_at = None
+        self._last_epoch = None
+        self._worker = None
+
+    def start(self):
+        """Inicia a thread de escrita; os registros pendentes são gravados ao encerrar o processo"""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="result_logger", daemon=True)
+            self._worker.start()
+            atexit.register(self.close)
+
+        return self
+
+    def log(self, status: str, message: str, **fields):
+        """Coloca um registro na fila de escrita; campos extras (camera_id, timings_ms...) vão para o JSON"""
+        now = time.time()
+        record = {
+            "epoch": round(now, 3),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)),
+            "status": status,
+            "message": message,
+        }
+        record.update((key, value) for key, value in fields.items() if value is not None)
+
+        self._records.put(record)
+
+    # ------------------------------------------------------------------
+    # THREAD DE ESCRITA
+    # ------------------------------------------------------------------
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8", buffering=64 * 1024)
+        self._opened_at = self._first_epoch() or time.time()
+        self._last_epoch = None
+
+    def _first_epoch(self):
+        """Horário do primeiro registro do arquivo atual (continua a contagem de idade após reiniciar)"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.loads(f.readline())["epoch"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _should_rotate(self):
+        if self._last_epoch is None:
+            return False  # nada gravado desde a abertura
+
+        return self._file.tell() >= self.max_bytes or time.time() - self._opened_at >= self.max_age
+
+    def _rotate(self):
+        """
+        Fecha o arquivo atual, compacta como backup nomeado pelo horário do último registro
+        (usado pelo tools/query_logs.py para pular arquivos fora do intervalo) e remove os backups excedentes.
+        """
+        self._file.close()
+        self._file = None
+
+        base, _ = os.path.splitext(self.path)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self._last_epoch))
+        rotated = f"{base}.{stamp}.{int(self._last_epoch * 1000) % 1000:03d}.jsonl"
+        os.replace(self.path, rotated)
+
+        with open(rotated, "rb") as source, gzip.open(rotated + ".gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(rotated)
+
+        backups = sorted(glob.glob(f"{glob.escape(base)}.*.jsonl.gz"))
+        for old in backups[:max(0, len(backups) - self.backup_count)]:
+            os.remove(old)
+
+        self._open()
+
+    def _write(self, record):
+        if self._file is None:
+            self._open()
+
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._last_epoch = record["epoch"]
+
+    def _flush(self):
+        """Descarrega o buffer no disco e rotaciona o arquivo se necessário"""
+        if self._file is None:
+            return
+
+        self._file.flush()
+        if self._should_rotate():
+            self._rotate()
+
+    def _run(self):
+        """
+        Laço da thread de escrita: grava os registros no buffer do arquivo e o descarrega
+        no disco no máximo a cada LOG_FLUSH_SECONDS (e ao encerrar).
+        """
+        last_flush = time.monotonic()
+
+        while True:
+            try:
+                record = self._records.get(timeout=self.flush_interval)
+            except queue.Empty:
+                record = None
+
+            try:
+                if record is not None and record is not _STOP:
+                    self._write(record)
+
+                if record is _STOP or time.monotonic() - last_flush >= self.flush_interval:
+                    self._flush()
+                    last_flush = time.monotonic()
+            except Exception as e:
+                print(f"⚠️ Erro ao gravar o log: {e}")
+
+            if record is _STOP:
+                break
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self, timeout: float = 10):
+        """Grava o que ainda está na fila e fecha o arquivo"""
+        if self._worker is not None and self._worker.is_alive():
+            self._records.put(_STOP)
+            self._worker.join(timeout)
@@ -1,32 +1,47 @@
 import os
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
 
 from configs.config import SUPABASE_URL, SUPABASE_KEY
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 
 class SupabaseDB:
-    def init_supabase(self) -> Client:
-        """Inicializa e retorna o cliente do Supabase"""
+    def init_supabase(self) -> "Client":
+        """
+        Inicializa e retorna o cliente do Supabase.
+        O SDK é importado só aqui (é o módulo mais lento de carregar), no primeiro envio.
+        """
         try:
+            from supabase import create_client
+
             client = create_client(SUPABASE_URL, SUPABASE_KEY)
             return client
         except Exception as e:
             print(f"Erro ao conectar: {e}")
             return None
         
-    def upload_image(self, supabase: Client, bucket_name: str, file_path: str, file_name: str):
+    def upload_image(self, supabase: "Client", bucket_name: str, file_path: str, file_name: str, file_data: bytes = None,
+                     content_type: str = "image/jpeg", raise_errors: bool = False):
         """
         Faz upload da imagem para o Storage e retorna a URL pública.
+        Se file_data for informado, envia os bytes diretamente em vez de ler file_path.
+        Com raise_errors, a exceção é propagada em vez de retornar None (a fila separa rede de recusa).
         """
         try:
-            # 1. Ler o arquivo binário
-            with open(file_path, 'rb') as f:
-                # Note o uso de 'from_' (com underline) pois 'from' é reservado em Python
-                response = supabase.storage.from_(bucket_name).upload(
-                    path=file_name,
-                    file=f,
-                    file_options={"content-type": "image/jpeg"} # Ajuste conforme necessário
-                )
+            # 1. Ler o arquivo binário (ou usar os bytes já em memória)
+            if file_data is None:
+                with open(file_path, 'rb') as f:
+                    file_data = f.read()
+
+            # Note o uso de 'from_' (com underline) pois 'from' é reservado em Python
+            response = supabase.storage.from_(bucket_name).upload(
+                path=file_name,
+                file=file_data,
+                # upsert: reenviar a mesma imagem (ex.: após uma queda antes de registrar a URL) não gera erro de duplicata
+                file_options={"content-type": content_type, "upsert": "true"}
+            )
             
             # 2. Gerar a URL pública
             # O método get_public_url retorna a URL diretamente ou dentro de um objeto dependendo da versão
@@ -38,15 +53,21 @@ class SupabaseDB:
 
         except Exception as e:
             print(f"Erro no upload: {e}")
+            if raise_errors:
+                raise
             return None
 
-    def save_to_database(self, supabase: Client, table_name: str, user_data: dict):
+    def save_to_database(self, supabase: "Client", table_name: str, user_data, raise_errors: bool = False):
         """
         Salva os dados (incluindo a URL da imagem) na tabela do banco.
+        user_data pode ser um único registro (dict) ou uma lista para um insert de várias linhas.
+        Com raise_errors, a exceção é propagada em vez de retornar None.
         """
         try:
             response = supabase.table(table_name).insert(user_data).execute()
             return response.data
         except Exception as e:
             print(f"Erro ao salvar no banco: {e}")
+            if raise_errors:
+                raise
             return None
\ No newline at end of file
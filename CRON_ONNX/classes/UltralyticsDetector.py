@@ -0,0 +1,75 @@
+import cv2
+
+from configs.config import INPUT_SIZE
+from classes.DetectorBackend import DetectorBackend
+from classes.Preprocessor import ROTATIONS
+
+
+class UltralyticsDetector(DetectorBackend):
+    """
+    Backend para modelos YOLO do Ultralytics (.pt, ex.: models/best_small.pt).
+    O Ultralytics faz o próprio letterbox, normalização e NMS; aqui só são aplicadas a rotação da câmera
+    e a conversão para a saída estruturada comum. Requer o pacote ultralytics (dependência opcional).
+    """
+
+    name = "ultralytics"
+
+    def __init__(self, model_path: str, conf_threshold: float = 0.25, iou_threshold: float = 0.7,
+                 intra_op_threads: int = None, intra_op_affinity: str = None, class_names=None,
+                 fase_to_angle=None, input_size=None):
+        from ultralytics import YOLO
+
+        super().__init__(model_path, conf_threshold, class_names, fase_to_angle)
+        self.iou_threshold = iou_threshold
+        self.input_size = tuple(input_size or INPUT_SIZE)
+        self.model = YOLO(model_path)
+
+        # Threads do torch (ex.: workers do InferencePool); a afinidade só existe no onnxruntime
+        if intra_op_threads:
+            import torch
+            torch.set_num_threads(intra_op_threads)
+
+    def preprocess_batch(self, images, rotations):
+        inputs, original_shapes, positions = [], [], []
+
+        for i, (image, rotation) in enumerate(zip(images, rotations)):
+            try:
+                rotate_code = ROTATIONS[rotation]
+                rotated = image if rotate_code is None else cv2.rotate(image, rotate_code)
+            except Exception as e:
+                print(f"⚠️ Erro no pré-processamento da imagem {i} do lote: {e}")
+                continue
+
+            inputs.append(rotated)
+            original_shapes.append(rotated.shape[:2])
+            positions.append(i)
+
+        return inputs, original_shapes, positions
+
+    def infer_batch(self, inputs, count: int):
+        return self.model.predict(
+            inputs[:count], conf=self.conf_threshold, iou=self.iou_threshold, imgsz=max(self.input_size),
+            verbose=False
+        )
+
+    def postprocess_batch(self, outputs, original_shapes):
+        results = []
+
+        for output in outputs:
+            detections = []
+            boxes = output.boxes
+
+            # As caixas já vêm em (x1, y1, x2, y2) nos pixels da imagem rotacionada, em ordem de score
+            for box, score, class_id in zip(boxes.xyxy.tolist(), boxes.conf.tolist(), boxes.cls.tolist()):
+                phase = self.phase_of(int(class_id))
+                if phase in self.fase_to_angle:
+                    detections.append({
+                        "box": [float(coord) for coord in box],
+                        "score": float(score),
+                        "class_id": int(class_id),
+                        "phase": phase,
+                    })
+
+            results.append(detections)
+
+        return results
@@ -0,0 +1,392 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from configs.config import (
+    UPLOAD_QUEUE_DIR, UPLOAD_BATCH_SIZE, UPLOAD_MAX_PARALLEL, UPLOAD_RETRY_SECONDS, UPLOAD_RETRY_MAX_SECONDS,
+    UPLOAD_MAX_ATTEMPTS, SUPABASE_BUCKET, SUPABASE_TABLE
+)
+from utils import metrics
+
+# Tipos de falha de um item da fila
+OFFLINE = "offline"  # rede, timeout ou serviço indisponível: não conta tentativa, repete com espera crescente
+REJECTED = "rejected"  # Storage ou banco recusou o item com o serviço no ar: conta tentativa
+PERMANENT = "permanent"  # repetir não resolve (imagem sumiu do disco): vai direto para dead_letter
+
+
+def is_offline_error(error: Exception):
+    """
+    True para falhas de conexão, timeout ou indisponibilidade do serviço (HTTP 5xx, 408, 429),
+    em que o item não tem culpa; as demais respostas de erro do Storage/banco são recusas do item.
+    """
+    try:
+        from httpx import TransportError
+    except ImportError:
+        TransportError = OSError
+
+    if isinstance(error, (OSError, TransportError)):
+        return True
+
+    # storage3 informa o status HTTP em status; o postgrest, em code, quando a resposta não é JSON
+    # (senão code é um código do PostgreSQL/PostgREST, ex.: "23505" ou "PGRST204")
+    status = getattr(error, "status", None) or getattr(error, "code", None)
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return False
+
+    return 100 <= status < 600 and (status >= 500 or status in (408, 429))
+
+
+class UploadQueue:
+    """
+    Fila persistente de envios ao Supabase, processada por uma thread em segundo plano.
+    Cada registro e sua imagem ficam gravados em disco (SQLite + arquivo JPEG) até serem enviados,
+    então capturas feitas sem rede são enviadas depois em vez de perdidas.
+    Os uploads de imagem rodam em paralelo (limitados por UPLOAD_MAX_PARALLEL) e os registros
+    são inseridos em lote com um único insert de várias linhas.
+    A fila guarda o JPEG original; a miniatura (UPLOAD_IMAGE_FORMAT) é gerada na hora do envio.
+    As falhas são tratadas por item: um registro recusado UPLOAD_MAX_ATTEMPTS vezes pelo Storage ou pelo banco
+    (ou cuja imagem sumiu do disco) vai para a tabela dead_letter com o motivo, para não travar o início da fila.
+    Falhas de rede não contam tentativa: a fila espera cada vez mais (até UPLOAD_RETRY_MAX_SECONDS) e não
+    descarta nada. Registros da dead_letter voltam para a fila com requeue_dead_letters (tools/dead_letter.py).
+    """
+
+    def __init__(self, supabase, get_client, log, queue_dir: str = UPLOAD_QUEUE_DIR):
+        self.supabase = supabase
+        self.get_client = get_client
+        self.log = log
+
+        self.images_dir = os.path.join(queue_dir, "images")
+        os.makedirs(self.images_dir, exist_ok=True)
+
+        self._db = sqlite3.connect(os.path.join(queue_dir, "uploads.db"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Cada commit chega ao disco antes de retornar: o registro sobrevive a uma queda de energia
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pending (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                storage_name TEXT NOT NULL,
+                image_path TEXT NOT NULL,
+                public_url TEXT,
+                record TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # Registros descartados da fila, mantidos (com a imagem em disco) para reenvio manual
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS dead_letter (
+                id INTEGER PRIMARY KEY,
+                created_at REAL NOT NULL,
+                failed_at REAL NOT NULL,
+                storage_name TEXT NOT NULL,
+                image_path TEXT NOT NULL,
+                public_url TEXT,
+                record TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                reason TEXT NOT NULL
+            )
+        """)
+        self._db.commit()
+        self._db_lock = threading.Lock()
+
+        self._executor = ThreadPoolExecutor(max_workers=UPLOAD_MAX_PARALLEL, thread_name_prefix="upload")
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._worker = None
+
+    def start(self):
+        """Inicia a thread de envio (também envia o que ficou pendente de execuções anteriores)"""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="upload_queue", daemon=True)
+            self._worker.start()
+
+        return self
+
+    def enqueue(self, record: dict, image_bytes: bytes, storage_name: str):
+        """
+        Grava a imagem e o registro na fila em disco e acorda a thread de envio.
+        A URL pública da imagem é preenchida no campo "imagem" do registro no momento do envio.
+        """
+        image_path = os.path.join(self.images_dir, f"{time.time_ns()}.jpg")
+        temp_path = image_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(image_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, image_path)
+
+        with self._db_lock:
+            self._db.execute(
+                "INSERT INTO pending (created_at, storage_name, image_path, record) VALUES (?, ?, ?, ?)",
+                (time.time(), storage_name, image_path, json.dumps(record))
+            )
+            self._db.commit()
+
+        self._wakeup.set()
+
+    def pending_count(self):
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def _next_batch(self):
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT id, storage_name, image_path, public_url, record, attempts FROM pending ORDER BY id LIMIT ?",
+                (UPLOAD_BATCH_SIZE,)
+            ).fetchall()
+
+    def _upload(self, db, row):
+        """
+        Envia a imagem de um item da fila, se ainda não foi enviada.
+        Retorna (url, None) ou, em caso de falha, (None, (motivo, tipo da falha)).
+        """
+        item_id, storage_name, image_path, public_url = row[:4]
+        if public_url:
+            return public_url, None
+
+        # Importado aqui: utils.thumbnails depende do cv2, que a execução via cron só carrega no ciclo
+        from utils.thumbnails import encode_upload_image, upload_content_type
+
+        try:
+            with open(image_path, "rb") as f:
+                image_bytes = f.read()
+        except OSError as e:
+            # Imagem removida ou ilegível: repetir não resolve
+            return None, (f"imagem da fila indisponível: {e}", PERMANENT)
+
+        try:
+            file_data, content_type = encode_upload_image(image_bytes), upload_content_type()
+        except Exception as e:
+            # Imagem que não decodifica: envia os bytes originais para não travar a fila
+            print(f"⚠️ Miniatura indisponível para {storage_name}, enviando o original: {e}")
+            file_data, content_type = image_bytes, "image/jpeg"
+
+        try:
+            public_url = self.supabase.upload_image(
+                db, SUPABASE_BUCKET, image_path, storage_name, file_data=file_data, content_type=content_type,
+                raise_errors=True
+            )
+        except Exception as e:
+            return None, (f"falha no upload da imagem: {e}", OFFLINE if is_offline_error(e) else REJECTED)
+        if not public_url:
+            return None, ("upload da imagem sem URL pública", REJECTED)
+
+        # Guarda a URL para não repetir o upload se o insert falhar
+        with self._db_lock:
+            self._db.execute("UPDATE pending SET public_url = ? WHERE id = ?", (public_url, item_id))
+            self._db.commit()
+
+        return public_url, None
+
+    def _remove(self, rows):
+        """Tira da fila os itens já registrados no banco e apaga suas imagens"""
+        with self._db_lock:
+            self._db.executemany("DELETE FROM pending WHERE id = ?", [(row[0],) for row in rows])
+            self._db.commit()
+
+        for row in rows:
+            if os.path.exists(row[2]):
+                os.remove(row[2])
+
+    def _save(self, db, records):
+        """Insere os registros; retorna None ou a falha (motivo, tipo da falha)"""
+        try:
+            self.supabase.save_to_database(db, SUPABASE_TABLE, records, raise_errors=True)
+        except Exception as e:
+            return f"insert recusado pelo banco: {e}", OFFLINE if is_offline_error(e) else REJECTED
+
+        return None
+
+    def _insert(self, db, ready):
+        """
+        Insere os registros prontos com um único insert; se o banco recusar o lote, insere um a um
+        para isolar o registro problemático (sem rede, o lote inteiro espera). Retorna as falhas [(row, falha)].
+        """
+        records = [dict(json.loads(row[4]), imagem=url) for row, url in ready]
+        error = self._save(db, records)
+        if error is None:
+            self._remove([row for row, _ in ready])
+            return []
+
+        if len(ready) == 1 or error[1] == OFFLINE:
+            return [(row, error) for row, _ in ready]
+
+        failures = []
+        for (row, _), record in zip(ready, records):
+            error = self._save(db, record)
+            if error is None:
+                self._remove([row])
+            else:
+                failures.append((row, error))
+
+        return failures
+
+    def _send_batch(self, rows):
+        """
+        Envia um lote: uploads em paralelo e um único insert com todos os registros prontos.
+        Retorna as falhas [(row, (motivo, tipo da falha))] dos itens que não foram registrados.
+        """
+        db = self.get_client()
+        if not db:
+            raise ConnectionError("Falha ao inicializar o cliente Supabase.")
+
+        results = list(self._executor.map(lambda row: self._upload(db, row), rows))
+
+        failures = [(row, error) for row, (url, error) in zip(rows, results) if error]
+        ready = [(row, url) for row, (url, _) in zip(rows, results) if url]
+        if ready:
+            failures += self._insert(db, ready)
+
+        saved = len(rows) - len(failures)
+        if saved:
+            print(f"Registros salvos no Banco de dados Supabase: {saved}")
+
+        return failures
+
+    def _record_failures(self, failures):
+        """
+        Conta uma tentativa para cada item recusado (falhas de rede não contam). Os que atingiram
+        UPLOAD_MAX_ATTEMPTS (ou tiveram falha definitiva) vão para a tabela dead_letter e saem da fila.
+        Retorna [(row, motivo)] dos itens mantidos para nova tentativa.
+        """
+        now = time.time()
+        retry, rejected, dead = [], [], []
+        for row, (reason, kind) in failures:
+            attempts = row[5] + 1
+            if kind == PERMANENT or (kind == REJECTED and attempts >= UPLOAD_MAX_ATTEMPTS):
+                dead.append((row, attempts, reason))
+                continue
+
+            retry.append((row, reason))
+            if kind == REJECTED:
+                rejected.append(row)
+
+        with self._db_lock:
+            self._db.executemany(
+                "UPDATE pending SET attempts = attempts + 1 WHERE id = ?", [(row[0],) for row in rejected]
+            )
+            for row, attempts, reason in dead:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO dead_letter (id, created_at, failed_at, storage_name, image_path, "
+                    "public_url, record, attempts, reason) "
+                    "SELECT id, created_at, ?, storage_name, image_path, public_url, record, ?, ? "
+                    "FROM pending WHERE id = ?",
+                    (now, attempts, reason, row[0])
+                )
+                self._db.execute("DELETE FROM pending WHERE id = ?", (row[0],))
+            self._db.commit()
+
+        for row, attempts, reason in dead:
+            self.log(
+                status="FALHA",
+                data=f"Registro {row[1]} removido da fila após {attempts} tentativa(s) (dead_letter): {reason}"
+            )
+
+        return retry
+
+    def _run(self):
+        """Laço da thread de envio: esvazia a fila e aguarda novos itens ou o tempo de nova tentativa"""
+        offline_rounds = 0
+
+        while not self._stop_event.is_set():
+            rows = self._next_batch()
+
+            if not rows:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            try:
+                with metrics.span("upload", records=len(rows)):
+                    failures = self._send_batch(rows)
+            except Exception as e:
+                metrics.failure("upload", e)
+                failures = [(row, (str(e), OFFLINE if is_offline_error(e) else REJECTED)) for row in rows]
+            else:
+                for _, (_, kind) in failures:
+                    metrics.failure("upload", kind)
+
+            if not failures:
+                offline_rounds = 0
+                continue
+
+            kept = self._record_failures(failures)
+            if not kept:
+                continue
+
+            # Sem rede: espera crescente (ou até um novo item/encerramento); recusa do item: espera fixa
+            if any(kind == OFFLINE for _, (_, kind) in failures):
+                delay = min(UPLOAD_RETRY_MAX_SECONDS, UPLOAD_RETRY_SECONDS * 2 ** offline_rounds)
+                offline_rounds += 1
+            else:
+                delay, offline_rounds = UPLOAD_RETRY_SECONDS, 0
+
+            self.log(
+                status="FALHA",
+                data=f"Erro em salva no banco ({len(kept)} registro(s) mantidos na fila, nova tentativa em "
+                     f"{delay:.0f}s): {kept[0][1]}"
+            )
+
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+
+    def dead_letters(self):
+        """Registros descartados: (id, failed_at, storage_name, image_path, public_url, attempts, reason)"""
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT id, failed_at, storage_name, image_path, public_url, attempts, reason "
+                "FROM dead_letter ORDER BY id"
+            ).fetchall()
+
+    def requeue_dead_letters(self, ids=None):
+        """
+        Devolve registros da dead_letter (todos ou os de ids) para a fila, com as tentativas zeradas e
+        na posição original. Registros sem URL cuja imagem sumiu do disco ficam na dead_letter.
+        Retorna (reenfileirados, mantidos).
+        """
+        rows = [row for row in self.dead_letters() if ids is None or row[0] in ids]
+        requeue = [row[0] for row in rows if row[4] or os.path.exists(row[3])]
+
+        with self._db_lock:
+            for item_id in requeue:
+                self._db.execute(
+                    "INSERT INTO pending (id, created_at, storage_name, image_path, public_url, record, attempts) "
+                    "SELECT id, created_at, storage_name, image_path, public_url, record, 0 "
+                    "FROM dead_letter WHERE id = ?",
+                    (item_id,)
+                )
+                self._db.execute("DELETE FROM dead_letter WHERE id = ?", (item_id,))
+            self._db.commit()
+
+        if requeue:
+            self._wakeup.set()
+
+        return len(requeue), len(rows) - len(requeue)
+
+    def flush(self, timeout: float = None):
+        """Aguarda a fila esvaziar (ou o timeout); retorna True se não restou nada pendente"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while self.pending_count():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            time.sleep(0.2 if remaining is None else min(0.2, remaining))
+
+        return True
+
+    def stop(self, timeout: float = None):
+        """Encerra a thread de envio; o que não foi enviado continua gravado para a próxima execução"""
+        self._stop_event.set()
+        self._wakeup.set()
+
+        if self._worker:
+            self._worker.join(timeout)
+
+        self._executor.shutdown(wait=True)
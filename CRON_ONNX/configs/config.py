@@ -1,14 +1,187 @@
-IMAGE_SAVE_PATH = "captured_images/current_capture.jpg"
-LOG_SAVE_PATH = "logs/results_log.txt"
+IMAGE_SAVE_PATH = "captured_images/{camera_id}_current_capture.jpg"  # Um arquivo por câmera
+LOG_SAVE_PATH = "logs/results_log.jsonl"  # Um registro JSON por linha (consulta: tools/query_logs.py)
+LOG_MAX_BYTES = 5 * 1024 * 1024  # Tamanho que dispara a rotação do log
+LOG_MAX_AGE_SECONDS = 7 * 24 * 3600  # Idade que dispara a rotação do log
+LOG_BACKUP_COUNT = 30  # Logs rotacionados (compactados com gzip) mantidos em disco
+LOG_FLUSH_SECONDS = 2  # Intervalo máximo em que os registros ficam só no buffer de escrita
+IMAGE_SAVE_ENABLED = True  # Grava a captura em disco (em segundo plano, sem recodificar)
 
-ESP32_CAM_URL = "http://192.168.1.14/capture"
 MODEL_PATH = "models/best_nano.onnx" 
 
+# Backend de detecção (classes/DetectorBackend.py): "onnx" (YOLO exportado para ONNX),
+# "ultralytics" (modelo YOLO .pt, ex.: models/best_small.pt) ou "onnx_classifier" (um vetor de scores por imagem)
+DETECTOR_BACKEND = "onnx"
+CLASSIFIER_CLASSES = ["fase_1", "fase_2", "fase_3"]  # Fase de cada posição do vetor do "onnx_classifier"
+
+# Teste A/B: com um segundo modelo, cada lote é atendido por um dos dois e o log registra qual
+# (campo "backend") e a latência (comparação: python -m tools.query_logs --by-backend)
+DETECTOR_AB_MODEL_PATH = None  # Ex.: "models/best_small.pt"; None desativa o teste
+DETECTOR_AB_BACKEND = None  # Backend do segundo modelo; None usa DETECTOR_BACKEND
+DETECTOR_AB_SHARE = 0.5  # Fração dos lotes atendida pelo segundo modelo
+
+# Registro de modelos versionados (classes/ModelRegistry.py): uma pasta por versão com o modelo e o
+# metadata.json (backend, tamanho de entrada, nomes das classes, fase → ângulo). Com alguma versão
+# publicada (tools/register_model.py), o registro substitui MODEL_PATH e DETECTOR_BACKEND
+MODEL_REGISTRY_DIR = "models/registry"
+MODEL_RELOAD_CHECK_SECONDS = 60  # No serviço, intervalo de verificação de nova versão (0 desativa a troca)
+USE_INT8_MODEL = False  # Usa models/best_nano.int8.onnx (gerado por tools/quantize_model.py) se existir
+CALIBRATION_IMAGES_DIR = "captured_images"  # Imagens usadas na calibração da quantização INT8
+
+# Sessão onnxruntime (utils/onnx_session.py)
+ORT_PROVIDERS = ["CPUExecutionProvider"]
+ORT_INTRA_OP_THREADS = 3  # Raspberry Pi 4: 3 dos 4 núcleos, deixando 1 para MQTT/HTTP/Supabase
+ORT_INTER_OP_THREADS = 1
+ORT_EXECUTION_MODE = "sequential"  # "sequential" ou "parallel"
+ORT_GRAPH_OPTIMIZATION = "all"  # "disable", "basic", "extended" ou "all"
+ORT_ENABLE_MEM_ARENA = True
+ORT_ALLOW_SPINNING = False  # Threads ociosas dormem em vez de girar consumindo CPU
+ORT_INTRA_OP_AFFINITY = "3;4"  # Núcleo (numerado a partir de 1) de cada thread extra, separados por ";"; "" desativa
+ORT_CACHE_OPTIMIZED_MODEL = True  # Salva o grafo otimizado ao lado do modelo para inicializações mais rápidas
+
+INPUT_SIZE = (640, 640)  # (largura, altura) usada quando o modelo exportado tem entrada dinâmica
+PREPROCESS_LETTERBOX = False  # Mantém a proporção da imagem com bordas (ex.: modelos 320x480)
+
+# Pool de processos de inferência (classes/InferencePool.py)
+INFERENCE_POOL_WORKERS = 0  # Processos com sessão ONNX própria; 0 roda a inferência no processo principal
+INFERENCE_POOL_THREADS_PER_WORKER = 1  # Threads do onnxruntime por processo (workers x threads <= núcleos)
+INFERENCE_POOL_SLOTS_PER_WORKER = 2  # Espaços do anel em memória compartilhada por processo
+INFERENCE_POOL_SLOT_SHAPE = (1200, 1600, 3)  # Maior quadro esperado (UXGA); quadros maiores recriam o anel
+INFERENCE_POOL_PIN_WORKERS = True  # Fixa cada processo em um núcleo
+INFERENCE_POOL_START_TIMEOUT = 120  # Espera pelo carregamento do modelo em cada processo (segundos)
+INFERENCE_POOL_TASK_TIMEOUT = 60  # Espera máxima pelo resultado de uma imagem (segundos)
+
+NMS_TOP_K = 300  # Candidatos de maior score (por imagem) que seguem para o NMS
+MAX_DETECTIONS = 100  # Limite de detecções por imagem após o NMS
+NMS_CLASS_AGNOSTIC = False  # True: caixas de fases diferentes também se suprimem (comportamento antigo)
+# Maior grupo (classe/imagem) resolvido pela matriz de IoU, que é quadrática em tempo e memória; grupos maiores
+# usam o laço guloso, mais rápido a partir de ~1000 caixas (ver benchmarks/bench_nms.py)
+NMS_MATRIX_MAX_BOXES = 1000
+
+# Inferência por tiles (ONNXDetector.detect_tiled), ativada por câmera com "tiles" no registro de câmeras:
+# além do quadro inteiro reduzido, recortes em resolução cheia passam pelo modelo em um único lote
+TILE_SIZE = 640  # Lado dos tiles da grade, em pixels da imagem rotacionada
+TILE_OVERLAP = 0.2  # Sobreposição entre tiles vizinhos da grade (fração do tile)
+TILE_PROBE_CONF = 0.05  # Tiles sem nenhuma caixa acima deste score na passada do quadro inteiro são pulados
+
+# Aplica a rotação da câmera depois do resize (mais rápido, mas pode diferir em até 1/255 do caminho exato)
+PREPROCESS_FOLD_ROTATION = False
+
+# Captura paralela das câmeras (classes/CameraFetcher.py)
+CAPTURE_TIMEOUT_SECONDS = 5  # Timeout padrão; cada câmera pode definir "timeout" no registro
+CAPTURE_RETRIES = 2  # Novas tentativas após a primeira falha
+CAPTURE_BACKOFF_SECONDS = 0.5  # Espera inicial entre tentativas (dobra a cada tentativa)
+CAPTURE_MAX_WORKERS = 8  # Capturas simultâneas e tamanho do pool de conexões
+CIRCUIT_FAILURE_THRESHOLD = 3  # Falhas seguidas até a câmera ser ignorada
+CIRCUIT_COOLDOWN_SECONDS = 600  # Tempo que uma câmera com falhas fica ignorada
+
+# Modo de captura: "snapshot" (uma requisição ao /capture por imagem) ou
+# "stream" (conexão MJPEG contínua ao "stream_url" da câmera, classes/MJPEGStream.py)
+CAPTURE_MODE = "snapshot"
+STREAM_SAMPLE_SECONDS = 10  # No modo "stream", intervalo entre amostras enviadas ao detector pelo serviço
+STREAM_MAX_FRAME_AGE_SECONDS = 2  # Quadros mais antigos que isso não são entregues ao detector
+STREAM_RECONNECT_SECONDS = 5  # Espera antes de reconectar quando o stream cai
+STREAM_CHUNK_BYTES = 16 * 1024  # Bytes lidos do socket por vez
+STREAM_MAX_FRAME_BYTES = 1024 * 1024  # Quadro maior que isso é descartado (stream corrompido)
+
 BROKER = "192.168.1.8"
 PORT = 1883
-TOPIC = "hidroponia/servo"
+
+# Fila persistente de comandos MQTT (classes/MQTTOutbox.py)
+MQTT_QOS = 1  # QoS 1: o broker confirma o recebimento de cada comando
+MQTT_PUBLISH_TIMEOUT = 10  # Espera pela confirmação do broker antes de considerar o envio falho
+MQTT_RETRY_SECONDS = 30  # Espera antes de tentar novamente quando o broker está indisponível
+MQTT_COMMAND_MAX_AGE_SECONDS = 6 * 3600  # Comandos mais antigos que isso são descartados sem envio
+MQTT_FLUSH_TIMEOUT = 15  # Tempo que a execução via cron espera os comandos serem confirmados antes de sair
+
+# Registro de câmeras ESP32-CAM
+# rotation: None, "90_ccw", "90_cw" ou "180" (conforme a montagem da câmera)
+# stream_url: endpoint MJPEG (porta 81 no firmware CameraWebServer), opcional
+# tiles: inferência por tiles, opcional: "grid" (grade com sobreposição) ou lista de ROIs [x1, y1, x2, y2]
+#        em frações da imagem já rotacionada (ex.: [[0.0, 0.5, 0.5, 1.0]] para o quadrante inferior esquerdo)
+CAMERAS = [
+    {
+        "id": "cam_01",
+        "url": "http://192.168.1.14/capture",
+        "stream_url": "http://192.168.1.14:81/stream",  # Usado no CAPTURE_MODE = "stream"
+        "rotation": "90_ccw",
+        "topic": "hidroponia/servo",
+    },
+]
 
 SUPABASE_URL = ""
 SUPABASE_KEY = ""
+SUPABASE_BUCKET = "registros"
+SUPABASE_TABLE = "registro"
+
+# Fila persistente de envios ao Supabase (classes/UploadQueue.py)
+UPLOAD_QUEUE_DIR = "spool"  # Registros, imagens e comandos MQTT aguardando envio
+UPLOAD_BATCH_SIZE = 20  # Registros por insert de várias linhas
+UPLOAD_MAX_PARALLEL = 4  # Uploads simultâneos para o Storage
+UPLOAD_RETRY_SECONDS = 60  # Espera antes de tentar novamente quando o envio falha
+UPLOAD_RETRY_MAX_SECONDS = 900  # Espera máxima sem rede (a espera dobra a cada falha de conexão seguida)
+UPLOAD_MAX_ATTEMPTS = 10  # Recusas de um registro (com o serviço no ar) antes de ir para a tabela dead_letter
+UPLOAD_FLUSH_TIMEOUT = 30  # Tempo que a execução via cron espera a fila esvaziar antes de sair
+
+# Versão das imagens enviadas ao Storage (utils/thumbnails.py): "original" (JPEG da câmera), "jpeg" ou "webp"
+UPLOAD_IMAGE_FORMAT = "webp"
+UPLOAD_IMAGE_MAX_SIDE = 800  # Maior lado da miniatura enviada, em pixels (0 mantém a resolução)
+UPLOAD_IMAGE_QUALITY = 80
+
+# Arquivo local das capturas (classes/ImageArchive.py): JPEGs originais em pacotes diários por câmera,
+# com índice por horário (consulta e exportação: python -m tools.archive)
+ARCHIVE_ENABLED = True
+ARCHIVE_DIR = "archive"
+ARCHIVE_MAX_BYTES = 4 * 1024 * 1024 * 1024  # Cota de disco: os dias mais antigos são removidos ao passar dela
+ARCHIVE_RETENTION_DAYS = 365  # Dias mais antigos que isso são removidos mesmo abaixo da cota (0 desativa)
+
+# Suavização da fase antes de acionar o servo (classes/PhaseTracker.py)
+PHASE_STATE_PATH = UPLOAD_QUEUE_DIR + "/phase_state.json"  # Janela de cada câmera, mantida entre execuções
+PHASE_WINDOW_SIZE = 5  # Capturas consideradas na decisão
+PHASE_WINDOW_MAX_AGE_SECONDS = 6 * 3600  # Capturas mais antigas saem da janela
+PHASE_MAJORITY = 0.6  # Participação ponderada (por score) que a nova fase precisa ter na janela
+PHASE_HYSTERESIS = 0.2  # Vantagem mínima da nova fase sobre a fase atual
+PHASE_MIN_OBSERVATIONS = 2  # Capturas em que a nova fase precisa aparecer antes de mover o servo
+
+# Filtro de cena inalterada antes da inferência (classes/FrameGate.py)
+FRAME_GATE_ENABLED = True
+FRAME_GATE_STATE_PATH = UPLOAD_QUEUE_DIR + "/frame_gate.json"  # Última miniatura e detecções de cada câmera
+FRAME_GATE_THUMBNAIL_SIZE = 32  # Miniatura N x N em tons de cinza usada na comparação
+FRAME_GATE_THRESHOLD = 4.0  # Diferença média (0-255) a partir da qual a inferência roda de novo
+FRAME_GATE_MAX_AGE_SECONDS = 6 * 3600  # Idade máxima do resultado reaproveitado antes de forçar a inferência
+
+LOOP_INTERVAL_SECONDS = 3600  # 1 hora
+CRON_PERIOD_SECONDS = LOOP_INTERVAL_SECONDS  # Período do cron que executa o main.py (ex.: 300 para */5)
+
+# Agendamento adaptativo das capturas (classes/CaptureScheduler.py): cada câmera tem o próprio intervalo,
+# curto perto de uma troca de fase ou com baixa confiança e crescendo enquanto a fase se mantém estável,
+# alongado quando a inferência fica lenta ou a CPU carregada. Usado pelo serviço (modo "snapshot") e pela
+# execução via cron, que então pode ser agendada com frequência (ex.: */5): só as câmeras vencidas são capturadas
+CAPTURE_SCHEDULE_ADAPTIVE = True
+SCHEDULE_STATE_PATH = UPLOAD_QUEUE_DIR + "/capture_schedule.json"  # Intervalo e próxima captura de cada câmera
+SCHEDULE_MIN_INTERVAL_SECONDS = 600  # Intervalo perto de uma troca de fase ou com baixa confiança
+SCHEDULE_MAX_INTERVAL_SECONDS = 4 * 3600  # Intervalo máximo com a fase estável (ou sob carga)
+SCHEDULE_STABLE_GROWTH = 1.5  # Crescimento do intervalo a cada captura com a fase estável e confiante
+SCHEDULE_CONFIDENT_SHARE = 0.8  # Participação mínima da fase estável na janela do PhaseTracker
+SCHEDULE_CONFIDENT_SCORE = 0.5  # Score mínimo da melhor detecção da captura
+SCHEDULE_TARGET_LATENCY_SECONDS = 2.0  # Inferência por imagem acima disso alonga os intervalos na mesma proporção
+SCHEDULE_MAX_CPU_LOAD = 0.8  # Load average por núcleo acima disso alonga os intervalos na mesma proporção
+SCHEDULE_JITTER = 0.1  # Variação aleatória (±10%) de cada intervalo, para as câmeras não sincronizarem
+SCHEDULE_MAX_CAMERAS_PER_CYCLE = 4  # Câmeras vencidas além disso ficam para o ciclo seguinte
+SCHEDULE_MIN_GAP_SECONDS = 5  # Espera mínima do serviço entre dois ciclos
+
+# Serviço de detecção persistente (daemon.py)
+DAEMON_SOCKET_PATH = "/tmp/flow_control_detector.sock"  # Socket usado pelo main.py (cron) para disparar um ciclo
+DAEMON_TRIGGER_TIMEOUT = 60  # Tempo máximo de espera pela resposta do serviço (segundos)
+DAEMON_INTERVAL_SECONDS = LOOP_INTERVAL_SECONDS
+DAEMON_JITTER_SECONDS = 60  # Variação aleatória (±) aplicada a cada intervalo
+DAEMON_RUN_ON_START = True  # Executa uma captura logo ao iniciar o serviço
 
-LOOP_INTERVAL_SECONDS = 3600  # 1 hora
\ No newline at end of file
+# Métricas no formato Prometheus (utils/metrics.py): latência por etapa, falhas por causa, estado de cada câmera
+# e memória/CPU do processo, servidas pelo serviço de detecção em http://METRICS_HOST:METRICS_PORT/metrics
+METRICS_ENABLED = True
+METRICS_HOST = "127.0.0.1"  # Só acessível na própria Pi; "0.0.0.0" para um Prometheus em outra máquina
+METRICS_PORT = 9108
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # Segundos
+METRICS_TRACE_ENABLED = False  # Registra as etapas de cada ciclo (log com status "TRACE" e /traces no serviço)
+METRICS_TRACE_HISTORY = 20  # Ciclos mantidos em memória para o /traces
+METRICS_TEXTFILE_PATH = None  # Execução via cron: arquivo .prom gravado ao fim do ciclo (textfile do node_exporter)
@@ -0,0 +1,30 @@
+from configs.config import *
+from utils.functions import connect_mqtt, log_results, get_capture_scheduler
+from classes.DetectorService import DetectorService
+from classes.DetectorBackend import load_detector
+
+
+# Carrega o modelo uma única vez (antes de qualquer thread, pois o pool de inferência cria os processos com fork);
+# novas versões do registro de modelos são trocadas em execução
+try:
+    detector = load_detector(hot_reload=True, log=log_results)
+except Exception as e:
+    print(f"Fatal: Não foi possível carregar o modelo. Erro: {e}")
+    exit(1)
+
+
+# Conecta ao broker MQTT (conexão mantida durante toda a execução do serviço)
+client = connect_mqtt()
+
+
+# Inicia o serviço de detecção até receber SIGTERM
+# (no modo stream, amostra os quadros das câmeras a cada STREAM_SAMPLE_SECONDS; no modo snapshot,
+# com CAPTURE_SCHEDULE_ADAPTIVE, cada câmera segue o próprio intervalo do CaptureScheduler)
+if CAPTURE_MODE == "stream":
+    service = DetectorService(detector, client, interval=STREAM_SAMPLE_SECONDS, jitter=0)
+else:
+    service = DetectorService(
+        detector, client, scheduler=get_capture_scheduler() if CAPTURE_SCHEDULE_ADAPTIVE else None
+    )
+
+service.run()
@@ -1,75 +1,87 @@
-from configs.config import *
-from utils.functions import *
-from classes.ONNXDetector import ONNXDetector
+import sys
+from contextlib import nullcontext
 
+# --profile-startup: mede a importação de cada módulo e as etapas de inicialização
+profiler = None
+if "--profile-startup" in sys.argv:
+    from utils.startup_profile import StartupProfiler
+    profiler = StartupProfiler().install()
 
-# Conecta ao broker MQTT
-try:
-    import paho.mqtt.client as mqtt
+stage = profiler.stage if profiler else (lambda name: nullcontext())
 
-    client = mqtt.Client()
-    client.connect(BROKER, PORT, 60)
-    client.loop_start() 
-    print(f"🔗 Conectado ao broker MQTT: {BROKER}:{PORT}")
-except Exception as e:
-    print(f"⚠️ Não foi possível conectar ao broker MQTT. Erro: {e}")
+
+with stage("configs.config"):
+    from configs.config import *
+    from utils.daemon_client import trigger_daemon
+
+
+# Se o serviço de detecção estiver rodando, apenas dispara um ciclo nele
+with stage("disparo do serviço de detecção"):
+    response = trigger_daemon()
+
+if response is not None:
+    if response == "busy":
+        print("⏳ Ciclo em andamento no serviço de detecção; nada a fazer nesta execução")
+    elif response == "idle":
+        print("⏭️ Serviço de detecção ativo, sem câmera com captura prevista agora")
+    elif response == "error":
+        print("⚠️ Serviço de detecção ativo, mas sem resposta válida; ciclo local não executado")
+    else:
+        print(f"📨 Ciclo disparado no serviço de detecção: {response}")
+    if profiler:
+        profiler.report()
+    exit()
+
+
+# Sem serviço ativo: executa o ciclo completo neste processo
+with stage("utils.functions"):
+    from utils.functions import *
 
 
-# Carrega o modelo ONNX
+# Agendamento adaptativo: só as câmeras com captura vencida; sem nenhuma, encerra antes de carregar o modelo.
+# Cada câmera é capturada no disparo do cron mais próximo do seu horário (tolerância de meio período)
+cameras = CAMERAS
+if CAPTURE_SCHEDULE_ADAPTIVE:
+    cameras = get_capture_scheduler(grace=CRON_PERIOD_SECONDS / 2).due(CAMERAS)
+
+    if not cameras:
+        delay = get_capture_scheduler().next_delay(CAMERAS)
+        print(f"⏭️ Nenhuma câmera com captura prevista agora (próxima em ~{delay / 60:.0f} min)")
+        if profiler:
+            profiler.report()
+        exit()
+
+
+# Carrega o modelo (antes de qualquer thread, pois o pool de inferência cria os processos com fork)
 try:
-    detector = ONNXDetector(MODEL_PATH)
+    with stage("carregamento do modelo"):
+        from classes.DetectorBackend import load_detector
+        detector = load_detector()
 except Exception as e:
-    print(f"Fatal: Não foi possível carregar o modelo ONNX. Erro: {e}")
+    print(f"Fatal: Não foi possível carregar o modelo. Erro: {e}")
+    if profiler:
+        profiler.report()
     exit()
 
 
+# Conecta ao broker MQTT
+with stage("conexão MQTT"):
+    client = connect_mqtt()
+
+
 # Inicia a obtenção e processamento de Imagem
-try:
-    # CAPTURA E SALVAMENTO
-    image_saved = capture_and_save_image(ESP32_CAM_URL, IMAGE_SAVE_PATH)
-
-    if image_saved:
-        # PROCESSAMENTO E CLASSIFICAÇÃO
-        detected_phases = detector.detect(IMAGE_SAVE_PATH) 
-        
-        if detected_phases:
-            # Imprime todas as classes encontradas
-            print(f"📈 Fases detectadas: {detected_phases}")
-            
-            # Usando primeira fase detectada para envio
-            # Substituir por média das fases
-            first_phase = detected_phases[0]
-            angle_to_send = detector.fase_to_angle.get(first_phase, 0) # Usa 0 se não encontrar
-
-            # ENVIO MQTT
-            client.publish(TOPIC, str(angle_to_send))
-            print(f"🎉 Ângulo correspondente enviado via MQTT ({first_phase}) → {angle_to_send}°")
-
-            # REGISTRO DE LOG E BANCO
-            save_to_database(detected_phases, angle_to_send)
-
-            log_results(
-                status="SUCESSO",
-                data=f"Fases detectadas: {detected_phases} | Angulo correspondente: {angle_to_send}"
-            )
-            
-        else:
-            print("Nenhuma fase detectada no arquivo capturado.")
-
-            # REGISTRO DE LOG
-            log_results(
-                status="FALHA",
-                data=f"Nenhuma fase detectada no arquivo capturado"
-            )
-            
-    else:
-        print("\nPulando processamento: Falha na captura de imagem.")
+with stage("ciclo de detecção"):
+    run_detection_cycle(detector, client, cameras)
 
-except Exception as e:
-    print(f"Falha de processamento: {e}")
+# Aguarda os comandos MQTT e os envios ao Supabase; o que não for enviado fica na fila para a próxima execução
+with stage("envio dos comandos MQTT e registros"):
+    flush_mqtt_commands()
+    flush_uploads()
+
+# Métricas desta execução para o textfile collector do node_exporter (o endpoint HTTP é só do serviço)
+if METRICS_TEXTFILE_PATH:
+    from utils.metrics import write_textfile
+    write_textfile(METRICS_TEXTFILE_PATH)
 
-    # REGISTRO DE LOG
-    log_results(
-        status="FALHA",
-        data=f"Falha de processamento: {e}"
-    )
\ No newline at end of file
+if profiler:
+    profiler.report()
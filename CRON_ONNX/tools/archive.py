@@ -0,0 +1,90 @@
+"""
+Consulta e exporta o arquivo local de capturas (classes/ImageArchive.py), por exemplo para montar uma
+pasta rotulada de calibração/treino sem baixar nada do Supabase.
+
+Uso (a partir da pasta CRON_ONNX):
+    python -m tools.archive [--since "2026-10-01"] [--until "2026-10-02 12:00"] [--camera cam_01] [--phase fase_2]
+    python -m tools.archive --stats
+    python -m tools.archive --since 2026-10-01 --export rotuladas/ [--by-phase]
+"""
+import argparse
+import os
+import time
+from collections import Counter
+
+from configs.config import ARCHIVE_DIR
+from classes.ImageArchive import ImageArchive
+from tools.query_logs import parse_time
+
+
+def print_stats(archive: ImageArchive, entries):
+    """Resumo por câmera e por fase das entradas consultadas"""
+    cameras = Counter(entry["camera_id"] for entry in entries)
+    phases = Counter(phase or "nenhuma" for entry in entries for phase in (entry["phases"] or [None]))
+
+    print(f"🗄️ {len(entries)} imagens, {sum(entry['length'] for entry in entries) / 1024 / 1024:.1f} MiB "
+          f"(arquivo inteiro: {archive.total_bytes() / 1024 / 1024:.1f} MiB)")
+    if entries:
+        first, last = entries[0]["epoch"], entries[-1]["epoch"]
+        print(f"   de {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(first))}"
+              f" até {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last))}")
+    for camera_id, count in sorted(cameras.items()):
+        print(f"   {camera_id:<20}{count:>8}")
+    for phase, count in sorted(phases.items()):
+        print(f"   {phase:<20}{count:>8}")
+
+
+def export(archive: ImageArchive, args):
+    """
+    Grava os JPEGs originais em args.export como <câmera>_<AAAAMMDD-HHMMSS.mmm>.jpg; com --by-phase,
+    em uma subpasta por fase mais frequente (formato usado por tools/compare_models.py)
+    """
+    count = 0
+    for entry, image_bytes in archive.iter_images(args.since, args.until, args.camera, args.phase):
+        folder = args.export
+        if args.by_phase:
+            phase = Counter(entry["phases"]).most_common(1)[0][0] if entry["phases"] else "nenhuma"
+            folder = os.path.join(folder, phase)
+        os.makedirs(folder, exist_ok=True)
+
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(entry["epoch"]))
+        name = f"{entry['camera_id']}_{stamp}.{int(entry['epoch'] * 1000) % 1000:03d}.jpg"
+        with open(os.path.join(folder, name), "wb") as f:
+            f.write(image_bytes)
+        count += 1
+
+    print(f"💾 {count} imagens exportadas para: {args.export}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--archive", default=ARCHIVE_DIR)
+    parser.add_argument("--since", type=parse_time, help="Início do intervalo (horário local)")
+    parser.add_argument("--until", type=parse_time, help="Fim do intervalo (horário local)")
+    parser.add_argument("--camera", help="Filtra pelo camera_id")
+    parser.add_argument("--phase", help="Só imagens em que esta fase foi detectada")
+    parser.add_argument("--stats", action="store_true", help="Mostra apenas o resumo por câmera e fase")
+    parser.add_argument("--export", help="Pasta de destino dos JPEGs originais")
+    parser.add_argument("--by-phase", action="store_true", help="Na exportação, uma subpasta por fase")
+    args = parser.parse_args()
+
+    archive = ImageArchive(args.archive)
+
+    if args.export:
+        export(archive, args)
+        return
+
+    entries = archive.query(args.since, args.until, args.camera, args.phase)
+
+    if args.stats:
+        print_stats(archive, entries)
+        return
+
+    for entry in entries:
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["epoch"]))
+        print(f"{stamp}  {entry['camera_id']:<12}{entry['length'] / 1024:>8.1f} KiB  "
+              f"{','.join(entry['phases']) or '-':<24}{entry['angle'] if entry['angle'] is not None else '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Compara o modelo FP32 com a versão INT8 sobre uma pasta rotulada, antes de colocar o INT8 em produção.
+A pasta deve ter uma subpasta por fase com as imagens dessa fase:
+
+    rotuladas/fase_1/*.jpg   rotuladas/fase_2/*.jpg   rotuladas/fase_3/*.jpg
+
+Para cada modelo relata precisão e recall por fase (usando a detecção de maior score de cada imagem),
+percentis de latência (pré-processamento + inferência + pós-processamento) e a memória (RSS): a do processo
+após carregar o modelo e o acréscimo máximo durante a inferência. As imagens são decodificadas uma por vez,
+então a memória medida é a do modelo (mais um quadro), não a da pasta inteira.
+Cada modelo roda em um processo separado, para que a memória de um não contamine a do outro.
+
+Uso (a partir da pasta CRON_ONNX):
+    python -m tools.compare_models rotuladas/ [--fp32 models/best_nano.onnx] [--int8 models/best_nano.int8.onnx]
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import time
+
+import numpy as np
+
+from configs.config import MODEL_PATH
+from utils.onnx_session import int8_model_path
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+NO_PHASE = "nenhuma"
+
+
+def load_labelled_images(folder: str):
+    """Lista (caminho, fase) de todas as imagens das subpastas de fase"""
+    samples = []
+    for phase in sorted(os.listdir(folder)):
+        phase_dir = os.path.join(folder, phase)
+        if not os.path.isdir(phase_dir):
+            continue
+        for name in sorted(os.listdir(phase_dir)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                samples.append((os.path.join(phase_dir, name), phase))
+
+    if not samples:
+        raise ValueError(f"Nenhuma imagem rotulada encontrada em: {folder}")
+
+    return samples
+
+
+def peak_rss_mib():
+    """Pico de RSS do processo até agora (ru_maxrss é em KiB no Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def current_rss_mib():
+    """RSS atual do processo (MiB); fora do Linux, o pico até agora"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mib()
+
+
+def evaluate_model(model_path: str, samples, rotation: str, warmup: int):
+    """
+    Executado em um processo próprio: roda o modelo em todas as imagens, decodificando uma por vez, e retorna
+    as fases previstas, as latências (ms), o RSS após carregar o modelo e o acréscimo máximo na inferência (MiB).
+    """
+    import cv2
+    from classes.ONNXDetector import ONNXDetector
+
+    detector = ONNXDetector(model_path, use_int8=False)
+    load_rss, load_peak = current_rss_mib(), peak_rss_mib()
+
+    predictions, latencies = [], []
+    inference_rss = load_rss
+
+    # Silencia os prints por imagem do detector durante a medição
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for path, _ in samples[:warmup]:
+            detector.detect_array(cv2.imread(path), rotation)
+
+        for path, _ in samples:
+            image = cv2.imread(path)
+
+            start = time.perf_counter()
+            detections = detector.detect_array(image, rotation, detailed=True)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            del image
+            inference_rss = max(inference_rss, current_rss_mib())
+
+            best = max(detections, key=lambda detection: detection["score"], default=None)
+            predictions.append(best["phase"] if best else NO_PHASE)
+
+    # Picos dentro de uma chamada (buffers temporários) só aparecem no ru_maxrss, se passarem o do carregamento
+    if peak_rss_mib() > load_peak:
+        inference_rss = max(inference_rss, peak_rss_mib())
+
+    return predictions, latencies, load_rss, inference_rss - load_rss
+
+
+def summarize(name, model_path, labels, predictions, latencies, load_rss_mib, inference_rss_delta_mib):
+    """Calcula precisão/recall por fase e percentis de latência"""
+    labels, predictions = np.array(labels), np.array(predictions)
+    per_phase = {}
+
+    for phase in sorted(set(labels)):
+        true_positives = np.sum((predictions == phase) & (labels == phase))
+        predicted = np.sum(predictions == phase)
+        actual = np.sum(labels == phase)
+        per_phase[phase] = {
+            "precision": float(true_positives / predicted) if predicted else 0.0,
+            "recall": float(true_positives / actual) if actual else 0.0,
+            "support": int(actual),
+        }
+
+    return {
+        "name": name,
+        "model": model_path,
+        "accuracy": float(np.mean(predictions == labels)),
+        "per_phase": per_phase,
+        "latency_ms": {
+            "p50": float(np.percentile(latencies, 50)),
+            "p90": float(np.percentile(latencies, 90)),
+            "p99": float(np.percentile(latencies, 99)),
+            "mean": float(np.mean(latencies)),
+        },
+        "load_rss_mib": load_rss_mib,
+        "inference_rss_delta_mib": inference_rss_delta_mib,
+        "predictions": predictions.tolist(),
+    }
+
+
+def print_report(reports):
+    """Tabela lado a lado dos modelos avaliados"""
+    phases = sorted(reports[0]["per_phase"])
+    header = f"{'':<22}" + "".join(f"{report['name']:>16}" for report in reports)
+    print(header)
+    print("-" * len(header))
+
+    def row(label, values, fmt):
+        print(f"{label:<22}" + "".join(f"{value:>16{fmt}}" for value in values))
+
+    row("acurácia", [report["accuracy"] for report in reports], ".3f")
+    for phase in phases:
+        row(f"{phase} precisão", [report["per_phase"][phase]["precision"] for report in reports], ".3f")
+        row(f"{phase} recall", [report["per_phase"][phase]["recall"] for report in reports], ".3f")
+    for percentile in ("p50", "p90", "p99"):
+        row(f"latência {percentile} (ms)", [report["latency_ms"][percentile] for report in reports], ".1f")
+    row("RSS do modelo (MiB)", [report["load_rss_mib"] for report in reports], ".1f")
+    row("+pico inferência (MiB)", [report["inference_rss_delta_mib"] for report in reports], ".1f")
+
+    if len(reports) == 2:
+        agreement = np.mean(np.array(reports[0]["predictions"]) == np.array(reports[1]["predictions"]))
+        speedup = reports[0]["latency_ms"]["p50"] / reports[1]["latency_ms"]["p50"]
+        print(f"\nConcordância entre os modelos: {agreement:.1%} | Ganho de latência (p50): {speedup:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="Pasta rotulada (uma subpasta por fase)")
+    parser.add_argument("--fp32", default=MODEL_PATH)
+    parser.add_argument("--int8", help="Padrão: <fp32>.int8.onnx")
+    parser.add_argument("--rotation", default="90_ccw", help="Rotação aplicada às imagens (como em CAMERAS)")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--json", help="Salva o relatório completo neste arquivo")
+    args = parser.parse_args()
+
+    samples = load_labelled_images(args.folder)
+    labels = [phase for _, phase in samples]
+    models = [("FP32", args.fp32), ("INT8", args.int8 or int8_model_path(args.fp32))]
+
+    print(f"🖼️ {len(samples)} imagens rotuladas em {args.folder}\n")
+
+    reports = []
+    context = multiprocessing.get_context("spawn")
+    for name, model_path in models:
+        with context.Pool(1) as pool:
+            result = pool.apply(evaluate_model, (model_path, samples, args.rotation, args.warmup))
+        reports.append(summarize(name, model_path, labels, *result))
+
+    print_report(reports)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n💾 Relatório salvo em: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
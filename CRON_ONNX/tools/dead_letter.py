@@ -0,0 +1,46 @@
+"""
+Lista e devolve para a fila de envios os registros da tabela dead_letter (classes/UploadQueue.py):
+os que o Storage ou o banco recusaram UPLOAD_MAX_ATTEMPTS vezes ou cuja imagem sumiu do disco.
+Corrija a causa (ex.: coluna nova na tabela, bucket sem permissão) e reenfileire; o serviço de detecção
+ou a próxima execução via cron os envia.
+
+Uso (a partir da pasta CRON_ONNX):
+    python -m tools.dead_letter               # lista
+    python -m tools.dead_letter --requeue [--id 12 15]
+"""
+import argparse
+import datetime
+
+from configs.config import UPLOAD_QUEUE_DIR
+from classes.UploadQueue import UploadQueue
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queue-dir", default=UPLOAD_QUEUE_DIR)
+    parser.add_argument("--requeue", action="store_true", help="Devolve os registros para a fila de envios")
+    parser.add_argument("--id", type=int, nargs="+", help="Só estes registros (padrão: todos)")
+    args = parser.parse_args()
+
+    # Só a tabela em disco é usada: sem cliente Supabase e sem a thread de envio
+    upload_queue = UploadQueue(None, None, lambda **fields: None, queue_dir=args.queue_dir)
+
+    if args.requeue:
+        requeued, kept = upload_queue.requeue_dead_letters(set(args.id) if args.id else None)
+        print(f"📤 {requeued} registro(s) devolvido(s) à fila de envios")
+        if kept:
+            print(f"⚠️ {kept} registro(s) mantido(s): imagem não existe mais no disco")
+        return
+
+    rows = [row for row in upload_queue.dead_letters() if not args.id or row[0] in args.id]
+    if not rows:
+        print("Nenhum registro na dead_letter.")
+        return
+
+    for item_id, failed_at, storage_name, _, _, attempts, reason in rows:
+        when = datetime.datetime.fromtimestamp(failed_at).strftime("%Y-%m-%d %H:%M")
+        print(f"{item_id:>6}  {when}  {attempts:>2}x  {storage_name}  {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Roda um backend de detecção sobre uma única imagem (arquivo ou captura da ESP32-CAM) e imprime as detecções.
+Substitui os scripts avulsos ONNX/main.py (classificação) e YOLO/main.py (Ultralytics).
+
+Uso (a partir da pasta CRON_ONNX):
+    python -m tools.detect_image --url http://192.168.1.14/capture [--backend ultralytics --model models/best_small.pt]
+    python -m tools.detect_image --image captured_images/cam_01_current_capture.jpg [--rotation 90_cw]
+"""
+import argparse
+import json
+from collections import Counter
+
+import cv2
+
+from configs.config import DETECTOR_BACKEND, MODEL_PATH, CAPTURE_TIMEOUT_SECONDS
+from classes.DetectorBackend import create_detector
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--image", help="Arquivo de imagem")
+    source.add_argument("--url", help="Endpoint /capture da ESP32-CAM")
+    parser.add_argument("--backend", default=DETECTOR_BACKEND, help="onnx, ultralytics ou onnx_classifier")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--rotation", default="90_ccw", help="Rotação aplicada à imagem (como em CAMERAS; none desativa)")
+    parser.add_argument("--conf", type=float, default=0.25, help="Score mínimo")
+    args = parser.parse_args()
+
+    detector = create_detector(args.backend, args.model, conf_threshold=args.conf)
+
+    if args.url:
+        import requests
+
+        print("Capturando imagem da ESP32-CAM...")
+        response = requests.get(args.url, timeout=CAPTURE_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        image = detector.decode_bytes(response.content)
+    else:
+        image = cv2.imread(args.image)
+        if image is None:
+            raise SystemExit(f"Imagem não encontrada ou inválida: {args.image}")
+
+    rotation = None if args.rotation == "none" else args.rotation
+    detections = detector.detect_array(image, rotation, detailed=True)
+
+    for detection in detections:
+        print(json.dumps(detection))
+
+    if not detections:
+        print("Nenhuma fase detectada na imagem.")
+        return
+
+    phase, count = Counter(detection["phase"] for detection in detections).most_common(1)[0]
+    print(f"📈 Fase que mais aparece ({detector.label}): {phase} ({count} detecções) → {detector.fase_to_angle[phase]}°")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Gera a versão INT8 (quantização estática) do modelo ONNX, calibrada com imagens reais da ESP32-CAM.
+O modelo é salvo ao lado do original como <modelo>.int8.onnx e passa a ser carregado
+pelo ONNXDetector quando USE_INT8_MODEL = True.
+
+Uso (a partir da pasta CRON_ONNX):
+    python -m tools.quantize_model [--model models/best_nano.onnx] [--images captured_images] [--limit 200]
+"""
+import argparse
+import os
+
+import cv2
+import onnxruntime as ort
+from onnxruntime.quantization import (
+    CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType, quantize_static
+)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+
+from configs.config import MODEL_PATH, CALIBRATION_IMAGES_DIR, INPUT_SIZE, PREPROCESS_LETTERBOX
+from classes.Preprocessor import Preprocessor
+from utils.onnx_session import int8_model_path
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+class ImageCalibrationReader(CalibrationDataReader):
+    """
+    Entrega as imagens de calibração já pré-processadas exatamente como na inferência.
+    """
+
+    def __init__(self, model_path: str, images_dir: str, rotation: str, limit: int):
+        session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        _, _, height, width = model_input.shape
+        input_size = (width, height) if isinstance(width, int) and isinstance(height, int) else INPUT_SIZE
+        self.preprocessor = Preprocessor(input_size, letterbox=PREPROCESS_LETTERBOX)
+        self.rotation = rotation
+
+        self.paths = sorted(
+            os.path.join(images_dir, name) for name in os.listdir(images_dir)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )[:limit]
+
+        if not self.paths:
+            raise ValueError(f"Nenhuma imagem de calibração encontrada em: {images_dir}")
+
+        self._iterator = iter(self.paths)
+
+    def get_next(self):
+        for path in self._iterator:
+            image = cv2.imread(path)
+            if image is None:
+                print(f"⚠️ Imagem ignorada na calibração: {path}")
+                continue
+
+            tensor, _ = self.preprocessor.run(image, self.rotation)
+            # O buffer do Preprocessor é reaproveitado: a calibração precisa de uma cópia
+            return {self.input_name: tensor.copy()}
+
+        return None
+
+    def rewind(self):
+        self._iterator = iter(self.paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--images", default=CALIBRATION_IMAGES_DIR, help="Pasta com imagens de calibração")
+    parser.add_argument("--output", help="Padrão: <modelo>.int8.onnx")
+    parser.add_argument("--rotation", default="90_ccw", help="Rotação aplicada às imagens (como em CAMERAS)")
+    parser.add_argument("--limit", type=int, default=200, help="Máximo de imagens de calibração")
+    parser.add_argument("--method", choices=["minmax", "entropy", "percentile"], default="minmax")
+    parser.add_argument("--per-channel", action="store_true", help="Quantização por canal dos pesos")
+    parser.add_argument("--exclude", nargs="*", default=[],
+                        help="Nós mantidos em FP32 (ex.: a cabeça de detecção, se a precisão cair demais)")
+    args = parser.parse_args()
+
+    output_path = args.output or int8_model_path(args.model)
+    preprocessed_path = output_path + ".prep.onnx"
+
+    # Inferência de formas e otimizações recomendadas antes da quantização
+    print(f"🔧 Preparando modelo: {args.model}")
+    quant_pre_process(args.model, preprocessed_path)
+
+    reader = ImageCalibrationReader(preprocessed_path, args.images, args.rotation, args.limit)
+    print(f"📷 Calibrando com {len(reader.paths)} imagens de {args.images}")
+
+    methods = {
+        "minmax": CalibrationMethod.MinMax,
+        "entropy": CalibrationMethod.Entropy,
+        "percentile": CalibrationMethod.Percentile,
+    }
+
+    try:
+        # QDQ com ativações uint8 e pesos int8: o formato com kernels otimizados em ARM (Raspberry Pi)
+        quantize_static(
+            preprocessed_path,
+            output_path,
+            reader,
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=args.per_channel,
+            calibrate_method=methods[args.method],
+            nodes_to_exclude=args.exclude,
+        )
+    finally:
+        os.remove(preprocessed_path)
+
+    print(f"✅ Modelo INT8 salvo em: {output_path}")
+    print("   Compare com: python -m tools.compare_models <pasta_rotulada>")
+
+
+if __name__ == "__main__":
+    main()
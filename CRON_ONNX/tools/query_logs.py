@@ -0,0 +1,189 @@
+"""
+Consulta o log estruturado (JSON por linha) gravado pelo ResultLogger, incluindo os logs rotacionados (.gz).
+Os arquivos fora do intervalo pedido são pulados pelo horário do último registro no nome, e no arquivo atual
+o início do intervalo é localizado por busca binária, sem ler o arquivo inteiro.
+Com --by-backend, resume a latência de detecção e as fases de cada backend/modelo (teste A/B).
+
+Uso (a partir da pasta CRON_ONNX):
+    python -m tools.query_logs [--since "2026-10-01 00:00"] [--until "2026-10-02"] [--status FALHA]
+                               [--camera cam_01] [--count] [--by-backend]
+"""
+import argparse
+import datetime
+import glob
+import gzip
+import json
+import os
+import sys
+
+from configs.config import LOG_SAVE_PATH
+
+
+# Abaixo desse tamanho de janela a busca binária termina e a leitura segue linha a linha
+SEEK_WINDOW_BYTES = 64 * 1024
+
+EPOCH_PREFIX = b'{"epoch": '
+
+
+def parse_time(value: str):
+    """Converte "AAAA-MM-DD[ HH:MM[:SS]]" (horário local) em epoch"""
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            pass
+
+    raise argparse.ArgumentTypeError(f"Horário inválido: {value}")
+
+
+def log_files(path: str):
+    """
+    Arquivos de log em ordem cronológica, como (caminho, horário do último registro ou None para o arquivo atual).
+    Cada rotacionado contém registros até o horário no nome e posteriores ao horário do anterior.
+    """
+    base, _ = os.path.splitext(path)
+    files = []
+
+    for rotated in sorted(glob.glob(f"{glob.escape(base)}.*.jsonl.gz")):
+        stamp = rotated[len(base) + 1:-len(".jsonl.gz")]
+        try:
+            files.append((rotated, datetime.datetime.strptime(stamp, "%Y%m%d-%H%M%S.%f").timestamp()))
+        except ValueError:
+            continue
+
+    if os.path.exists(path):
+        files.append((path, None))
+
+    return files
+
+
+def record_epoch(line: bytes):
+    """Lê o epoch do início da linha sem decodificar o registro inteiro (o ResultLogger grava "epoch" primeiro)"""
+    if line.startswith(EPOCH_PREFIX):
+        try:
+            return float(line[len(EPOCH_PREFIX):line.find(b",")])
+        except ValueError:
+            pass
+
+    try:
+        return json.loads(line)["epoch"]
+    except (ValueError, KeyError):
+        return None
+
+
+def seek_to(f, since: float):
+    """
+    Posiciona o arquivo (binário, não compactado) próximo do primeiro registro com epoch >= since.
+    Os registros são gravados em ordem de horário, então basta uma busca binária pelos deslocamentos.
+    """
+    lo, hi = 0, os.fstat(f.fileno()).st_size
+
+    while hi - lo > SEEK_WINDOW_BYTES:
+        mid = (lo + hi) // 2
+        f.seek(mid)
+        f.readline()  # descarta a linha parcial
+
+        epoch = record_epoch(f.readline())
+        if epoch is not None and epoch < since:
+            lo = mid
+        else:
+            hi = mid
+
+    f.seek(lo)
+    if lo:
+        f.readline()
+
+
+def iter_records(files, since: float = None, until: float = None, status=None, camera: str = None):
+    """Gera os registros que atendem aos filtros, lendo apenas os arquivos e trechos necessários"""
+    # Filtro barato por substring antes de decodificar o JSON
+    status_markers = [json.dumps({"status": s}, ensure_ascii=False)[1:-1].encode() for s in status or []]
+    camera_marker = json.dumps({"camera_id": camera}, ensure_ascii=False)[1:-1].encode() if camera else None
+
+    previous_end = None
+    for path, end in files:
+        # Arquivo rotacionado inteiramente fora do intervalo
+        skip = (since is not None and end is not None and end < since) or \
+               (until is not None and previous_end is not None and previous_end > until)
+        previous_end = end
+        if skip:
+            continue
+
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as f:
+            if since is not None and opener is open:
+                seek_to(f, since)
+
+            for line in f:
+                if status_markers and not any(marker in line for marker in status_markers):
+                    if until is None:
+                        continue
+                    # Ainda é preciso olhar o horário para parar no fim do intervalo
+                    epoch = record_epoch(line)
+                    if epoch is not None and epoch > until:
+                        return
+                    continue
+                if camera_marker and camera_marker not in line:
+                    continue
+
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # linha incompleta (o log pode estar sendo gravado)
+
+                epoch = record.get("epoch", 0)
+                if since is not None and epoch < since:
+                    continue
+                if until is not None and epoch > until:
+                    return
+
+                yield record
+
+
+def summarize_backends(records):
+    """Imprime, por backend, a quantidade de capturas, percentis do detect_batch (ms) e a taxa de detecção"""
+    latencies, detected = {}, {}
+    for record in records:
+        backend = record.get("backend")
+        detect_ms = record.get("timings_ms", {}).get("detect_batch")
+        if backend is None or detect_ms is None:
+            continue
+        latencies.setdefault(backend, []).append(detect_ms)
+        detected[backend] = detected.get(backend, 0) + bool(record.get("phases"))
+
+    print(f"{'backend':<32}{'capturas':>10}{'p50 ms':>10}{'p95 ms':>10}{'média ms':>10}{'com fase':>10}")
+    for backend, values in sorted(latencies.items()):
+        values.sort()
+        p50 = values[len(values) // 2]
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        print(f"{backend:<32}{len(values):>10}{p50:>10.1f}{p95:>10.1f}{sum(values) / len(values):>10.1f}"
+              f"{detected[backend] / len(values):>10.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", default=LOG_SAVE_PATH, help="Arquivo de log atual (os rotacionados ficam ao lado)")
+    parser.add_argument("--since", type=parse_time, help="Início do intervalo (horário local)")
+    parser.add_argument("--until", type=parse_time, help="Fim do intervalo (horário local)")
+    parser.add_argument("--status", nargs="+", help="Ex.: FALHA SUCESSO INFO")
+    parser.add_argument("--camera", help="Filtra pelo camera_id")
+    parser.add_argument("--count", action="store_true", help="Mostra apenas a quantidade de registros")
+    parser.add_argument("--by-backend", action="store_true", help="Compara a latência dos backends/modelos (A/B)")
+    args = parser.parse_args()
+
+    records = iter_records(log_files(args.log), args.since, args.until, args.status, args.camera)
+
+    if args.count:
+        print(sum(1 for _ in records))
+        return
+
+    if args.by_backend:
+        summarize_backends(records)
+        return
+
+    for record in records:
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
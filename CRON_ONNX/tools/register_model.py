@@ -0,0 +1,64 @@
+"""
+Publica um modelo como nova versão do registro (configs.MODEL_REGISTRY_DIR), com os metadados que o
+detector usa no lugar dos valores fixos: backend, tamanho de entrada, nomes das classes e fase → ângulo.
+O serviço de detecção em execução carrega a nova versão sozinho (MODEL_RELOAD_CHECK_SECONDS).
+
+Uso (a partir da pasta CRON_ONNX):
+    python -m tools.register_model models/best_nano.onnx [--version 20261017-0930] [--backend onnx]
+        [--class-names fase_1 fase_2 fase_3] [--angles '{"fase_1": 30, "fase_2": 60, "fase_3": 90}']
+        [--input-size 640 640] [--conf 0.25] [--activate]
+    python -m tools.register_model --list
+"""
+import argparse
+import datetime
+import json
+
+from configs.config import DETECTOR_BACKEND, INPUT_SIZE
+from classes.DetectorBackend import DetectorBackend
+from classes.ModelRegistry import ModelRegistry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model", nargs="?", help="Arquivo do modelo (.onnx ou .pt)")
+    parser.add_argument("--version", help="Nome da versão (padrão: data e hora atuais, AAAAMMDD-HHMMSS)")
+    parser.add_argument("--backend", default=DETECTOR_BACKEND, help="onnx, ultralytics ou onnx_classifier")
+    parser.add_argument("--class-names", nargs="+", help="Fase de cada classe do modelo, em ordem")
+    parser.add_argument("--angles", type=json.loads, default=DetectorBackend.FASE_TO_ANGLE,
+                        help="Mapa fase → ângulo do servo (JSON)")
+    parser.add_argument("--input-size", type=int, nargs=2, default=INPUT_SIZE, metavar=("LARGURA", "ALTURA"))
+    parser.add_argument("--conf", type=float, help="Score mínimo das detecções")
+    parser.add_argument("--activate", action="store_true",
+                        help="Grava a versão no arquivo CURRENT (senão vale a versão de maior nome)")
+    parser.add_argument("--list", action="store_true", help="Lista as versões do registro e sai")
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+
+    if args.list:
+        active = registry.active_version()
+        for version in registry.versions():
+            metadata = registry.metadata(version)
+            marker = "*" if version == active else " "
+            print(f"{marker} {version:<24}{metadata.get('backend', DETECTOR_BACKEND):<18}{metadata['model']}")
+        return
+
+    if not args.model:
+        parser.error("informe o arquivo do modelo (ou --list)")
+
+    version = args.version or datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    metadata = {
+        "backend": args.backend,
+        "input_size": list(args.input_size),
+        "class_names": args.class_names,
+        "fase_to_angle": args.angles,
+        "conf_threshold": args.conf,
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+    target = registry.publish(args.model, version, metadata, activate=args.activate)
+    print(f"📦 Versão {version} publicada em: {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Replay offline: roda o detector sobre capturas históricas na velocidade máxima da CPU, para validar um novo
+limiar ou modelo sem esperar capturas reais. As imagens vêm do arquivo local (classes/ImageArchive.py) ou de
+uma pasta de JPEGs; a decodificação é feita à frente por threads e a inferência em lotes.
+Para cada imagem calcula as fases, a fase estável (PhaseTracker em memória) e o ângulo que teria sido enviado,
+compara com a decisão registrada (índice do arquivo, log estruturado ou tabela do Supabase) e relata a vazão.
+
+Uso (a partir da pasta CRON_ONNX):
+    python -m tools.replay --archive [--since 2026-07-01] [--until 2026-10-01] [--camera cam_01]
+    python -m tools.replay --dir exportadas/ [--reference log|supabase] [--log logs/results_log.jsonl]
+        [--backend onnx --model models/best_small.onnx] [--conf 0.35] [--batch 8] [--workers 4]
+        [--output replay.jsonl]
+
+Na pasta, o nome <câmera>_<AAAAMMDD-HHMMSS>[.mmm].jpg (formato do tools/archive.py --export) dá a câmera e
+o horário de cada imagem; nos demais arquivos vale --camera e a data de modificação.
+"""
+import argparse
+import ast
+import bisect
+import datetime
+import json
+import os
+import re
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlparse
+
+from configs.config import (
+    ARCHIVE_DIR, CAMERAS, DETECTOR_BACKEND, LOG_SAVE_PATH, MODEL_PATH, SUPABASE_TABLE
+)
+from classes.DetectorBackend import create_detector
+from classes.ImageArchive import ImageArchive
+from classes.ModelRegistry import ModelRegistry
+from classes.PhaseTracker import PhaseTracker
+from tools.query_logs import iter_records, log_files, parse_time
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg")
+NO_PHASE = "nenhuma"
+
+# <câmera>_<AAAAMMDD-HHMMSS>[.mmm].jpg, como exportado por tools/archive.py
+EXPORTED_NAME = re.compile(r"^(?P<camera>.+)_(?P<stamp>\d{8}-\d{6})(?:\.(?P<ms>\d{3}))?\.jpe?g$", re.IGNORECASE)
+
+# Nome no Storage gravado por save_to_database: <câmera>_<AAAA-MM-DD HH:MM:SS>.<extensão>
+STORAGE_NAME = re.compile(r"^(?P<camera>.+)_(?P<stamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\.\w+$")
+
+
+# ----------------------------------------------------------------------
+# FONTES DE IMAGENS
+# ----------------------------------------------------------------------
+def archive_samples(archive: ImageArchive, since=None, until=None, camera=None):
+    """Amostras do arquivo local, já com a decisão registrada no índice como referência"""
+    return [
+        {
+            "camera_id": entry["camera_id"],
+            "epoch": entry["epoch"],
+            "load": lambda entry=entry: archive.read(entry),
+            "reference": {"phases": entry["phases"], "angle": entry["angle"]},
+        }
+        for entry in archive.query(since, until, camera)
+    ]
+
+
+def directory_samples(folder: str, camera=None, since=None, until=None):
+    """Amostras de uma pasta de JPEGs (recursiva), em ordem de horário"""
+    samples = []
+
+    for directory, _, names in os.walk(folder):
+        for name in names:
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+
+            path = os.path.join(directory, name)
+            match = EXPORTED_NAME.match(name)
+            if match:
+                camera_id = match.group("camera")
+                epoch = time.mktime(time.strptime(match.group("stamp"), "%Y%m%d-%H%M%S"))
+                epoch += int(match.group("ms") or 0) / 1000
+            else:
+                camera_id, epoch = camera or "desconhecida", os.path.getmtime(path)
+
+            if (camera and camera_id != camera) or (since and epoch < since) or (until and epoch > until):
+                continue
+
+            samples.append({"camera_id": camera_id, "epoch": epoch, "load": lambda path=path: _read(path),
+                            "reference": None})
+
+    samples.sort(key=lambda sample: sample["epoch"])
+    return samples
+
+
+def _read(path: str):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+# ----------------------------------------------------------------------
+# DECISÕES REGISTRADAS (REFERÊNCIA)
+# ----------------------------------------------------------------------
+def log_references(log_path: str, since: float, until: float):
+    """(câmera, epoch, fases, ângulo) das capturas registradas no log estruturado, sem os quadros reaproveitados"""
+    references = []
+    for record in iter_records(log_files(log_path), since, until, status=["SUCESSO", "FALHA"]):
+        if "phases" in record and "camera_id" in record and not record.get("cached"):
+            references.append((record["camera_id"], record["epoch"], record["phases"], record.get("angle")))
+
+    return references
+
+
+def supabase_references(since: float, until: float, page_size: int = 1000):
+    """
+    (câmera, epoch, fases, ângulo) dos registros da tabela do Supabase. A câmera e o horário vêm do
+    nome da imagem no Storage, gravado por save_to_database.
+    """
+    from utils.functions import get_supabase_client
+
+    client = get_supabase_client()
+    if not client:
+        raise ConnectionError("Falha ao inicializar o cliente Supabase.")
+
+    references, start = [], 0
+    while True:
+        rows = client.table(SUPABASE_TABLE).select("fases_detectadas, angulo_definido, imagem") \
+            .range(start, start + page_size - 1).execute().data
+        for row in rows:
+            match = STORAGE_NAME.match(unquote(os.path.basename(urlparse(row.get("imagem") or "").path)))
+            if not match:
+                continue
+
+            epoch = time.mktime(time.strptime(match.group("stamp"), "%Y-%m-%d %H:%M:%S"))
+            if since <= epoch <= until:
+                phases = ast.literal_eval(row["fases_detectadas"]) if row.get("fases_detectadas") else []
+                angle = int(str(row["angulo_definido"]).split()[0]) if row.get("angulo_definido") else None
+                references.append((match.group("camera"), epoch, phases, angle))
+
+        if len(rows) < page_size:
+            return references
+        start += page_size
+
+
+def attach_references(samples, references, tolerance: float):
+    """Associa a cada amostra sem referência a decisão registrada mais próxima no tempo (até tolerance segundos)"""
+    by_camera = {}
+    for camera_id, epoch, phases, angle in sorted(references, key=lambda reference: reference[1]):
+        epochs, decisions = by_camera.setdefault(camera_id, ([], []))
+        epochs.append(epoch)
+        decisions.append({"phases": phases, "angle": angle})
+
+    for sample in samples:
+        if sample["reference"] is not None or sample["camera_id"] not in by_camera:
+            continue
+
+        epochs, decisions = by_camera[sample["camera_id"]]
+        i = bisect.bisect_left(epochs, sample["epoch"])
+        nearest = min((j for j in (i - 1, i) if 0 <= j < len(epochs)),
+                      key=lambda j: abs(epochs[j] - sample["epoch"]), default=None)
+        if nearest is not None and abs(epochs[nearest] - sample["epoch"]) <= tolerance:
+            sample["reference"] = decisions[nearest]
+
+
+# ----------------------------------------------------------------------
+# REPLAY
+# ----------------------------------------------------------------------
+def load_replay_detector(args):
+    """O modelo informado em --model ou, sem ele, a versão ativa do registro (ou MODEL_PATH)"""
+    options = {} if args.conf is None else {"conf_threshold": args.conf}
+
+    if args.model:
+        return create_detector(args.backend, args.model, **options)
+
+    registry = ModelRegistry()
+    version = registry.active_version()
+    if version:
+        return registry.create_detector(version, **options)
+
+    return create_detector(args.backend, MODEL_PATH, **options)
+
+
+def prefetch(samples, decode, workers: int, depth: int):
+    """Decodifica as amostras em threads, até depth à frente, entregando-as na ordem original"""
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="replay_decode") as executor:
+        pending = deque()
+        for sample in samples:
+            pending.append(executor.submit(decode, sample))
+            if len(pending) >= depth:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def top_phase(phases):
+    return Counter(phases).most_common(1)[0][0] if phases else NO_PHASE
+
+
+def replay(detector, samples, args, output=None):
+    """Executa o replay e retorna as estatísticas (tempos, concordância com a referência)"""
+    rotations = {camera["id"]: camera.get("rotation", "90_ccw") for camera in CAMERAS}
+    tiles = {camera["id"]: camera.get("tiles") for camera in CAMERAS}
+    tracker = PhaseTracker(state_path=None)
+
+    stats = Counter()
+    confusion = Counter()
+    decode_ms, detect_ms = [], []
+
+    def decode(sample):
+        start = time.perf_counter()
+        try:
+            image = detector.decode_bytes(sample["load"]())
+        except Exception as e:
+            print(f"⚠️ [{sample['camera_id']}] Imagem ignorada ({e})")
+            image = None
+        decode_ms.append((time.perf_counter() - start) * 1000)
+        return sample, image
+
+    def run_batch(batch):
+        start = time.perf_counter()
+        results = detector.detect_batch(
+            [image for _, image in batch],
+            [args.rotation or rotations.get(sample["camera_id"], "90_ccw") for sample, _ in batch],
+            detailed=True,
+            regions=[tiles.get(sample["camera_id"]) for sample, _ in batch]
+        )
+        detect_ms.append((time.perf_counter() - start) * 1000)
+
+        for (sample, _), detections in zip(batch, results):
+            phases = [detection["phase"] for detection in detections]
+            stable_phase, share, changed = tracker.update(sample["camera_id"], detections, now=sample["epoch"])
+            angle = detector.fase_to_angle.get(stable_phase, 0) if phases else None
+
+            stats["images"] += 1
+            stats["commands"] += bool(phases and changed)
+
+            reference = sample["reference"]
+            if reference is not None:
+                stats["compared"] += 1
+                stats["same_phase"] += top_phase(phases) == top_phase(reference["phases"])
+                stats["same_angle"] += angle == reference["angle"]
+                confusion[(top_phase(reference["phases"]), top_phase(phases))] += 1
+
+            if output:
+                output.write(json.dumps({
+                    "camera_id": sample["camera_id"], "epoch": round(sample["epoch"], 3), "phases": phases,
+                    "scores": [round(detection["score"], 4) for detection in detections],
+                    "stable_phase": stable_phase, "angle": angle, "angle_sent": bool(phases and changed),
+                    "reference": reference,
+                }, ensure_ascii=False) + "\n")
+
+    batch = []
+    for sample, image in prefetch(samples, decode, args.workers, args.workers * args.batch * 2):
+        if image is None:
+            stats["errors"] += 1
+            continue
+
+        batch.append((sample, image))
+        if len(batch) >= args.batch:
+            run_batch(batch)
+            batch = []
+
+    if batch:
+        run_batch(batch)
+
+    return stats, confusion, decode_ms, detect_ms
+
+
+def print_report(stats, confusion, decode_ms, detect_ms, elapsed: float):
+    images = stats["images"]
+    print(f"\n⏱️ {images} imagens em {elapsed:.1f}s ({images / elapsed if elapsed else 0:.1f} imagens/s)"
+          f" | {stats['errors']} com erro de leitura/decodificação")
+    if decode_ms:
+        print(f"   decodificação: {sum(decode_ms) / len(decode_ms):.1f} ms por imagem (em paralelo)")
+    if images:
+        print(f"   detecção: {sum(detect_ms) / images:.1f} ms por imagem ({len(detect_ms)} lotes)")
+    print(f"   comandos de servo que seriam enviados: {stats['commands']}")
+
+    if not stats["compared"]:
+        print("\nNenhuma decisão registrada para comparar.")
+        return
+
+    compared = stats["compared"]
+    print(f"\n🔍 Comparação com as decisões registradas ({compared} imagens)")
+    print(f"   mesma fase principal: {stats['same_phase'] / compared:.1%}")
+    print(f"   mesmo ângulo: {stats['same_angle'] / compared:.1%}")
+
+    phases = sorted({phase for pair in confusion for phase in pair})
+    print(f"\n   {'registrada ↓ / replay →':<26}" + "".join(f"{phase:>10}" for phase in phases))
+    for reference in phases:
+        print(f"   {reference:<26}" + "".join(f"{confusion[(reference, phase)]:>10}" for phase in phases))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--archive", nargs="?", const=ARCHIVE_DIR, help="Arquivo local de imagens (padrão: ARCHIVE_DIR)")
+    source.add_argument("--dir", help="Pasta de JPEGs")
+    parser.add_argument("--since", type=parse_time, help="Início do intervalo (horário local)")
+    parser.add_argument("--until", type=parse_time, help="Fim do intervalo (horário local)")
+    parser.add_argument("--camera", help="Filtra pela câmera (ou câmera das imagens sem nome padrão)")
+    parser.add_argument("--reference", choices=("log", "supabase"), default="log",
+                        help="Decisões usadas na comparação das imagens que não vêm do arquivo local")
+    parser.add_argument("--log", default=LOG_SAVE_PATH)
+    parser.add_argument("--tolerance", type=float, default=60, help="Distância máxima (s) até a decisão registrada")
+    parser.add_argument("--backend", default=DETECTOR_BACKEND)
+    parser.add_argument("--model", help="Padrão: versão ativa do registro de modelos, ou MODEL_PATH")
+    parser.add_argument("--conf", type=float, help="Novo limiar de score a validar")
+    parser.add_argument("--rotation", help="Rotação de todas as imagens (padrão: a da câmera em CAMERAS)")
+    parser.add_argument("--batch", type=int, default=8, help="Imagens por inferência")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Threads de decodificação")
+    parser.add_argument("--output", help="Grava o resultado de cada imagem (JSON por linha)")
+    args = parser.parse_args()
+
+    if args.archive:
+        samples = archive_samples(ImageArchive(args.archive), args.since, args.until, args.camera)
+    else:
+        samples = directory_samples(args.dir, args.camera, args.since, args.until)
+
+        if samples:
+            since, until = samples[0]["epoch"] - args.tolerance, samples[-1]["epoch"] + args.tolerance
+            if args.reference == "supabase":
+                references = supabase_references(since, until)
+            else:
+                references = log_references(args.log, since, until)
+            attach_references(samples, references, args.tolerance)
+
+    if not samples:
+        raise SystemExit("Nenhuma imagem encontrada para o replay.")
+
+    detector = load_replay_detector(args)
+    print(f"🎬 Replay de {len(samples)} imagens com {getattr(detector, 'label', args.backend)} "
+          f"(de {datetime.datetime.fromtimestamp(samples[0]['epoch']):%Y-%m-%d %H:%M}"
+          f" a {datetime.datetime.fromtimestamp(samples[-1]['epoch']):%Y-%m-%d %H:%M})")
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    start = time.perf_counter()
+    try:
+        results = replay(detector, samples, args, output)
+    finally:
+        if output:
+            output.close()
+
+    print_report(*results, time.perf_counter() - start)
+    if args.output:
+        print(f"\n💾 Resultado por imagem salvo em: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+import socket
+
+from configs.config import DAEMON_SOCKET_PATH, DAEMON_TRIGGER_TIMEOUT
+
+
+# ----------------------------------------------------------------------
+# FUNÇÃO DE DISPARO DO SERVIÇO
+# ----------------------------------------------------------------------
+def trigger_daemon(command: str = "capture"):
+    """
+    Pede ao serviço de detecção em execução que rode um ciclo imediatamente.
+    Usa apenas a biblioteca padrão para manter o disparo pelo cron leve.
+    Retorna a resposta do serviço ("ok", "fail" ou "idle" sem câmera vencida no agendamento adaptativo),
+    "busy" se o serviço não responder dentro de DAEMON_TRIGGER_TIMEOUT (ciclo ainda em andamento),
+    "error" em outra falha de comunicação ou None se nenhum serviço estiver ativo. Só None deve levar a um ciclo local no processo do cron.
+    """
+    if not os.path.exists(DAEMON_SOCKET_PATH):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(DAEMON_TRIGGER_TIMEOUT)
+            sock.connect(DAEMON_SOCKET_PATH)
+            sock.sendall(f"{command}\n".encode())
+
+            # Conexão encerrada sem resposta: o serviço existe, então não roda um ciclo duplicado
+            return sock.makefile("r").readline().strip() or "fail"
+
+    except (ConnectionRefusedError, FileNotFoundError):
+        # Socket órfão de um serviço que não está mais rodando
+        return None
+    except socket.timeout:
+        # O serviço aceitou o pedido, mas o ciclo ainda não terminou
+        return "busy"
+    except OSError as e:
+        print(f"⚠️ Falha ao comunicar com o serviço de detecção: {e}")
+        return "error"
@@ -1,71 +1,137 @@
 import os
-import cv2
 import time
-import numpy as np
-import requests
+import queue
+import threading
 
-from configs.config import LOG_SAVE_PATH, IMAGE_SAVE_PATH
+from configs.config import (
+    IMAGE_SAVE_PATH, IMAGE_SAVE_ENABLED, CAMERAS, BROKER, PORT, UPLOAD_FLUSH_TIMEOUT,
+    MQTT_FLUSH_TIMEOUT, FRAME_GATE_ENABLED, ARCHIVE_ENABLED, CAPTURE_SCHEDULE_ADAPTIVE
+)
 from classes.SupabaseDB import SupabaseDB
+from classes.UploadQueue import UploadQueue
+from classes.MQTTOutbox import MQTTOutbox
+from classes.ResultLogger import ResultLogger
+from classes.PhaseTracker import PhaseTracker
+from classes.ImageArchive import ImageArchive
+from utils import metrics
+
+# Dependências pesadas (supabase, requests, cv2, paho) são importadas apenas no primeiro uso,
+# para a execução via cron não pagar por elas antes de precisar (ver main.py --profile-startup)
+
+
+# Log estruturado compartilhado, gravado por uma thread em segundo plano
+_result_logger = None
+_result_logger_lock = threading.Lock()
+
+# Cliente Supabase compartilhado: criado uma única vez e reaproveitado entre capturas
+_supabase = SupabaseDB()
+_supabase_client = None
+_supabase_lock = threading.Lock()
+
+# Fila persistente de envios ao Supabase, processada em segundo plano
+_upload_queue = None
+
+# Fila persistente de comandos MQTT, enviada em segundo plano com confirmação do broker
+_mqtt_outbox = None
+_mqtt_outbox_lock = threading.Lock()
+
+# Capturador compartilhado: mantém o pool de conexões e o estado do circuit breaker entre ciclos
+_camera_fetcher = None
+
+# Fase estável de cada câmera, suavizada entre capturas
+_phase_tracker = None
+
+# Última miniatura e detecções de cada câmera, para pular a inferência em cenas inalteradas
+_frame_gate = None
+
+# Intervalo de captura de cada câmera, ajustado pela fase e pela carga
+_capture_scheduler = None
+
+# Arquivo local das capturas originais (calibração e treino), gravado em segundo plano
+_image_archive = None
+_image_archive_lock = threading.Lock()
 
 
 # ----------------------------------------------------------------------
 # FUNÇÃO DE REGISTROS LOGS
 # ----------------------------------------------------------------------
-def log_results(status, data):
+def get_result_logger():
     """
-    Abre um log para registrar os resultados de processamento e erros. 
+    Retorna o log estruturado compartilhado, criando-o e iniciando a thread de escrita na primeira chamada.
     """
-    os.makedirs(os.path.dirname(LOG_SAVE_PATH), exist_ok=True)
+    global _result_logger
+
+    with _result_logger_lock:
+        if _result_logger is None:
+            _result_logger = ResultLogger().start()
 
-    with open(LOG_SAVE_PATH, "a") as log:
-        log_date = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-        message = f"[{log_date}] - {status} - {data}\n"
+        return _result_logger
 
-        log.write(message)
 
-    return
+def log_results(status, data, **fields):
+    """
+    Registra os resultados de processamento e erros no log estruturado (JSON por linha).
+    Campos extras (camera_id, phases, angle, timings_ms) são gravados junto da mensagem.
+    A escrita acontece em segundo plano, sem abrir o arquivo a cada chamada.
+    """
+    get_result_logger().log(status, data, **fields)
 
 
 # ----------------------------------------------------------------------
 # FUNÇÃO DE REGISTRO NO BD
 # ----------------------------------------------------------------------
-def save_to_database(fases, angulo):
+def get_supabase_client():
+    """
+    Retorna o cliente Supabase compartilhado, criando-o na primeira chamada.
+    """
+    global _supabase_client
+
+    with _supabase_lock:
+        if _supabase_client is None:
+            _supabase_client = _supabase.init_supabase()
+
+        return _supabase_client
+
+
+def get_upload_queue():
+    """
+    Retorna a fila de envios compartilhada, criando-a e iniciando a thread de envio na primeira chamada.
+    """
+    global _upload_queue
+
+    with _supabase_lock:
+        if _upload_queue is None:
+            _upload_queue = UploadQueue(_supabase, get_supabase_client, log_results).start()
+
+        return _upload_queue
+
+
+def save_to_database(fases, angulo, image_bytes: bytes = None, camera_id: str = "cam_01"):
     """
-    Armazena a imagem capturada no Storage do Supabase e registra os dados de captura no banco de dados
+    Coloca a imagem capturada e os dados de captura na fila de envio ao Supabase (Storage + banco).
+    O envio acontece em segundo plano; sem rede, o registro fica gravado em disco até ser enviado.
+    Se os bytes da imagem não forem informados, a imagem é lida do arquivo salvo da câmera.
     """
 
+    from utils.thumbnails import upload_extension
+
     try:
-        supabase = SupabaseDB()
-        db = supabase.init_supabase()
-
-        if db:
-            caminho_local = "captured_images/current_capture.jpg" 
-            nome_no_storage = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()) + ".jpg"
-
-            public_url = supabase.upload_image(db, "registros", caminho_local, nome_no_storage)
-
-            if public_url:                
-                novo_registro = {
-                    "imagem": public_url,
-                    "fases_detectadas": f"{fases}",
-                    "angulo_definido": f"{angulo} graus"
-                }
-                
-                dados_salvos = supabase.save_to_database(db, "registro", novo_registro)
-                print(f"Registro Salvo no Banco de dados Supabase {dados_salvos}")
-
-            else:
-                log_results(
-                    status="FALHA",
-                    data=f"Falha ao obter URL da imagem."
-                )
-        else:
-            log_results(
-                status="FALHA",
-                data=f"Falha ao inicializar o cliente Supabase."
-            )
+        if image_bytes is None:
+            with open(IMAGE_SAVE_PATH.format(camera_id=camera_id), "rb") as f:
+                image_bytes = f.read()
+
+        nome_no_storage = f"{camera_id}_" + time.strftime("%Y-%m-%d %H:%M:%S", time.localtime()) + upload_extension()
+
+        novo_registro = {
+            "fases_detectadas": f"{fases}",
+            "angulo_definido": f"{angulo} graus"
+        }
+
+        get_upload_queue().enqueue(novo_registro, image_bytes, nome_no_storage)
 
     except Exception as e:
+        metrics.failure("save_to_database", e)
+
         # Registra o log
         log_results(
             status="FALHA",
@@ -73,52 +139,463 @@ def save_to_database(fases, angulo):
         )
 
 
+def flush_uploads(timeout: float = UPLOAD_FLUSH_TIMEOUT):
+    """
+    Aguarda a fila de envios esvaziar antes de encerrar o processo (usado pela execução via cron).
+    O que não for enviado no prazo continua na fila em disco para a próxima execução.
+    """
+    if _upload_queue is None:
+        return True
+
+    sent = _upload_queue.flush(timeout)
+    if not sent:
+        print(f"⏳ {_upload_queue.pending_count()} registro(s) mantido(s) na fila para envio posterior.")
+
+    return sent
+
+
 # ----------------------------------------------------------------------
-# FUNÇÃO DE CAPTURA E SALVAMENTO
+# FUNÇÃO DE CAPTURA
 # ----------------------------------------------------------------------
-def capture_and_save_image(url: str, save_path: str):
+def get_camera_fetcher():
     """
-    Faz uma requisição HTTP para a ESP32-CAM, decodifica e salva a imagem.
-    Retorna True se for bem-sucedido, False caso contrário.
+    Retorna o capturador de câmeras compartilhado, criando-o na primeira chamada.
     """
+    global _camera_fetcher
 
-    print(f"📸 Tentando capturar imagem de: {url}")
-    try:
-        os.makedirs(os.path.dirname(IMAGE_SAVE_PATH), exist_ok=True)
+    if _camera_fetcher is None:
+        from classes.CameraFetcher import CameraFetcher
+
+        _camera_fetcher = CameraFetcher(log=log_results)
 
-        response = requests.get(url, timeout=5) 
-        response.raise_for_status() 
+    return _camera_fetcher
 
-        image_array = np.asarray(bytearray(response.content), dtype=np.uint8)
-        image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
 
-        if image is None:
-            raise Exception("Não foi possível decodificar a imagem recebida.")
+# ----------------------------------------------------------------------
+# FUNÇÃO DE SALVAMENTO
+# ----------------------------------------------------------------------
+def save_image(image_bytes: bytes, save_path: str):
+    """
+    Grava os bytes JPEG originais no disco, sem recodificar a imagem.
+    Retorna True se for bem-sucedido, False caso contrário.
+    """
+    try:
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
 
-        # Salva a imagem no caminho especificado
-        cv2.imwrite(save_path, image)
-        
-        print(f"✅ Imagem capturada e salva em: {save_path}")
+        # Grava em arquivo temporário e renomeia, para nunca deixar um JPEG pela metade
+        temp_path = save_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(image_bytes)
+        os.replace(temp_path, save_path)
+
+        print(f"✅ Imagem salva em: {save_path}")
         return True
-        
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Erro na requisição HTTP (ESP32-CAM): {e}")
+
+    except Exception as e:
+        print(f"❌ Erro ao salvar a imagem: {e}")
 
         # Registra o log
         log_results(
             status="FALHA",
-            data=f"Erro na requisição HTTP (ESP32-CAM): {e}"
+            data=f"Erro ao salvar a imagem: {e}"
         )
 
         return False
+
+
+def save_image_async(image_bytes: bytes, save_path: str):
+    """
+    Grava a imagem em segundo plano para não atrasar a inferência.
+    A thread não é daemon, então o processo aguarda a gravação antes de encerrar.
+    """
+    thread = threading.Thread(target=save_image, args=(image_bytes, save_path), name="save_image")
+    thread.start()
+
+    return thread
+
+
+def get_image_archive():
+    """
+    Retorna o arquivo local de imagens compartilhado, criando-o e iniciando a thread de escrita na primeira chamada.
+    """
+    global _image_archive
+
+    with _image_archive_lock:
+        if _image_archive is None:
+            _image_archive = ImageArchive().start()
+
+        return _image_archive
+
+
+# ----------------------------------------------------------------------
+# FUNÇÃO DE CONEXÃO MQTT
+# ----------------------------------------------------------------------
+def connect_mqtt():
+    """
+    Conecta ao broker MQTT e inicia o loop de rede em segundo plano.
+    Se o broker estiver fora do ar, o loop de rede continua tentando conectar e os
+    comandos ficam na fila (MQTTOutbox) até a conexão voltar.
+    Retorna o cliente ou None se o paho-mqtt não puder ser carregado.
+    """
+    try:
+        import paho.mqtt.client as mqtt
+
+        client = mqtt.Client()
     except Exception as e:
-        print(f"❌ Erro ao processar/salvar a imagem: {e}")
+        print(f"⚠️ Não foi possível criar o cliente MQTT. Erro: {e}")
+        return None
 
-        # Registra o log
+    try:
+        client.connect(BROKER, PORT, 60)
+        print(f"🔗 Conectado ao broker MQTT: {BROKER}:{PORT}")
+    except Exception as e:
+        print(f"⚠️ Não foi possível conectar ao broker MQTT, tentando em segundo plano. Erro: {e}")
+        client.connect_async(BROKER, PORT, 60)
+
+    client.loop_start()
+    return client
+
+
+def get_mqtt_outbox(client):
+    """
+    Retorna a fila de comandos MQTT compartilhada, criando-a e iniciando a thread de envio na primeira chamada.
+    """
+    global _mqtt_outbox
+
+    with _mqtt_outbox_lock:
+        if _mqtt_outbox is None:
+            _mqtt_outbox = MQTTOutbox(client, log_results).start()
+
+        return _mqtt_outbox
+
+
+def publish_command(client, topic: str, payload):
+    """
+    Coloca o comando do servo na fila de envio MQTT.
+    O envio acontece em segundo plano e só é retirado da fila após a confirmação do broker;
+    sem broker, o comando fica gravado em disco até ser enviado.
+    """
+    get_mqtt_outbox(client).enqueue(topic, str(payload))
+
+
+def flush_mqtt_commands(timeout: float = MQTT_FLUSH_TIMEOUT):
+    """
+    Aguarda os comandos MQTT serem confirmados antes de encerrar o processo (usado pela execução via cron).
+    O que não for confirmado no prazo continua na fila em disco para a próxima execução.
+    """
+    if _mqtt_outbox is None:
+        return True
+
+    sent = _mqtt_outbox.flush(timeout)
+    if not sent:
+        print(f"⏳ {_mqtt_outbox.pending_count()} comando(s) MQTT mantido(s) na fila para envio posterior.")
+
+    return sent
+
+
+# ----------------------------------------------------------------------
+# FUNÇÃO DE SUAVIZAÇÃO DA FASE
+# ----------------------------------------------------------------------
+def get_phase_tracker():
+    """
+    Retorna o estado de fases compartilhado, carregando-o do disco na primeira chamada.
+    """
+    global _phase_tracker
+
+    if _phase_tracker is None:
+        _phase_tracker = PhaseTracker()
+
+    return _phase_tracker
+
+
+def get_capture_scheduler(grace: float = 0.0):
+    """
+    Retorna o agendador adaptativo de capturas compartilhado, carregando-o do disco na primeira chamada
+    (grace só vale nessa primeira chamada; ver CaptureScheduler).
+    """
+    global _capture_scheduler
+
+    if _capture_scheduler is None:
+        from classes.CaptureScheduler import CaptureScheduler
+
+        _capture_scheduler = CaptureScheduler(grace=grace)
+
+    return _capture_scheduler
+
+
+def get_frame_gate():
+    """
+    Retorna o filtro de cena inalterada compartilhado, carregando-o do disco na primeira chamada.
+    """
+    global _frame_gate
+
+    if _frame_gate is None:
+        from classes.FrameGate import FrameGate
+
+        _frame_gate = FrameGate()
+
+    return _frame_gate
+
+
+# ----------------------------------------------------------------------
+# FUNÇÃO DO CICLO DE DETECÇÃO
+# ----------------------------------------------------------------------
+def run_detection_cycle(detector, client, cameras=CAMERAS):
+    """
+    Executa um ciclo completo para todas as câmeras: captura paralela, detecção,
+    envio MQTT, registro no banco e log.
+    Cada imagem segue para o detector assim que chega; as que chegarem enquanto o
+    detector está ocupado são processadas juntas no próximo lote.
+    Com METRICS_TRACE_ENABLED, as etapas do ciclo são registradas no log como um trace (status "TRACE").
+    Retorna True se ao menos uma câmera teve fase detectada, False caso contrário.
+    """
+    metrics.start_trace()
+    cycle_start = time.perf_counter()
+
+    try:
+        # CAPTURA PARALELA (bytes JPEG em memória), com o tempo até cada imagem chegar
+        frames = queue.Queue()
+        start = time.perf_counter()
+        remaining = get_camera_fetcher().fetch_all(
+            cameras, lambda camera, *frame: frames.put((camera, *frame, _elapsed_ms(start, "capture", camera["id"])))
+        )
+
+        any_sent = False
+        while remaining:
+            # Aguarda a próxima imagem e agrupa as que já chegaram nesse meio tempo
+            arrived = [frames.get()]
+            while True:
+                try:
+                    arrived.append(frames.get_nowait())
+                except queue.Empty:
+                    break
+            remaining -= len(arrived)
+
+            any_sent |= process_frames(detector, client, arrived)
+
+        return any_sent
+
+    except Exception as e:
+        print(f"Falha de processamento: {e}")
+        metrics.failure("cycle", e)
+
+        # REGISTRO DE LOG
         log_results(
             status="FALHA",
-            data=f"Erro ao processar/salvar a imagem: {e}"
+            data=f"Falha de processamento: {e}"
+        )
+        return False
+
+    finally:
+        cycle_ms = _elapsed_ms(cycle_start, "cycle")
+
+        trace = metrics.finish_trace()
+        if trace:
+            log_results(
+                status="TRACE",
+                data=f"Ciclo de detecção: {len(trace['spans'])} etapas em {cycle_ms} ms",
+                trace_id=trace["trace_id"], spans=trace["spans"]
+            )
+
+
+def _elapsed_ms(start: float, stage: str = None, camera_id: str = None):
+    """Milissegundos desde start; com stage, registra também a duração nas métricas (utils/metrics.py)"""
+    seconds = time.perf_counter() - start
+    if stage:
+        if camera_id:
+            metrics.record(stage, seconds, camera=camera_id)
+        else:
+            metrics.record(stage, seconds)
+
+    return round(seconds * 1000, 2)
+
+
+def process_frames(detector, client, frames):
+    """
+    Decodifica e detecta em lote as imagens recebidas, no formato (câmera, bytes, erro, tempo de captura em ms).
+    Câmeras cuja cena não mudou desde o último quadro processado reaproveitam as detecções guardadas (FrameGate).
+    Retorna True se ao menos uma câmera teve fase detectada, False caso contrário.
+    """
+    captured = []
+    any_sent = False
+
+    for camera, image_bytes, error, capture_ms in frames:
+        timings = {"capture": capture_ms}
+
+        if image_bytes is None:
+            print(f"\nPulando câmera {camera['id']}: Falha na captura de imagem.")
+            metrics.failure("capture", error if error is not None else "unknown")
+
+            # Registra o log
+            log_results(
+                status="FALHA",
+                data=f"[{camera['id']}] Erro na requisição HTTP (ESP32-CAM): {error}",
+                camera_id=camera["id"], stage="capture", timings_ms=timings
+            )
+            continue
+
+        print(f"✅ [{camera['id']}] Imagem capturada ({len(image_bytes)} bytes)")
+
+        # SALVAMENTO OPCIONAL EM SEGUNDO PLANO
+        if IMAGE_SAVE_ENABLED:
+            save_image_async(image_bytes, IMAGE_SAVE_PATH.format(camera_id=camera["id"]))
+
+        # FILTRO DE CENA INALTERADA (miniatura do JPEG, sem decodificar a imagem inteira)
+        thumbnail = None
+        if FRAME_GATE_ENABLED:
+            try:
+                start = time.perf_counter()
+                thumbnail = get_frame_gate().thumbnail(image_bytes)
+                cached, difference = get_frame_gate().check(camera["id"], thumbnail)
+                timings["gate"] = _elapsed_ms(start, "gate", camera["id"])
+            except Exception as e:
+                print(f"⚠️ [{camera['id']}] Filtro de cena indisponível, seguindo para a inferência: {e}")
+                cached = None
+
+            if cached is not None:
+                print(f"♻️ [{camera['id']}] Cena inalterada (diferença {difference:.1f}): detecções reaproveitadas")
+                any_sent |= handle_detection(detector, client, camera, cached, image_bytes, timings, cached=True)
+                continue
+
+        try:
+            start = time.perf_counter()
+            image = detector.decode_bytes(image_bytes)
+            timings["decode"] = _elapsed_ms(start, "decode", camera["id"])
+        except Exception as e:
+            print(f"❌ Erro ao decodificar a imagem da câmera {camera['id']}: {e}")
+            metrics.failure("decode", e)
+            log_results(
+                status="FALHA",
+                data=f"[{camera['id']}] Erro ao decodificar a imagem: {e}",
+                camera_id=camera["id"], stage="decode", timings_ms=timings
+            )
+            continue
+
+        captured.append((camera, image_bytes, image, timings, thumbnail))
+
+    if not captured:
+        return any_sent
+
+    # PROCESSAMENTO E CLASSIFICAÇÃO (um único lote para as câmeras que já responderam)
+    # strict: imagens sem inferência voltam como None e um erro na inferência chega aqui como exceção
+    start = time.perf_counter()
+    try:
+        results = detector.detect_batch(
+            [image for _, _, image, _, _ in captured],
+            [camera.get("rotation", "90_ccw") for camera, _, _, _, _ in captured],
+            detailed=True,
+            regions=[camera.get("tiles") for camera, _, _, _, _ in captured],
+            strict=True
+        )
+    except Exception as e:
+        print(f"❌ Erro na detecção do lote ({len(captured)} câmera(s)): {e}")
+        metrics.failure("detect_batch", e)
+        results = [None] * len(captured)
+    detect_ms = _elapsed_ms(start, "detect_batch")
+
+    if CAPTURE_SCHEDULE_ADAPTIVE and any(detections is not None for detections in results):
+        get_capture_scheduler().record_latency(detect_ms / 1000 / len(captured))
+
+    for (camera, image_bytes, _, timings, thumbnail), detections in zip(captured, results):
+        # Tempo do lote inteiro (pré-processamento, inferência e NMS), compartilhado pelas câmeras do lote
+        timings["detect_batch"] = detect_ms
+
+        # Sem inferência: a falha não vai para o filtro de cena (seria reaproveitada) nem para a fase estável
+        if detections is None:
+            log_results(
+                status="FALHA",
+                data=f"[{camera['id']}] Erro na detecção: imagem não processada pelo modelo",
+                camera_id=camera["id"], stage="detect", timings_ms=timings
+            )
+            continue
+
+        if thumbnail is not None:
+            get_frame_gate().store(camera["id"], thumbnail, detections)
+
+        any_sent |= handle_detection(detector, client, camera, detections, image_bytes, timings)
+
+    return any_sent
+
+
+def handle_detection(detector, client, camera, detections, image_bytes, timings=None, cached: bool = False):
+    """
+    Atualiza a fase estável da câmera com as detecções (ver DetectorBackend), publica o ângulo
+    apenas quando a fase estável muda e registra no banco e no log o resultado.
+    cached indica detecções reaproveitadas de um quadro anterior (cena inalterada); essas capturas,
+    quase idênticas à anterior, não vão para o arquivo local de imagens nem para o Supabase.
+    O log registra o backend que atendeu o lote (detector.label), para comparar modelos em teste A/B.
+    Retorna True se uma fase foi detectada, False caso contrário.
+    """
+    camera_id = camera["id"]
+    timings = timings if timings is not None else {}
+    backend = None if cached else getattr(detector, "label", None)
+
+    try:
+        detected_phases = [detection["phase"] for detection in detections]
+        stable_phase, share, changed = get_phase_tracker().update(camera_id, detections)
+        metrics.frame(camera_id, "cached" if cached else "detected" if detected_phases else "empty")
+
+        if CAPTURE_SCHEDULE_ADAPTIVE:
+            interval = get_capture_scheduler().observe(camera_id, detections, stable_phase, share, changed)
+            print(f"🗓️ [{camera_id}] Próxima captura em ~{interval / 60:.0f} min")
+
+        if not detected_phases:
+            print(f"[{camera_id}] Nenhuma fase detectada no arquivo capturado.")
+
+            if ARCHIVE_ENABLED and not cached:
+                get_image_archive().add(camera_id, image_bytes, [])
+
+            # REGISTRO DE LOG
+            log_results(
+                status="FALHA",
+                data=f"[{camera_id}] Nenhuma fase detectada no arquivo capturado",
+                camera_id=camera_id, stage="detect", phases=[], cached=cached, backend=backend, timings_ms=timings
+            )
+            return False
+
+        # Imprime todas as classes encontradas
+        print(f"📈 [{camera_id}] Fases detectadas: {detected_phases}")
+
+        # Ângulo da fase estável (maioria ponderada pelos scores nas últimas capturas)
+        angle_to_send = detector.fase_to_angle.get(stable_phase, 0) # Usa 0 se não encontrar
+        metrics.camera_phase(camera_id, stable_phase, angle_to_send)
+
+        # ENVIO MQTT (fila persistente, confirmado pelo broker em segundo plano), só quando a fase muda
+        if changed:
+            start = time.perf_counter()
+            publish_command(client, camera["topic"], angle_to_send)
+            timings["publish"] = _elapsed_ms(start, "publish", camera_id)
+            print(f"🎉 [{camera_id}] Ângulo correspondente enviado para a fila MQTT ({stable_phase}) → {angle_to_send}°")
+        else:
+            print(f"⏸️ [{camera_id}] Fase estável mantida ({stable_phase}, {share:.0%} da janela): servo não acionado")
+
+        # ARQUIVO LOCAL (JPEG original, gravado em segundo plano)
+        if ARCHIVE_ENABLED and not cached:
+            get_image_archive().add(camera_id, image_bytes, detected_phases, angle_to_send)
+
+        # REGISTRO DE LOG E BANCO
+        if not cached:
+            start = time.perf_counter()
+            save_to_database(detected_phases, angle_to_send, image_bytes, camera_id)
+            timings["save_to_database"] = _elapsed_ms(start, "save_to_database", camera_id)
+
+        log_results(
+            status="SUCESSO",
+            data=f"[{camera_id}] Fases detectadas: {detected_phases} | Angulo correspondente: {angle_to_send}",
+            camera_id=camera_id, phases=detected_phases, scores=[round(d["score"], 4) for d in detections],
+            stable_phase=stable_phase, stable_share=round(share, 4), angle=angle_to_send, angle_sent=changed,
+            cached=cached, backend=backend, timings_ms=timings
         )
+        return True
+
+    except Exception as e:
+        print(f"[{camera_id}] Falha de processamento: {e}")
+        metrics.failure("handle_detection", e)
 
+        # REGISTRO DE LOG
+        log_results(
+            status="FALHA",
+            data=f"[{camera_id}] Falha de processamento: {e}",
+            camera_id=camera_id, timings_ms=timings
+        )
         return False
-    
\ No newline at end of file
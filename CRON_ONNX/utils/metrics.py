@@ -0,0 +1,313 @@
+import os
+import json
+import time
+import bisect
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from configs.config import (
+    METRICS_ENABLED, METRICS_HOST, METRICS_PORT, METRICS_LATENCY_BUCKETS, METRICS_TRACE_ENABLED,
+    METRICS_TRACE_HISTORY
+)
+
+# Métricas no formato de texto do Prometheus, sem dependências além da biblioteca padrão.
+# Registrar uma medida custa um lock e uma busca binária nos buckets; memória e CPU do processo
+# só são lidas quando o endpoint é consultado. O servidor HTTP (http.server) só é importado pelo serviço,
+# para não pesar na inicialização da execução via cron.
+
+
+# ----------------------------------------------------------------------
+# TIPOS DE MÉTRICA
+# ----------------------------------------------------------------------
+class Metric:
+    """Série de valores por combinação de labels, na ordem de label_names"""
+
+    kind = None
+
+    def __init__(self, name: str, help_text: str, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict):
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _labels(self, key, extra: str = ""):
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def remove(self, **labels):
+        """Remove as séries cujos labels informados coincidem (ex.: a fase anterior de uma câmera)"""
+        positions = [(self.label_names.index(name), str(value)) for name, value in labels.items()]
+        with self._lock:
+            for key in [key for key in self._values if all(key[i] == value for i, value in positions)]:
+                del self._values[key]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{self._labels(key)} {_number(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Contagem por bucket (limite superior em segundos), soma e total de observações"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names=(), buckets=METRICS_LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+
+        return lines
+
+
+def _escape(value: str):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ----------------------------------------------------------------------
+# MÉTRICAS DO DETECTOR
+# ----------------------------------------------------------------------
+STAGE_SECONDS = Histogram(
+    "flow_control_stage_seconds",
+    "Duração de cada etapa (capture, decode, gate, preprocess, infer, postprocess, tile_preprocess, tile_infer, "
+    "detect_batch, publish, save_to_database, mqtt_publish, upload, cycle)",
+    ("stage",)
+)
+FAILURES = Counter("flow_control_failures_total", "Falhas por etapa e causa (tipo da exceção)", ("stage", "cause"))
+FRAMES = Counter("flow_control_frames_total", "Capturas processadas por câmera e resultado", ("camera", "result"))
+CYCLES = Counter("flow_control_cycles_total", "Ciclos de detecção executados")
+CAMERA_LAST_SEEN = Gauge(
+    "flow_control_camera_last_seen_timestamp_seconds", "Horário (epoch) da última captura recebida", ("camera",)
+)
+CAMERA_PHASE = Gauge("flow_control_camera_phase", "Fase estável atual da câmera (valor 1)", ("camera", "phase"))
+CAMERA_ANGLE = Gauge("flow_control_camera_angle_degrees", "Ângulo correspondente à fase estável", ("camera",))
+
+METRICS = [STAGE_SECONDS, FAILURES, FRAMES, CYCLES, CAMERA_LAST_SEEN, CAMERA_PHASE, CAMERA_ANGLE]
+
+_started_at = time.time()
+
+
+def process_metrics():
+    """Memória residente e CPU do processo, lidas no momento da consulta"""
+    lines = []
+
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # pico, fora do Linux
+
+    times = os.times()
+    lines += [
+        "# HELP process_resident_memory_bytes Memória residente do processo",
+        "# TYPE process_resident_memory_bytes gauge",
+        f"process_resident_memory_bytes {rss}",
+        "# HELP process_cpu_seconds_total Tempo de CPU (usuário + sistema) do processo",
+        "# TYPE process_cpu_seconds_total counter",
+        f"process_cpu_seconds_total {times.user + times.system!r}",
+        "# HELP process_start_time_seconds Horário (epoch) de início do processo",
+        "# TYPE process_start_time_seconds gauge",
+        f"process_start_time_seconds {_started_at!r}",
+    ]
+
+    return lines
+
+
+def render():
+    """Todas as métricas no formato de texto do Prometheus"""
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    lines += process_metrics()
+
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: str):
+    """Grava as métricas em um arquivo .prom (textfile collector do node_exporter), usado pela execução via cron"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        f.write(render())
+    os.replace(temp_path, path)
+
+
+# ----------------------------------------------------------------------
+# REGISTRO DAS ETAPAS E TRACE DO CICLO
+# ----------------------------------------------------------------------
+# Trace do ciclo em andamento (um ciclo por vez): as etapas de todas as threads entram nele
+_trace = None
+_traces = deque(maxlen=METRICS_TRACE_HISTORY)
+
+
+def record(stage: str, seconds: float, **attributes):
+    """Registra a duração de uma etapa já medida e, com um trace ativo, a adiciona como span"""
+    if not METRICS_ENABLED:
+        return
+
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+    trace = _trace
+    if trace is not None:
+        end = time.perf_counter()
+        span = {"stage": stage, "start_ms": round((end - seconds - trace["_start"]) * 1000, 2),
+                "duration_ms": round(seconds * 1000, 2)}
+        span.update(attributes)
+        trace["spans"].append(span)
+
+
+@contextmanager
+def span(stage: str, **attributes):
+    """Mede o bloco como uma etapa (ver record); a duração é registrada mesmo se o bloco falhar"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start, **attributes)
+
+
+def failure(stage: str, cause):
+    """Conta uma falha; cause é uma exceção (registrada pelo tipo) ou um texto curto e fixo"""
+    if METRICS_ENABLED:
+        FAILURES.inc(stage=stage, cause=cause if isinstance(cause, str) else type(cause).__name__)
+
+
+def frame(camera_id: str, result: str):
+    """Conta uma captura processada (detected, empty ou cached) e atualiza o horário da última captura"""
+    if METRICS_ENABLED:
+        FRAMES.inc(camera=camera_id, result=result)
+        CAMERA_LAST_SEEN.set(time.time(), camera=camera_id)
+
+
+def camera_phase(camera_id: str, phase: str, angle: int):
+    """Atualiza a fase estável e o ângulo da câmera"""
+    if METRICS_ENABLED and phase is not None:
+        CAMERA_PHASE.remove(camera=camera_id)
+        CAMERA_PHASE.set(1, camera=camera_id, phase=phase)
+        CAMERA_ANGLE.set(angle, camera=camera_id)
+
+
+def start_trace():
+    """Inicia o trace do ciclo (com METRICS_TRACE_ENABLED) e conta o ciclo"""
+    global _trace
+
+    if METRICS_ENABLED:
+        CYCLES.inc()
+    if METRICS_ENABLED and METRICS_TRACE_ENABLED:
+        _trace = {"trace_id": os.urandom(8).hex(), "epoch": time.time(), "spans": [],
+                  "_start": time.perf_counter()}
+
+
+def finish_trace():
+    """Encerra o trace do ciclo e o retorna (None sem trace ativo); os últimos ficam disponíveis em /traces"""
+    global _trace
+
+    trace, _trace = _trace, None
+    if trace is None:
+        return None
+
+    trace.pop("_start")
+    trace["spans"].sort(key=lambda span: span["start_ms"])
+    _traces.append(trace)
+
+    return trace
+
+
+# ----------------------------------------------------------------------
+# ENDPOINT HTTP
+# ----------------------------------------------------------------------
+def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT):
+    """Serve /metrics (e /traces) em uma thread em segundo plano; retorna o servidor (None se não iniciar)"""
+    if not METRICS_ENABLED:
+        return None
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path in ("/", "/metrics"):
+                body, content_type = render().encode(), "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/traces":
+                body, content_type = json.dumps(list(_traces), ensure_ascii=False).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # sem uma linha no terminal a cada consulta do Prometheus
+
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        print(f"⚠️ Endpoint de métricas indisponível em {host}:{port}: {e}")
+        return None
+
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics_server", daemon=True).start()
+    print(f"📊 Métricas disponíveis em http://{host}:{port}/metrics")
+
+    return server
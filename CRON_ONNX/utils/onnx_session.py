@@ -0,0 +1,152 @@
+import os
+import onnxruntime as ort
+
+from configs.config import (
+    ORT_PROVIDERS, ORT_INTRA_OP_THREADS, ORT_INTER_OP_THREADS, ORT_EXECUTION_MODE, ORT_GRAPH_OPTIMIZATION,
+    ORT_ENABLE_MEM_ARENA, ORT_ALLOW_SPINNING, ORT_INTRA_OP_AFFINITY, ORT_CACHE_OPTIMIZED_MODEL, USE_INT8_MODEL
+)
+
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+
+# ----------------------------------------------------------------------
+# FUNÇÃO DE CONFIGURAÇÃO DA SESSÃO
+# ----------------------------------------------------------------------
+def valid_affinity(affinity: str, intra_op_threads: int):
+    """
+    Confere se a afinidade tem uma entrada por thread extra (intra_op_threads - 1), cada uma com ao menos
+    um núcleo, e se os núcleos existem nesta máquina; caso contrário a afinidade é ignorada.
+    """
+    entries = affinity.split(";")
+    try:
+        cores = [[int(core) for core in entry.replace("-", ",").split(",") if core.strip()] for entry in entries]
+    except ValueError:
+        print(f"⚠️ Afinidade ignorada: formato inválido ({affinity!r}).")
+        return False
+
+    if len(entries) != intra_op_threads - 1:
+        print(f"⚠️ Afinidade ignorada: {len(entries)} entradas para {intra_op_threads - 1} threads extras.")
+        return False
+
+    if not all(cores):
+        print(f"⚠️ Afinidade ignorada: entrada sem núcleos ({affinity!r}).")
+        return False
+
+    highest = max(max(entry) for entry in cores)
+    if highest > (os.cpu_count() or 1):
+        print(f"⚠️ Afinidade ignorada: núcleo {highest} não existe nesta máquina.")
+        return False
+
+    return True
+
+
+def build_session_options(optimization_level: str = ORT_GRAPH_OPTIMIZATION, intra_op_threads: int = None,
+                          intra_op_affinity: str = None):
+    """
+    Monta as opções da sessão onnxruntime a partir de configs.config:
+    threads, modo de execução, nível de otimização, arena de memória e afinidade de CPU.
+    intra_op_threads e intra_op_affinity substituem os valores do config (ex.: workers do InferencePool).
+    """
+    if intra_op_threads is None:
+        intra_op_threads = ORT_INTRA_OP_THREADS
+    if intra_op_affinity is None:
+        intra_op_affinity = ORT_INTRA_OP_AFFINITY
+
+    options = ort.SessionOptions()
+
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = ORT_INTER_OP_THREADS
+    options.execution_mode = EXECUTION_MODES[ORT_EXECUTION_MODE]
+    options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[optimization_level]
+    options.enable_cpu_mem_arena = ORT_ENABLE_MEM_ARENA
+
+    # Sem spinning, as threads ociosas do onnxruntime dormem em vez de disputar CPU com MQTT/HTTP
+    options.add_session_config_entry("session.intra_op.allow_spinning", "1" if ORT_ALLOW_SPINNING else "0")
+    options.add_session_config_entry("session.inter_op.allow_spinning", "1" if ORT_ALLOW_SPINNING else "0")
+
+    # Fixa as threads de trabalho em núcleos específicos (a thread que chama run() não entra na lista)
+    if intra_op_affinity and valid_affinity(intra_op_affinity, intra_op_threads):
+        options.add_session_config_entry("session.intra_op_thread_affinities", intra_op_affinity)
+
+    return options
+
+
+def optimized_model_path(model_path: str):
+    """
+    Caminho do grafo otimizado em cache, ao lado do modelo.
+    A versão do onnxruntime faz parte do nome, pois o grafo salvo depende dela.
+    """
+    base, _ = os.path.splitext(model_path)
+    return f"{base}.opt-ort{ort.__version__}.onnx"
+
+
+def int8_model_path(model_path: str):
+    """Caminho do modelo INT8 gerado por tools/quantize_model.py ao lado do modelo FP32"""
+    base, _ = os.path.splitext(model_path)
+    return f"{base}.int8.onnx"
+
+
+def resolve_model_path(model_path: str, use_int8: bool = USE_INT8_MODEL):
+    """
+    Retorna o modelo INT8 quando ele estiver habilitado e já tiver sido gerado;
+    caso contrário, o próprio model_path.
+    """
+    if not use_int8 or model_path.endswith(".int8.onnx"):
+        return model_path
+
+    quantized_path = int8_model_path(model_path)
+    if os.path.exists(quantized_path):
+        print(f"⚡ Usando modelo quantizado INT8: {quantized_path}")
+        return quantized_path
+
+    print(f"⚠️ Modelo INT8 não encontrado ({quantized_path}); usando o modelo original.")
+    return model_path
+
+
+# ----------------------------------------------------------------------
+# FUNÇÃO DE CRIAÇÃO DA SESSÃO
+# ----------------------------------------------------------------------
+def create_session(model_path: str, intra_op_threads: int = None, intra_op_affinity: str = None):
+    """
+    Cria a sessão onnxruntime do modelo.
+    Na primeira execução o grafo otimizado é salvo ao lado do modelo; nas seguintes ele é
+    carregado sem repetir a otimização, acelerando a inicialização.
+    """
+    thread_options = {"intra_op_threads": intra_op_threads, "intra_op_affinity": intra_op_affinity}
+
+    if not ORT_CACHE_OPTIMIZED_MODEL or ORT_GRAPH_OPTIMIZATION == "disable":
+        return ort.InferenceSession(model_path, build_session_options(**thread_options), providers=ORT_PROVIDERS)
+
+    cache_path = optimized_model_path(model_path)
+
+    # O cache só vale se for mais novo que o modelo (um modelo substituído invalida o cache)
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(model_path):
+        try:
+            return ort.InferenceSession(cache_path, build_session_options("disable", **thread_options),
+                                        providers=ORT_PROVIDERS)
+        except Exception as e:
+            print(f"⚠️ Cache do modelo otimizado inválido, recriando: {e}")
+            os.remove(cache_path)
+
+    options = build_session_options(**thread_options)
+    options.optimized_model_filepath = cache_path
+
+    try:
+        session = ort.InferenceSession(model_path, options, providers=ORT_PROVIDERS)
+        print(f"💾 Grafo otimizado salvo em: {cache_path}")
+        return session
+    except Exception as e:
+        # Ex.: pasta de modelos sem permissão de escrita; segue sem cache
+        print(f"⚠️ Não foi possível salvar o grafo otimizado: {e}")
+        return ort.InferenceSession(model_path, build_session_options(**thread_options), providers=ORT_PROVIDERS)
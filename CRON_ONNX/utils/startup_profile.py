@@ -0,0 +1,72 @@
+import sys
+import time
+import builtins
+from contextlib import contextmanager
+
+
+# ----------------------------------------------------------------------
+# PERFIL DE INICIALIZAÇÃO (main.py --profile-startup)
+# ----------------------------------------------------------------------
+class StartupProfiler:
+    """
+    Mede o tempo de importação de cada módulo (na primeira importação) e das etapas de inicialização.
+    Substitui builtins.__import__ enquanto está instalado; o tempo próprio de um módulo desconta
+    os módulos importados por ele.
+    """
+
+    def __init__(self):
+        self.imports = {}  # módulo → (tempo total, tempo próprio) em segundos
+        self.stages = []  # (etapa, segundos)
+        self.started_at = time.perf_counter()
+
+        self._original_import = builtins.__import__
+        self._children = []
+
+    def install(self):
+        builtins.__import__ = self._import
+        return self
+
+    def uninstall(self):
+        builtins.__import__ = self._original_import
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Só mede a primeira importação absoluta; as seguintes vêm de sys.modules
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._children.pop()
+
+            if name not in self.imports:
+                self.imports[name] = (elapsed, elapsed - children)
+            if self._children:
+                self._children[-1] += elapsed
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mede uma etapa da inicialização (ex.: carregar o modelo, conectar ao broker)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def report(self, top: int = 15):
+        """Imprime as etapas e os módulos mais lentos de importar"""
+        self.uninstall()
+        total = time.perf_counter() - self.started_at
+
+        print(f"\n⏱️ Perfil de inicialização ({total * 1000:.0f} ms no total)")
+        print(f"   {'etapa':<40}{'ms':>9}")
+        for name, seconds in self.stages:
+            print(f"   {name:<40}{seconds * 1000:9.1f}")
+
+        print(f"\n   {'módulo (primeira importação)':<40}{'total':>9}{'próprio':>9}")
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        for name, (inclusive, own) in slowest:
+            print(f"   {name:<40}{inclusive * 1000:9.1f}{own * 1000:9.1f}")
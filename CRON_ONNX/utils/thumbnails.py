@@ -0,0 +1,86 @@
+import struct
+
+import cv2
+import numpy as np
+
+from configs.config import UPLOAD_IMAGE_FORMAT, UPLOAD_IMAGE_MAX_SIDE, UPLOAD_IMAGE_QUALITY
+
+
+# Formato das imagens enviadas ao Storage → (extensão, content-type, parâmetro de qualidade do cv2.imencode)
+UPLOAD_FORMATS = {
+    "original": (".jpg", "image/jpeg", None),
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+# Decodificação já reduzida pelo libjpeg (fator, modo), da maior para a menor redução
+REDUCED_DECODE_MODES = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# Marcadores SOF (início de quadro) que trazem as dimensões; C4, C8 e CC são outros segmentos
+SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_size(image_bytes: bytes):
+    """(largura, altura) lidas do cabeçalho do JPEG, sem decodificar a imagem; None se não encontradas"""
+    position = 2
+    while position + 9 <= len(image_bytes):
+        if image_bytes[position] != 0xFF:
+            return None
+
+        marker = image_bytes[position + 1]
+        length = struct.unpack(">H", image_bytes[position + 2:position + 4])[0]
+
+        if marker in SOF_MARKERS:
+            height, width = struct.unpack(">HH", image_bytes[position + 5:position + 9])
+            return width, height
+
+        position += 2 + length
+
+    return None
+
+
+def upload_extension(fmt: str = UPLOAD_IMAGE_FORMAT):
+    return UPLOAD_FORMATS[fmt][0]
+
+
+def upload_content_type(fmt: str = UPLOAD_IMAGE_FORMAT):
+    return UPLOAD_FORMATS[fmt][1]
+
+
+def encode_upload_image(image_bytes: bytes, fmt: str = UPLOAD_IMAGE_FORMAT, max_side: int = UPLOAD_IMAGE_MAX_SIDE,
+                        quality: int = UPLOAD_IMAGE_QUALITY):
+    """
+    Versão da captura enviada ao Storage: os próprios bytes JPEG ("original") ou uma miniatura JPEG/WebP
+    com o maior lado limitado a max_side (0 mantém a resolução). Quando a redução é grande, o JPEG
+    já é decodificado em 1/2, 1/4 ou 1/8 da resolução, sem passar pela imagem inteira.
+    """
+    extension, _, quality_flag = UPLOAD_FORMATS[fmt]
+    if quality_flag is None:
+        return image_bytes
+
+    mode = cv2.IMREAD_COLOR
+    size = jpeg_size(image_bytes)
+    if size and max_side:
+        for factor, reduced_mode in REDUCED_DECODE_MODES:
+            if max(size) // factor >= max_side:
+                mode = reduced_mode
+                break
+
+    image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), mode)
+    if image is None:
+        raise ValueError("Não foi possível decodificar a imagem para o envio.")
+
+    height, width = image.shape[:2]
+    scale = max_side / max(height, width) if max_side else 1.0
+    if scale < 1.0:
+        image = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+
+    ok, encoded = cv2.imencode(extension, image, [quality_flag, quality])
+    if not ok:
+        raise ValueError(f"Não foi possível codificar a imagem em {fmt}.")
+
+    return encoded.tobytes()